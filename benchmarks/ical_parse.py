@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compare CalDAV event parsing: vobject (the old path) vs the streaming reader.
+
+Builds --events synthetic calendar-data bodies shaped like a server's
+expanded REPORT answer (one instance each, with attendees, an alarm and a
+long description), then times turning them into
+(uid, start, end, summary, description):
+
+- ``vobject``: caldav's ``vobject_instance``, as list_events used to do;
+- ``streaming``: ``calendar_sync.utils.ical.parse_many`` in-process;
+- ``pool``: the same with ``--processes`` worker processes.
+
+    python benchmarks/ical_parse.py --events 20000 --attendees 30 --processes 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# calendar_sync.config loads config.yaml at import time; point it at a stub.
+_cfg = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+_cfg.write('calendars: []\n')
+_cfg.close()
+os.environ.setdefault('CONFIG_PATH', _cfg.name)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from caldav.objects import Event as CaldavEvent  # noqa: E402
+
+from calendar_sync.utils import ical  # noqa: E402
+
+
+def build(n_events, n_attendees):
+    attendees = ''.join(
+        f'ATTENDEE;CN="Person {a}";ROLE=REQ-PARTICIPANT;PARTSTAT=ACCEPTED;RSVP=TRUE:mailto:person{a}@example.com\r\n'
+        for a in range(n_attendees)
+    )
+    description = 'Agenda:\\n' + '\\n'.join(f'- item {i}\\, with details' for i in range(20))
+    texts = []
+    for i in range(n_events):
+        day, hour = 1 + i % 28, 8 + i % 10
+        texts.append(
+            'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//benchmark//EN\r\nBEGIN:VEVENT\r\n'
+            f'UID:event-{i // 10}@example.com\r\n'
+            f'RECURRENCE-ID:202602{day:02d}T{hour:02d}0000Z\r\n'
+            'DTSTAMP:20260101T000000Z\r\n'
+            f'DTSTART:202602{day:02d}T{hour:02d}0000Z\r\n'
+            f'DTEND:202602{day:02d}T{hour:02d}3000Z\r\n'
+            f'SUMMARY:Meeting {i}\r\n'
+            f'DESCRIPTION:{description}\r\n'
+            'ORGANIZER;CN=Organizer:mailto:organizer@example.com\r\n'
+            f'{attendees}'
+            'BEGIN:VALARM\r\nACTION:DISPLAY\r\nDESCRIPTION:Reminder\r\nTRIGGER:-PT15M\r\nEND:VALARM\r\n'
+            'END:VEVENT\r\nEND:VCALENDAR\r\n'
+        )
+    return texts
+
+
+def with_vobject(texts):
+    events = []
+    for text in texts:
+        vevent = CaldavEvent(None, data=text).vobject_instance.vevent
+        events.append((
+            str(vevent.uid.value),
+            vevent.dtstart.value.isoformat(),
+            vevent.dtend.value.isoformat(),
+            vevent.summary.value,
+            str(vevent.description.value) if hasattr(vevent, 'description') else '',
+        ))
+    return events
+
+
+def with_streaming(texts, processes=0):
+    return [
+        (e.uid, e.start.isoformat(), e.end.isoformat(), e.summary, e.description)
+        for events in ical.parse_many(texts, processes)
+        for e in events
+    ]
+
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    print(f'{label:<12} {elapsed * 1000:>10.1f} ms  {len(result) / elapsed:>10.0f} events/s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--attendees', type=int, default=20)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    texts = build(args.events, args.attendees)
+    print(f'{args.events} events, {sum(map(len, texts)) / 1e6:.1f} MB of calendar-data')
+    baseline = timed('vobject', with_vobject, texts)
+    streamed = timed('streaming', with_streaming, texts)
+    if args.processes > 1:
+        ical.parse_many(texts[:ical.POOL_MIN_TEXTS], args.processes)  # start the workers
+        pooled = timed(f'pool x{args.processes}', with_streaming, texts, args.processes)
+        assert pooled == streamed
+    assert streamed == baseline, 'streaming reader disagrees with vobject'
+    os.unlink(_cfg.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Measure cold-start import time with ``python -X importtime``.
+
+Each scenario starts a fresh interpreter that imports the sync engine and
+resolves the backends a config.yaml of that shape would use, then reports
+the total import time and which calendar client libraries got loaded:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --check --max-ms 3000   # CI
+
+``--check`` fails if a scenario loads the client library of a backend it
+does not use (i.e. backend loading stopped being lazy); ``--max-ms`` also
+fails on a scenario slower than that.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Client library each backend type needs (exchange authenticates with msal).
+LIBRARIES = {
+    'google': {'googleapiclient'},
+    'outlook': {'msal'},
+    'exchange': {'exchangelib', 'msal'},
+    'caldav': {'caldav'},
+}
+SCENARIOS = [(), ('google',), ('outlook',), ('exchange',), ('caldav',), tuple(LIBRARIES)]
+
+CHILD = '''
+import json, sys
+import calendar_sync.sync
+from calendar_sync.calendars.base import BaseCalendar
+for calendar_type in {types!r}:
+    BaseCalendar.backend_class(calendar_type)
+libraries = sorted(set().union(*{libraries!r}.values()))
+print(json.dumps([name for name in libraries if name in sys.modules]))
+'''
+
+
+def run(types, env):
+    code = CHILD.format(types=list(types), libraries=LIBRARIES)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):  # top-level import; nested ones are in its cumulative
+            total_us += int(cumulative)
+    return total_us / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--check', action='store_true', help='fail if an unused backend library is imported')
+    parser.add_argument('--max-ms', type=float, help='fail if any scenario takes longer than this')
+    args = parser.parse_args()
+
+    # calendar_sync.config loads config.yaml at import time; point it at a stub.
+    cfg = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    cfg.write('calendars: []\n')
+    cfg.close()
+    env = {**os.environ, 'CONFIG_PATH': cfg.name, 'LOG_LEVEL': 'WARNING', 'PYTHONPATH': str(ROOT)}
+
+    failures = []
+    print(f'{"backends":<34} {"import ms":>10}  libraries loaded')
+    for types in SCENARIOS:
+        best, loaded = min(run(types, env) for _ in range(args.repeat))
+        name = ','.join(types) or '(none)'
+        print(f'{name:<34} {best:>10.1f}  {" ".join(loaded) or "-"}')
+        allowed = set().union(*(LIBRARIES[t] for t in types))
+        if args.check and set(loaded) - allowed:
+            failures.append(f'{name}: imported unused {", ".join(sorted(set(loaded) - allowed))}')
+        if args.max_ms is not None and best > args.max_ms:
+            failures.append(f'{name}: {best:.0f} ms > {args.max_ms:.0f} ms')
+    os.unlink(cfg.name)
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Count SQL statements issued by a sync pass, before and after MappingIndex.
+
+Runs a synthetic steady-state pass (every event already mapped, nothing to
+write) against an in-memory SQLite database with fake calendars:
+
+    python benchmarks/mapping_queries.py --calendars 8 --events 200
+
+"before" replays the old access pattern (one filter_by per event × target and
+one per Busy event); "after" plans and executes the pass over a MappingIndex.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# calendar_sync.config loads config.yaml at import time; point it at a stub.
+_cfg = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+_cfg.write('calendars: []\n')
+_cfg.close()
+os.environ.setdefault('CONFIG_PATH', _cfg.name)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from calendar_sync.calendars.base import EventDelta  # noqa: E402
+from calendar_sync.db.models import Base, EventMapping  # noqa: E402
+from calendar_sync.db.index import MappingIndex  # noqa: E402
+from calendar_sync.planner import plan_sync  # noqa: E402
+from calendar_sync.sync import execute_plan  # noqa: E402
+from calendar_sync.writes import WriteExecutor  # noqa: E402
+
+START = '2025-01-01T10:00:00+00:00'
+END = '2025-01-01T11:00:00+00:00'
+
+
+class FakeCalendar:
+    onlysource = False
+    busy_calendar_id = None
+    fetch_timeout = None
+
+    def __init__(self, cal_id, events):
+        self.id = cal_id
+        self.events = events
+
+    def list_events(self, time_min, time_max):
+        return self.events
+
+    def list_changes(self, time_min, time_max, sync_token=None):
+        return EventDelta(self.list_events(time_min, time_max), [], None, True)
+
+    def create_busy_event(self, start, end, source_event_id=None):
+        raise AssertionError('steady state must not write')
+
+    def delete_event(self, event_id):
+        raise AssertionError('steady state must not write')
+
+
+def build(n_calendars, n_events):
+    calendars = []
+    mappings = []
+    for c in range(n_calendars):
+        events = [
+            {'id': f'c{c}-e{i}', 'start': START, 'end': END, 'summary': 'Meeting'}
+            for i in range(n_events)
+        ]
+        calendars.append(FakeCalendar(f'cal{c}', events))
+    meetings = {cal.id: list(cal.events) for cal in calendars}
+    for source in calendars:
+        for target in calendars:
+            if target is source:
+                continue
+            for ev in meetings[source.id]:
+                busy_id = f'busy-{ev["id"]}-{target.id}'
+                mappings.append(EventMapping(
+                    source_calendar=source.id, source_event_id=ev['id'],
+                    target_calendar=target.id, busy_event_id=busy_id,
+                    start_time=START, end_time=END,
+                ))
+                # The target sees our Busy event when it is processed as a source.
+                target.events.append({'id': busy_id, 'start': START, 'end': END, 'summary': 'Busy'})
+    return calendars, mappings
+
+
+def counting_session(mappings):
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    session.add_all(mappings)
+    session.commit()
+    session.expunge_all()
+    counter = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: counter.append(1))
+    return session, counter
+
+
+def run_before(calendars, session):
+    for source in calendars:
+        ids = set()
+        for ev in source.list_events(None, None):
+            ids.add(ev['id'])
+            if ev['summary'] == 'Busy':
+                session.query(EventMapping).filter_by(
+                    target_calendar=source.id, busy_event_id=ev['id'],
+                ).first()
+                continue
+            for target in calendars:
+                if target is source:
+                    continue
+                session.query(EventMapping).filter_by(
+                    source_calendar=source.id, source_event_id=ev['id'], target_calendar=target.id,
+                ).first()
+        session.query(EventMapping).filter_by(source_calendar=source.id).all()
+
+
+def run_after(calendars, session):
+    index = MappingIndex.load(session)
+    failed = set()
+    fetched = {source.id: source.list_changes(None, None) for source in calendars}
+    plan = plan_sync(calendars, fetched, index, failed)
+    execute_plan(plan, WriteExecutor(), index, failed)
+    index.flush()
+    assert not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calendars', type=int, default=8)
+    parser.add_argument('--events', type=int, default=200)
+    args = parser.parse_args()
+
+    calendars, mappings = build(args.calendars, args.events)
+    print(f'{args.calendars} calendars × {args.events} events, {len(mappings)} mappings')
+    for label, run in (('before', run_before), ('after', run_after)):
+        session, counter = counting_session(
+            [EventMapping(**{c.name: getattr(m, c.name) for c in EventMapping.__table__.columns}) for m in mappings]
+        )
+        run(calendars, session)
+        print(f'{label:>6}: {len(counter)} SQL statements')
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Time the sync planner on a large synthetic run, with no I/O at all.
+
+Builds fake calendars holding --events source events in total, and a mapping
+index where most events are already mapped (a steady state), a share moved,
+a share new and a share of mappings orphaned, then times ``plan_sync``:
+
+    python benchmarks/planner.py --calendars 4 --events 100000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# calendar_sync.config loads config.yaml at import time; point it at a stub.
+_cfg = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+_cfg.write('calendars: []\n')
+_cfg.close()
+os.environ.setdefault('CONFIG_PATH', _cfg.name)
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calendar_sync.calendars.base import EventDelta  # noqa: E402
+from calendar_sync.db.index import MappingIndex  # noqa: E402
+from calendar_sync.db.models import EventMapping  # noqa: E402
+from calendar_sync.planner import plan_sync  # noqa: E402
+
+START = '2025-01-01T10:00:00+00:00'
+END = '2025-01-01T11:00:00+00:00'
+MOVED = '2025-01-01T12:00:00+00:00'
+
+
+class FakeCalendar:
+    onlysource = False
+    busy_calendar_id = None
+
+    def __init__(self, cal_id):
+        self.id = cal_id
+
+    def series_id(self, event_id):
+        return None
+
+
+def build(n_calendars, n_events, moved_pct, new_pct, orphan_pct):
+    calendars = [FakeCalendar(f'cal{c}') for c in range(n_calendars)]
+    per_calendar = n_events // n_calendars
+    fetched, mappings = {}, []
+    for source in calendars:
+        events = []
+        for i in range(per_calendar):
+            event_id = f'{source.id}-e{i}'
+            bucket = i % 100
+            events.append({
+                'id': event_id, 'summary': 'Meeting', 'end': END,
+                'start': MOVED if bucket < moved_pct else START,
+            })
+            if bucket >= 100 - new_pct:
+                continue
+            for target in calendars:
+                if target is not source:
+                    mappings.append(_mapping(source, event_id, target))
+        for i in range(per_calendar * orphan_pct // 100):
+            for target in calendars:
+                if target is not source:
+                    mappings.append(_mapping(source, f'{source.id}-gone{i}', target))
+        fetched[source.id] = EventDelta(events, [], None, True)
+    return calendars, fetched, mappings
+
+
+def _mapping(source, event_id, target):
+    return EventMapping(
+        source_calendar=source.id, source_event_id=event_id, target_calendar=target.id,
+        busy_event_id=f'busy-{event_id}-{target.id}', start_time=START, end_time=END,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calendars', type=int, default=4)
+    parser.add_argument('--events', type=int, default=100_000)
+    parser.add_argument('--moved-pct', type=int, default=2)
+    parser.add_argument('--new-pct', type=int, default=2)
+    parser.add_argument('--orphan-pct', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    calendars, fetched, mappings = build(args.calendars, args.events, args.moved_pct, args.new_pct, args.orphan_pct)
+    index = MappingIndex(None, mappings)
+    print(f'{args.calendars} calendars, {args.events} events, {len(index)} mappings')
+    best = None
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        plan = plan_sync(calendars, fetched, index, set())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'plan: {len(plan)} ops {plan.summary()}')
+    print(f'best of {args.repeat}: {best:.3f}s ({best / args.events * 1e6:.1f} µs/event)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,31 @@
+import argparse
+
 import calendar_sync.config  # noqa: F401
 from calendar_sync.sync import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(prog="calendar_sync", description="Sync Busy events between calendars.")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="fetch events and print the planned writes without changing any calendar or mapping",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and sync every daemon_interval_seconds until SIGTERM",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        help="seconds between daemon cycles (overrides daemon_interval_seconds)",
+    )
+    args = parser.parse_args()
+    if args.daemon:
+        if args.dry_run:
+            parser.error("--dry-run cannot be combined with --daemon")
+        from calendar_sync.daemon import main as run_daemon
+
+        run_daemon(interval=args.interval)
+    else:
+        main(dry_run=args.dry_run)
@@ -1,7 +1,19 @@
 from .base import BaseCalendar
-from .google_calendar import GoogleCalendar
-from .outlook_calendar import OutlookCalendar
-from .exchange_calendar import ExchangeCalendar
-from .caldav_calendar import CaldavCalendar
+
+# Backend classes are imported on first access (see BACKENDS in base.py), so
+# importing this package does not load every calendar client library.
+_BACKEND_TYPES = {
+    'GoogleCalendar': 'google',
+    'OutlookCalendar': 'outlook',
+    'ExchangeCalendar': 'exchange',
+    'CaldavCalendar': 'caldav',
+}
+
+
+def __getattr__(name):
+    if name in _BACKEND_TYPES:
+        return BaseCalendar.backend_class(_BACKEND_TYPES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ['BaseCalendar', 'GoogleCalendar', 'OutlookCalendar', 'ExchangeCalendar', 'CaldavCalendar']
@@ -1,11 +1,105 @@
 from abc import ABC, abstractmethod
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import NamedTuple, Optional
 
 import logging
 
+from calendar_sync.utils.time import to_epoch
+
 logger = logging.getLogger(__name__)
 
+# Built-in backends as "module:Class", imported only when a calendar of that
+# type is configured: each pulls in a heavy client library (googleapiclient,
+# msal, exchangelib, caldav/lxml). Other packages can add backends under the
+# "calendar_sync.backends" entry-point group, named by type.
+BACKENDS = {
+    'google': 'calendar_sync.calendars.google_calendar:GoogleCalendar',
+    'outlook': 'calendar_sync.calendars.outlook_calendar:OutlookCalendar',
+    'exchange': 'calendar_sync.calendars.exchange_calendar:ExchangeCalendar',
+    'caldav': 'calendar_sync.calendars.caldav_calendar:CaldavCalendar',
+}
+ENTRY_POINT_GROUP = 'calendar_sync.backends'
+
+
+class EventDelta(NamedTuple):
+    """Result of ``list_changes``.
+
+    ``full`` batches hold every event in the window, so anything missing from
+    them is an orphan. Incremental batches hold only changed events, plus the
+    ids in ``removed`` (cancelled, or moved out of the window).
+    ``sync_token`` is the cursor for the next call, or None.
+    """
+    events: list
+    removed: list
+    sync_token: Optional[str]
+    full: bool
+
+
+class Event:
+    """One source event as the planner sees it.
+
+    Backends return plain dicts from ``list_events``; ``as_event`` turns each
+    into one of these when the fetch lands. ``start`` / ``end`` keep the
+    backend's ISO strings (busy events are written with them), and
+    ``start_ts`` / ``end_ts`` hold the same instants as UTC epoch seconds,
+    or None for all-day events. Comparisons with stored mappings go by the
+    latter, so a backend changing its offset format does not look like every
+    event moved.
+    """
+
+    __slots__ = ('id', 'start', 'end', 'summary', 'description', 'start_ts', 'end_ts')
+
+    def __init__(self, id, start, end, summary='', description=''):
+        self.id = id
+        self.start = start
+        self.end = end
+        self.summary = summary
+        self.description = description
+        self.start_ts = to_epoch(start)
+        self.end_ts = to_epoch(end)
+
+    @classmethod
+    def from_dict(cls, event):
+        return cls(
+            event.get('id'),
+            event.get('start') or '',
+            event.get('end') or '',
+            event.get('summary') or '',
+            event.get('description') or '',
+        )
+
+    @property
+    def all_day(self):
+        return self.start_ts is None or self.end_ts is None
+
+    def __repr__(self):
+        return f"Event({self.id}, {self.start} → {self.end})"
+
+
+def as_event(event):
+    """*event* as an ``Event`` (backend dicts are converted)."""
+    return event if isinstance(event, Event) else Event.from_dict(event)
+
+
+class EventNotFound(Exception):
+    """The busy event an update was aimed at no longer exists."""
+
+
 class BaseCalendar(ABC):
     class_registry = {}
+    # Backends that implement list_changes() with a real cursor set this.
+    supports_incremental = False
+    # Most busy-event writes the backend sends in one request. Above 1, the
+    # write executor hands queued writes to the *_busy_events / delete_events
+    # methods in groups of up to this many.
+    write_batch_size = 1
+    # Backends that can push change notifications set this and implement
+    # subscribe(address, secret), renew_subscription(subscription, address,
+    # secret) and unsubscribe(subscription). A subscription is a dict with at
+    # least ``id`` and ``expires`` (epoch seconds); the daemon keeps it and
+    # hands it back.
+    supports_push = False
 
     @classmethod
     def register(cls, registering_class):
@@ -18,22 +112,75 @@ class BaseCalendar(ABC):
         # When set, busy events are created/deleted there instead of on the
         # calendar's own id (list_events still reads the real calendar).
         self.busy_calendar_id = cfg.get('busy_calendar_id')
+        # Per-calendar override of the global fetch_timeout_seconds.
+        self.fetch_timeout = cfg.get('fetch_timeout_seconds')
+        self.incremental = self.supports_incremental and cfg.get('incremental', True)
 
     @abstractmethod
     def list_events(self, time_min, time_max):
         """Return a list of events in the format [{'id': str, 'start': str, 'end': str}]"""
         pass
 
+    def list_changes(self, time_min, time_max, sync_token=None):
+        """Return an EventDelta of what changed since *sync_token*.
+
+        Without a token (or on backends with no incremental API) this is a
+        full listing of the window. Incremental backends only report events
+        within [time_min, time_max]; changed events outside it are returned
+        in ``removed``.
+        """
+        return EventDelta(self.list_events(time_min, time_max), [], None, True)
+
+    def series_id(self, event_id):
+        """Id of the recurring series *event_id* is an instance of, if known.
+
+        Lets a removed series in an incremental batch retire the mappings of
+        all its instances.
+        """
+        return None
+
     @abstractmethod
     def create_busy_event(self, start, end, source_event_id=None):
         """Create a Busy event. Return the ID of the created event."""
         pass
 
+    def update_busy_event(self, busy_event_id, start, end, source_event_id=None):
+        """Move a Busy event to [start, end]. Return its (possibly new) ID.
+
+        Raises EventNotFound if the event is gone, so the caller can create a
+        new one. This default deletes and recreates; backends that can move
+        an event in place override it.
+        """
+        self.delete_event(busy_event_id)
+        return self.create_busy_event(start, end, source_event_id=source_event_id)
+
     @abstractmethod
     def delete_event(self, event_id):
         """Delete an event by its ID"""
         pass
 
+    # Batch forms of the writes above. Each returns one entry per item, in
+    # order: the item's result, or the exception that item failed with (an
+    # update of a vanished event fails with EventNotFound). These defaults
+    # loop over the single-item methods.
+    def create_busy_events(self, items):
+        """Create Busy events for ``(start, end, source_event_id)`` *items*; return their IDs."""
+        return [
+            _attempt(self.create_busy_event, start, end, source_event_id=source_event_id)
+            for start, end, source_event_id in items
+        ]
+
+    def update_busy_events(self, items):
+        """Move Busy events per ``(busy_event_id, start, end, source_event_id)`` *items*."""
+        return [
+            _attempt(self.update_busy_event, busy_event_id, start, end, source_event_id=source_event_id)
+            for busy_event_id, start, end, source_event_id in items
+        ]
+
+    def delete_events(self, event_ids):
+        """Delete Busy events by ID; an event that is already gone counts as deleted."""
+        return [_attempt(self.delete_event, event_id) for event_id in event_ids]
+
     def delete_main_event(self, event_id):
         """Delete an event from the calendar's own id (never the busy calendar).
 
@@ -42,8 +189,30 @@ class BaseCalendar(ABC):
         """
         self.delete_event(event_id)
 
+    def end_cycle(self):
+        """Persist state kept across calls (e.g. a token cache) at the end of a sync cycle."""
+
+    @classmethod
+    def backend_class(cls, calendar_type):
+        """The class for *calendar_type*, importing its module on first use."""
+        if calendar_type not in cls.class_registry:
+            spec = BACKENDS.get(calendar_type)
+            if spec is None:
+                found = entry_points(group=ENTRY_POINT_GROUP, name=calendar_type)
+                spec = next(iter(found)).value if found else None
+            if spec is None:
+                raise ValueError(f"Unknown calendar type: {calendar_type}")
+            module_name, _, class_name = spec.partition(':')
+            cls.class_registry[calendar_type] = getattr(import_module(module_name), class_name)
+        return cls.class_registry[calendar_type]
+
     @classmethod
     def get_calendar(cls, cfg):
-        if cfg['type'] not in cls.class_registry:
-            raise ValueError(f"Unknown calendar type: {cfg['type']}")
-        return cls.class_registry[cfg['type']](cfg)
+        return cls.backend_class(cfg['type'])(cfg)
+
+
+def _attempt(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        return exc
@@ -1,12 +1,128 @@
 from caldav import DAVClient
+from requests.exceptions import RequestException
+from caldav.elements import cdav, dav
+from caldav.elements.base import BaseElement, NamedBaseElement, ValuedBaseElement
+from caldav.lib.error import AuthorizationError, NotFoundError, ReportError
+from caldav.lib.namespace import ns
+from caldav.lib.url import URL
+from caldav.objects import Event as CaldavEvent
 from icalendar import Calendar, Event
-from calendar_sync.calendars.base import BaseCalendar
+from calendar_sync.calendars.base import BaseCalendar, EventNotFound
+from calendar_sync.config import yaml_config
+from calendar_sync.utils import ical
+from calendar_sync.utils.files import cache_path, read_json, write_json
+from calendar_sync.utils.http import configure_session
+from calendar_sync.writes import configured_limit
 from dateutil import parser as date_parser
+from datetime import datetime, timedelta, timezone
+import hashlib
 import logging
+import os
+import threading
+import time
 import uuid
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
 
 logger = logging.getLogger(__name__)
 
+# Bump when the cached instance format changes; older caches are then ignored.
+# 2: hrefs are normalized (see _normalized).
+CACHE_VERSION = 2
+DEFAULT_CACHE_HORIZON_HOURS = 24
+MULTIGET_BATCH = 100
+CREATE_ATTEMPTS = 2
+DISCOVERY_VERSION = 1
+DEFAULT_DISCOVERY_TTL_HOURS = 24
+# VEVENT properties asked for in calendar-data: what list_events reads, plus
+# what client-side expansion needs if a server ignores <expand>. DESCRIPTION
+# is added only with busy_calendar_id, the one case the planner reads it.
+EVENT_PROPERTIES = ('UID', 'DTSTART', 'DTEND', 'DURATION', 'SUMMARY', 'RECURRENCE-ID', 'RRULE', 'RDATE', 'EXDATE', 'EXRULE')
+# Characters left unescaped in href paths once normalized (see _href).
+_PATH_SAFE = "/@:!$&'()*+,;=~"
+# Resolved lazily, on first use, by _resolve().
+_DISCOVERED = ('calendar', 'busy_calendar', 'cache_file')
+
+# host -> write slots shared by every calendar on that server, so the cap
+# holds per server rather than per calendar.
+_server_slots = {}
+_server_slots_lock = threading.Lock()
+
+
+class _ServerSlots:
+    """A counting semaphore whose size can only shrink.
+
+    Calendar blocks on one server may set different write_concurrency
+    values; the strictest one wins for all of them, whichever loads first.
+    """
+
+    def __init__(self, host, limit):
+        self.host = host
+        self.limit = limit
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    def lower(self, limit):
+        with self._cond:
+            if limit < self.limit:
+                logger.info(f"CalDAV write concurrency for {self.host} lowered from {self.limit} to {limit}")
+                self.limit = limit
+
+    def __enter__(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_use < self.limit)
+            self._in_use += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+
+def _slots_for(url, size):
+    host = urlsplit(url).netloc
+    with _server_slots_lock:
+        if host not in _server_slots:
+            _server_slots[host] = _ServerSlots(host, size)
+        slots = _server_slots[host]
+    slots.lower(size)
+    return slots
+
+
+class GetCtag(ValuedBaseElement):
+    """CalendarServer's collection tag; changes whenever anything in the calendar does."""
+    tag = '{http://calendarserver.org/ns/}getctag'
+
+
+class CompProp(NamedBaseElement):
+    """A property to return within calendar-data (RFC 4791 section 9.6.4)."""
+    tag = ns('C', 'prop')
+
+
+class AllComp(BaseElement):
+    tag = ns('C', 'allcomp')
+
+
+def _normalized(url):
+    """*url* with its path percent-encoded one way (``%40`` and ``@`` alike)."""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=quote(unquote(parts.path), safe=_PATH_SAFE)))
+
+
+def _utc(value):
+    dt = date_parser.isoparse(value)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _instances(resources, start, end):
+    return [
+        item
+        for resource in resources.values()
+        for item in resource['instances']
+        if _utc(item['end']) > start and _utc(item['start']) < end
+    ]
+
+
 class CaldavCalendar(BaseCalendar):
     type = 'caldav'
 
@@ -21,58 +137,405 @@ class CaldavCalendar(BaseCalendar):
             username=self.username,
             password=self.password
         )
-        self.principal = self.client.principal()
-        self.calendar = self.principal.calendars()[0]  # TODO: implement calendar selection
+        # Per-server write cap: when set, the write executor runs this many
+        # lanes against the calendar (else write_concurrency['caldav'] from
+        # the top level of config.yaml, which also sizes the server's slots
+        # then; Yandex wants 1-2, Fastmail/Nextcloud cope with more).
+        # Writes share the server's slots and a keep-alive pool of that size
+        # (with the shared retry / gzip / latency-metrics policy).
+        self.write_concurrency = cfg.get('write_concurrency')
+        slots = max(1, int(self.write_concurrency or configured_limit(yaml_config, self.type)))
+        configure_session(self.client.session, pool_size=slots, block=True)
+        self._write_slots = _slots_for(self.url, slots)
+        # calendar, busy_calendar and cache_file are resolved on first use
+        # (see __getattr__), so a slow server does not hold up start-up. The
+        # discovered URLs are cached on disk for discovery_ttl_hours.
+        self.discovery_ttl = cfg.get('discovery_ttl_hours', DEFAULT_DISCOVERY_TTL_HOURS)
+        self.discovery_file = cache_path(
+            f"caldav-discovery-{hashlib.sha1(f'{self.username}@{self.url}'.encode()).hexdigest()[:16]}.json"
+        )
+        self._discovery_lock = threading.Lock()
+        self._discovered_from_cache = False
+        self._cache_path = cfg.get('cache_path')
+        self.cache_horizon = cfg.get('cache_horizon_hours', DEFAULT_CACHE_HORIZON_HOURS)
+        # Worker processes for parsing large fetches (0: parse in-process).
+        self.parse_processes = cfg.get('parse_processes', 0)
+        # Ask for just EVENT_PROPERTIES; turned off for the process if the
+        # server rejects the selection.
+        self.select_properties = cfg.get('select_properties', True)
+        # href -> ETag as of the last list_events, for If-Match on updates.
+        self._etags_seen = {}
+
+    @property
+    def server_write_limit(self):
+        """The write cap in force for this calendar's server (the strictest block on it)."""
+        return self._write_slots.limit
+
+    def __getattr__(self, name):
+        if name not in _DISCOVERED:
+            raise AttributeError(name)
+        with self._discovery_lock:
+            if name not in self.__dict__:
+                self._resolve()
+        return self.__dict__[name]
+
+    def _resolve(self):
+        calendar_url = self._cached_discovery() or self._discover()
+        self.calendar = self.client.calendar(url=calendar_url)
         # Optional separate calendar (by URL) to hold the generated Busy events.
         if self.busy_calendar_id:
             self.busy_calendar = self.client.calendar(url=self.busy_calendar_id)
         else:
             self.busy_calendar = self.calendar
+        self.cache_file = self._cache_path or cache_path(
+            f"caldav-{hashlib.sha1(calendar_url.encode()).hexdigest()[:16]}.json"
+        )
+
+    def _cached_discovery(self):
+        cached = read_json(self.discovery_file) or {}
+        if (
+            cached.get('version') != DISCOVERY_VERSION
+            or cached.get('url') != self.url
+            or cached.get('username') != self.username
+            or time.time() - cached.get('resolved_at', 0) > self.discovery_ttl * 3600
+        ):
+            return None
+        self._discovered_from_cache = True
+        return cached['calendar_url']
+
+    def _discover(self):
+        """Resolve principal -> calendar-home-set -> calendar and cache the URLs."""
+        principal = self.client.principal()
+        home_set = principal.calendar_home_set
+        calendar_url = str(principal.calendars()[0].url)  # TODO: implement calendar selection
+        self._discovered_from_cache = False
+        try:
+            write_json(self.discovery_file, {
+                'version': DISCOVERY_VERSION,
+                'url': self.url,
+                'username': self.username,
+                'resolved_at': time.time(),
+                'principal_url': str(principal.url),
+                'calendar_home_set': str(home_set.url),
+                'calendar_url': calendar_url,
+            })
+        except OSError:
+            logger.warning(f"Failed to write CalDAV discovery cache {self.discovery_file}", exc_info=True)
+        logger.info(f"Discovered {self.id} calendar at {calendar_url}")
+        return calendar_url
+
+    def _forget_discovery(self):
+        """Drop the cached discovery; the next use of the calendar resolves it again."""
+        with self._discovery_lock:
+            for name in _DISCOVERED:
+                self.__dict__.pop(name, None)
+            self._discovered_from_cache = False
+        try:
+            os.remove(self.discovery_file)
+        except FileNotFoundError:
+            pass
 
     def list_events(self, time_min, time_max):
-        """Return a list of events in the format [{'id': str, 'start': str, 'end': str}]"""
-        results = []
+        """Return a list of events in the format [{'id': str, 'start': str, 'end': str}]
 
-        start_dt = date_parser.isoparse(time_min)
-        end_dt = date_parser.isoparse(time_max)
+        A 404/403 on a calendar URL taken from the discovery cache means the
+        cache is stale: it is dropped and the calendar discovered again.
+        """
+        try:
+            return self._list_events(time_min, time_max)
+        except (NotFoundError, AuthorizationError):
+            if not self._discovered_from_cache:
+                raise
+            logger.warning(f"Cached calendar URL of {self.id} is no longer valid; discovering it again")
+            self._forget_discovery()
+            return self._list_events(time_min, time_max)
 
-        events = self.calendar.search(
-            start=start_dt,
-            end=end_dt,
-            expand=True,
-            event=True
-        )
+    def _list_events(self, time_min, time_max):
+        """Fetch events for list_events.
+
+        Parsed instances are cached on disk per resource (href), together with
+        the collection's ctag / sync-token and each resource's ETag. A run
+        whose ctag or sync-token is unchanged makes one PROPFIND and serves the
+        cache; otherwise only resources whose ETag changed are fetched again
+        (via sync-collection when the server supports it). The cache covers
+        ``cache_horizon_hours`` past *time_max*; once *time_max* moves beyond
+        that, the window is fetched in full again.
+        """
+        start_dt = _utc(time_min)
+        end_dt = _utc(time_max)
+        cache = read_json(self.cache_file) or {}
+        if cache.get('version') != CACHE_VERSION or cache.get('descriptions') != bool(self.busy_calendar_id):
+            cache = {}  # older format, or cached without the descriptions now needed (or vice versa)
+        ctag, sync_token = self._collection_tags()
+
+        covered = bool(cache) and _utc(cache['window_start']) <= start_dt and end_dt <= _utc(cache['window_end'])
+        if covered and (
+            (ctag is not None and ctag == cache.get('ctag'))
+            or (sync_token is not None and sync_token == cache.get('sync_token'))
+        ):
+            logger.info(f"{self.id} unchanged since last run; serving cached events")
+            return self._serve(cache['resources'], start_dt, end_dt)
 
-        for event in events:
+        resources = None
+        if covered:
+            window_start, window_end = cache['window_start'], cache['window_end']
             try:
-                vevent = event.vobject_instance.vevent
-                logger.debug (repr(vevent))
-                uid = str(vevent.uid.value)
-                start = vevent.dtstart.value.isoformat()
-                summary = vevent.summary.value
-                # Recurring events are expanded (expand=True) into instances that
-                # all share a single UID. Disambiguate each occurrence by its start
-                # so every instance maps to its own busy event instead of colliding
-                # on the (source, source_event_id, target) key. Our own managed
-                # "Busy" events keep their plain UID so cleanup still matches them
-                # against the stored busy_event_id.
-                event_id = uid if summary.strip().lower() == 'busy' else f"{uid}#{start}"
-                results.append({
-                    'id': event_id,
-                    'start': start,
-                    'end': vevent.dtend.value.isoformat(),
-                    'summary': summary,
-                    'description': str(vevent.description.value) if hasattr(vevent, 'description') else '',
-                    'object': event
-                })
+                resources, sync_token = self._refresh(cache, sync_token is not None, start_dt, _utc(window_end))
             except Exception:
-                logger.exception("Failed to parse event")
+                logger.warning(f"Incremental refresh of {self.id} failed; fetching the window in full", exc_info=True)
+        if resources is None:
+            window_start = start_dt.isoformat()
+            window_end = (end_dt + timedelta(hours=self.cache_horizon)).isoformat()
+            resources, sync_token = self._fetch_window(sync_token is not None, start_dt, _utc(window_end))
 
-        return results
+        try:
+            write_json(self.cache_file, {
+                'version': CACHE_VERSION,
+                'descriptions': bool(self.busy_calendar_id),
+                'ctag': ctag,
+                'sync_token': sync_token,
+                'window_start': window_start,
+                'window_end': window_end,
+                'resources': resources,
+            })
+        except OSError:
+            logger.warning(f"Failed to write CalDAV cache {self.cache_file}", exc_info=True)
+        return self._serve(resources, start_dt, end_dt)
 
-    def create_busy_event(self, start, end, source_event_id=None):
-        busy_id = str(uuid.uuid4())
+    def _serve(self, resources, start, end):
+        self._etags_seen = {href: resource['etag'] for href, resource in resources.items() if resource['etag']}
+        return _instances(resources, start, end)
+
+    def _collection_tags(self):
+        """Return the collection's (ctag, sync-token); None for what the server lacks."""
+        try:
+            props = self.calendar.get_properties([GetCtag(), dav.SyncToken()])
+        except (NotFoundError, AuthorizationError):
+            raise
+        except Exception:
+            logger.warning(f"Failed to read ctag/sync-token of {self.id}", exc_info=True)
+            return None, None
+        return props.get(GetCtag.tag), props.get(dav.SyncToken.tag)
+
+    def _href(self, href):
+        """Absolute URL of *href*, the key of the event cache and the ETag map.
+
+        Every href, whichever response it came from, goes through here.
+        Percent-encoding is normalized, so ``u%40ya.ru`` and ``u@ya.ru`` name
+        the same resource.
+        """
+        return _normalized(str(self.calendar.url.join(href)))
+
+    def _is_collection(self, url):
+        return url.rstrip('/') == self._href(str(self.calendar.url)).rstrip('/')
+
+    def _etags(self, use_sync, since=None):
+        """Return ({href: etag or None if deleted}, sync token, complete).
+
+        With sync-collection and a *since* token only changed resources are
+        listed (``complete`` is False); otherwise every resource is. The
+        sync-collection REPORT is sent here rather than through
+        ``objects_by_sync_token``, which quotes relative hrefs again.
+        """
+        if use_sync:
+            response = self.calendar._query(
+                dav.SyncCollection() + [dav.SyncLevel(value='1'), dav.SyncToken(value=since), dav.Prop() + dav.GetEtag()],
+                1, 'report',
+            )
+            etags = self._etag_map(response)
+            return etags, getattr(response, 'sync_token', None), since is None
+        return self._etag_map(self.calendar._query_properties([dav.GetEtag()], depth=1)), None, True
+
+    def _etag_map(self, response):
+        etags = {}
+        for href, props in response.expand_simple_props([dav.GetEtag()]).items():
+            url = self._href(href)
+            if not self._is_collection(url):
+                etags[url] = props.get(dav.GetEtag.tag)
+        return etags
+
+    def _refresh(self, cache, use_sync, start, window_end):
+        """Bring the cached resources up to date by ETag; return (resources, sync token)."""
+        resources = dict(cache['resources'])
+        since = cache.get('sync_token') if use_sync else None
+        etags, sync_token, complete = self._etags(use_sync, since)
+        if complete:
+            for href in set(resources) - set(etags):
+                del resources[href]
+        changed = []
+        for href, etag in etags.items():
+            if etag is None:
+                resources.pop(href, None)
+            elif resources.get(href, {}).get('etag') != etag:
+                changed.append(href)
+        fetched = self._multiget(changed, start, window_end)
+        for href in changed:
+            if href in fetched:
+                resources[href] = {'etag': fetched[href]['etag'] or etags[href], 'instances': fetched[href]['instances']}
+            else:
+                resources.pop(href, None)
+        logger.info(f"Refreshed {len(changed)} changed resources of {self.id}")
+        return resources, sync_token
+
+    def _multiget(self, hrefs, start, end):
+        """calendar-multiget *hrefs*, expanded over [start, end]; return {href: resource}.
+
+        Resources the server leaves out of an expanded multiget (Radicale
+        does this for non-recurring events) are fetched again without
+        <expand>; a resource missing from both was deleted meanwhile.
+        """
+        etags, datas = {}, {}
+        for i in range(0, len(hrefs), MULTIGET_BATCH):
+            batch = hrefs[i:i + MULTIGET_BATCH]
+            response = self._report(lambda calendar_data: (
+                cdav.CalendarMultiGet()
+                + (dav.Prop() + [calendar_data, dav.GetEtag()])
+                + [dav.Href(value=URL.objectify(href).path) for href in batch]
+            ), start, end)
+            for href, props in response.expand_simple_props([cdav.CalendarData(), dav.GetEtag()]).items():
+                data = props.get(cdav.CalendarData.tag)
+                if data:
+                    datas[self._href(href)] = data
+                    etags[self._href(href)] = props.get(dav.GetEtag.tag)
+            missing = [URL.objectify(href) for href in batch if href not in datas]
+            if missing:
+                for event in self.calendar.calendar_multiget(missing):
+                    datas[self._href(str(event.url))] = event.data
+        return {
+            href: {'etag': etags.get(href), 'instances': instances}
+            for href, instances in self._parse_resources(datas, start, end).items()
+        }
+
+    def _calendar_data(self, start, end):
+        """<calendar-data> expanding [start, end], selecting EVENT_PROPERTIES unless turned off."""
+        calendar_data = cdav.CalendarData()
+        if self.select_properties:
+            names = EVENT_PROPERTIES + (('DESCRIPTION',) if self.busy_calendar_id else ())
+            calendar_data += cdav.Comp(name='VCALENDAR') + [
+                CompProp(name='VERSION'),
+                cdav.Comp(name='VEVENT') + [CompProp(name=name) for name in names],
+                cdav.Comp(name='VTIMEZONE') + [cdav.Allprop(), AllComp()],
+            ]
+        return calendar_data + cdav.Expand(start, end)
+
+    def _report(self, build, start, end):
+        """REPORT ``build(calendar-data)`` on the calendar.
+
+        A server that rejects the property selection is asked again for full
+        events, and not sent the selection again. One that ignores it simply
+        answers with full events, which parse the same.
+        """
+        try:
+            return self.calendar._query(build(self._calendar_data(start, end)), 1, 'report')
+        except ReportError:
+            if not self.select_properties:
+                raise
+            logger.warning(f"{self.id} rejected calendar-data property selection; requesting full events")
+            self.select_properties = False
+            return self.calendar._query(build(self._calendar_data(start, end)), 1, 'report')
 
+    def _parse_resources(self, datas, start, end):
+        """Parse {href: iCalendar text} into {href: [instance]}.
+
+        The streaming reader handles what servers normally return (expanded
+        instances in UTC or a tz-database zone), in a process pool when
+        ``parse_processes`` is set. Resources with recurrences the server did
+        not expand, or that the reader cannot handle, go through caldav and
+        icalendar instead, the way calendar.search(expand=True) would.
+        """
+        hrefs = list(datas)
+        parsed = ical.parse_many([datas[href] for href in hrefs], self.parse_processes)
+        resources = {}
+        for href, vevents in zip(hrefs, parsed):
+            if isinstance(vevents, Exception) or any(vevent.recurring for vevent in vevents):
+                vevents = self._parse_full(href, datas[href], start, end)
+            resources[href] = [self._instance(vevent) for vevent in vevents]
+        return resources
+
+    def _parse_full(self, href, data, start, end):
+        try:
+            event = CaldavEvent(self.client, url=href, data=data, parent=self.calendar)
+            component = event.icalendar_component
+            if component is not None and not ical.RECURRENCE.isdisjoint(key.upper() for key in component):
+                event.expand_rrule(start, end)
+            components = [obj.icalendar_component for obj in event.split_expanded()]
+        except Exception:
+            logger.exception(f"Failed to parse {href}")
+            return []
+        vevents = []
+        for component in components:
+            try:
+                vevent_start = component.decoded('dtstart')
+                if 'dtend' in component:
+                    vevent_end = component.decoded('dtend')
+                elif 'duration' in component:
+                    vevent_end = vevent_start + component.decoded('duration')
+                else:
+                    vevent_end = vevent_start + (timedelta(0) if isinstance(vevent_start, datetime) else timedelta(days=1))
+                vevents.append(ical.VEvent(
+                    uid=str(component['uid']),
+                    start=vevent_start,
+                    end=vevent_end,
+                    summary=str(component.get('summary', '')),
+                    description=str(component.get('description', '')),
+                    recurring=False,
+                ))
+            except Exception:
+                logger.exception(f"Failed to parse an instance of {href}")
+        return vevents
+
+    def _fetch_window(self, use_sync, start, end):
+        """Fetch every event in [start, end]; return (resources, sync token)."""
+        # List ETags before searching: an edit in between is then seen as a
+        # changed ETag next run instead of being cached under the new one.
+        etags, sync_token, _ = self._etags(use_sync)
+        resources = {href: {'etag': etag, 'instances': []} for href, etag in etags.items() if etag is not None}
+        # The REPORT calendar.search(expand=True) sends (plus the property
+        # selection), minus the object model it builds around every result.
+        response = self._report(lambda calendar_data: (
+            cdav.CalendarQuery()
+            + [dav.Prop() + calendar_data]
+            + (cdav.Filter() + (cdav.CompFilter(name='VCALENDAR') + (
+                cdav.CompFilter(name='VEVENT') + cdav.TimeRange(start, end)
+            )))
+        ), start, end)
+        datas, unloaded = {}, []
+        for href, props in response.expand_simple_props([cdav.CalendarData()]).items():
+            url = self._href(href)
+            if self._is_collection(url):
+                continue  # iCloud lists the collection itself
+            if props.get(cdav.CalendarData.tag):
+                datas[url] = props[cdav.CalendarData.tag]
+            else:
+                unloaded.append(url)
+        found = self._parse_resources(datas, start, end)
+        if unloaded:
+            found.update({href: resource['instances'] for href, resource in self._multiget(unloaded, start, end).items()})
+        for href, instances in found.items():
+            resources.setdefault(href, {'etag': None, 'instances': []})['instances'].extend(instances)
+        logger.info(f"Fetched {len(resources)} resources from {self.id} in full")
+        return resources, sync_token
+
+    @staticmethod
+    def _instance(vevent):
+        start = vevent.start.isoformat()
+        # Recurring events are expanded (expand=True) into instances that
+        # all share a single UID. Disambiguate each occurrence by its start
+        # so every instance maps to its own busy event instead of colliding
+        # on the (source, source_event_id, target) key. Our own managed
+        # "Busy" events keep their plain UID so cleanup still matches them
+        # against the stored busy_event_id.
+        event_id = vevent.uid if vevent.summary.strip().lower() == 'busy' else f"{vevent.uid}#{start}"
+        return {
+            'id': event_id,
+            'start': start,
+            'end': vevent.end.isoformat(),
+            'summary': vevent.summary,
+            'description': vevent.description,
+        }
+
+    @staticmethod
+    def _busy_ics(busy_id, start, end, source_event_id):
         cal = Calendar()
         cal.add('prodid', '-//calendar-sync//EN')
         cal.add('version', '2.0')
@@ -89,19 +552,100 @@ class CaldavCalendar(BaseCalendar):
 
         cal.add_component(event)
 
-        busy_ics = cal.to_ical()
+        return cal.to_ical()
+
+    def _event_url(self, cal, event_id):
+        # We generate the UID ourselves and the server stores it at
+        # <calendar>/<uid>.ics, so busy events are addressed by URL directly.
+        # Normalized like the cache keys, so cached ETags are found for it.
+        return _normalized(str(cal.url).rstrip("/") + "/" + event_id + ".ics")
+
+    def _request(self, url, method, body='', headers=None):
+        """A write-path request, holding one of the server's write slots."""
+        with self._write_slots:
+            return self.client.request(url, method, body, headers)
+
+    def create_busy_event(self, start, end, source_event_id=None):
+        """PUT a new Busy event to its own URL with ``If-None-Match: *``.
+
+        The precondition makes a retried PUT safe: if the first attempt landed
+        but its response was lost, the retry gets 412 for the same UID.
+        """
+        busy_id = str(uuid.uuid4())
+        url = self._event_url(self.busy_calendar, busy_id)
+        body = self._busy_ics(busy_id, start, end, source_event_id)
+        headers = {'Content-Type': 'text/calendar; charset=utf-8', 'If-None-Match': '*'}
+        for attempt in range(CREATE_ATTEMPTS):
+            last = attempt == CREATE_ATTEMPTS - 1
+            try:
+                response = self._request(url, 'PUT', body, headers)
+            except RequestException:
+                if last:
+                    raise
+                logger.warning(f"PUT of busy event {busy_id} failed; retrying", exc_info=True)
+                continue
+            if response.status == 412 and attempt > 0:
+                return busy_id  # an earlier attempt created it
+            if response.status < 400:
+                if response.headers.get('ETag'):
+                    self._etags_seen[url] = response.headers['ETag']
+                return busy_id
+            if response.status < 500 or last:
+                raise RuntimeError(f"Failed to create busy event {busy_id}: HTTP {response.status}")
+            logger.warning(f"PUT of busy event {busy_id} got HTTP {response.status}; retrying")
+
+    def update_busy_event(self, busy_event_id, start, end, source_event_id=None):
+        """Rewrite a Busy event in place: PUT to its URL with If-Match.
+
+        The ETag comes from the event cache when busy events live on the
+        calendar we read, else from a HEAD. The precondition makes the PUT
+        fail instead of recreating an event that was deleted meanwhile. A
+        stale cached ETag (412) is looked up again once; only a 404/410
+        means the event is gone.
+        """
+        url = self._event_url(self.busy_calendar, busy_event_id)
+        body = self._busy_ics(busy_event_id, start, end, source_event_id)
+        etag = self._etags_seen.get(url) if self.busy_calendar is self.calendar else None
+        for attempt in range(2):
+            if etag is None:
+                etag = self._head_etag(url, busy_event_id)
+            headers = {'Content-Type': 'text/calendar; charset=utf-8'}
+            if etag:
+                headers['If-Match'] = etag
+            response = self._request(url, 'PUT', body, headers)
+            if response.status == 412 and attempt == 0:
+                etag = None  # stale cached ETag; look it up and retry once
+                continue
+            if response.status in (404, 410):
+                raise EventNotFound(busy_event_id)
+            if response.status == 412:
+                # Changed again since the HEAD, so it still exists: fail the
+                # write (replayed next run) rather than recreate a duplicate.
+                raise RuntimeError(f"Busy event {busy_event_id} changed during the update: HTTP 412")
+            if response.status >= 400:
+                raise RuntimeError(f"Failed to update busy event {busy_event_id}: HTTP {response.status}")
+            if response.headers.get('ETag'):
+                self._etags_seen[url] = response.headers['ETag']
+            return busy_event_id
 
-        self.busy_calendar.add_event(busy_ics)
-        return busy_id
+    def _head_etag(self, url, busy_event_id):
+        response = self._request(url, 'HEAD')
+        if response.status in (404, 410):
+            raise EventNotFound(busy_event_id)
+        return response.headers.get('ETag')
 
     def _delete(self, cal, event_id):
-        # Delete directly by URL. We generate the UID ourselves and the server
-        # stores it at <calendar>/<uid>.ics, so we can skip cal.event(uid) which
-        # otherwise REPORTs and parses the whole calendar (very slow on Yandex).
-        event_url = str(cal.url).rstrip("/") + "/" + event_id + ".ics"
+        # Delete directly by URL; this skips cal.event(uid), which otherwise
+        # REPORTs and parses the whole calendar (very slow on Yandex).
+        event_url = self._event_url(cal, event_id)
         try:
-            cal.client.delete(event_url)
-            logger.info(f"Deleted busy event {event_id}")
+            response = self._request(event_url, 'DELETE')
+            if response.status in (404, 410):
+                logger.info(f"Busy event {event_id} already gone")
+            elif response.status >= 400:
+                logger.error(f"Failed to delete busy event {event_id}: HTTP {response.status}")
+            else:
+                logger.info(f"Deleted busy event {event_id}")
         except Exception:
             logger.exception(f"Failed to delete busy event {event_id}")
 
@@ -23,12 +23,13 @@ a localhost-capable first-party client such as Azure CLI).
 ⚠️ EWS in Exchange Online is being retired (disabled from ~Oct 2026, fully
 Apr 2027). This backend is a stopgap for write access where Graph is CA-blocked.
 """
+import hashlib
 import json
 import logging
-import os
+import threading
+import time
 from datetime import timezone
 
-import msal
 from dateutil import parser as date_parser
 from oauthlib.oauth2 import OAuth2Token
 
@@ -36,16 +37,21 @@ from exchangelib import (
     DELEGATE,
     OAUTH2,
     Account,
+    Build,
     CalendarItem,
     Configuration,
     EWSDateTime,
     EWSTimeZone,
     OAuth2AuthorizationCodeCredentials,
+    Version,
 )
-from exchangelib.errors import ErrorItemNotFound
+from exchangelib.errors import ErrorFolderNotFound, ErrorInvalidSyncStateData, ErrorItemNotFound
+from exchangelib.folders import Calendar, Root
 from exchangelib.items import SEND_TO_NONE
 
-from calendar_sync.calendars.base import BaseCalendar
+from calendar_sync.calendars.base import BaseCalendar, EventDelta, EventNotFound
+from calendar_sync.calendars.msal_cache import token_cache
+from calendar_sync.utils.files import cache_path, read_json, write_json
 
 logger = logging.getLogger(__name__)
 
@@ -56,11 +62,107 @@ _UTC = EWSTimeZone("UTC")
 # Keep in sync with the SCOPE used by the mint scripts — acquire_token_silent
 # must request the same scope the cached refresh token was minted for.
 SCOPES = ["https://outlook.office365.com/EWS.AccessAsUser.All"]
+# Fields mapped into events; .only() trims the SOAP payload to these.
+EVENT_FIELDS = ('id', 'subject', 'start', 'end', 'is_all_day', 'is_cancelled', 'body')
+# Rebuild the Account this long before its access token expires.
+TOKEN_REFRESH_MARGIN = 300
+# SyncFolderItems page size (the EWS maximum).
+SYNC_PAGE_SIZE = 512
+# Items per CreateItem/UpdateItem/DeleteItem call (exchangelib's default chunk).
+BATCH_SIZE = 100
+# Bump when the mailbox cache format changes; older files are then ignored.
+MAILBOX_CACHE_VERSION = 1
+DEFAULT_DISCOVERY_TTL_HOURS = 24
+# Errors EWS answers a folder id that no longer exists with.
+_FOLDER_GONE = (ErrorFolderNotFound, ErrorItemNotFound)
+
+
+class _MailboxCache:
+    """Folder ids and the EWS server version of one mailbox.
+
+    Both cost a round trip to find out (exchangelib probes the version on an
+    Account's first request; a subfolder is found by listing the calendar's
+    children) and both rarely change, so they are kept in memory for the
+    process and in a JSON file across runs. A file older than *ttl* seconds
+    is ignored. ``save`` writes it only when something was learned.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self._lock = threading.Lock()
+        self._changed = False
+        data = read_json(path) or {}
+        if data.get('version') != MAILBOX_CACHE_VERSION or time.time() - data.get('resolved_at', 0) > ttl:
+            data = {}
+        self.resolved_at = data.get('resolved_at') or time.time()
+        self.server_version = data.get('server_version')
+        self.folders = data.get('folders', {})
+
+    def version(self):
+        """The cached server version as an exchangelib ``Version``, or None."""
+        if not self.server_version:
+            return None
+        return Version(build=Build(*self.server_version['build']), api_version=self.server_version['api_version'])
+
+    def set_version(self, version):
+        build = version.build
+        value = {
+            'build': [build.major_version, build.minor_version, build.major_build, build.minor_build],
+            'api_version': version.api_version,
+        }
+        with self._lock:
+            if value != self.server_version:
+                self.server_version = value
+                self._changed = True
+
+    def folder_id(self, name):
+        return self.folders.get(name)
+
+    def set_folder_id(self, name, folder_id):
+        with self._lock:
+            self.folders[name] = folder_id
+            self._changed = True
+
+    def forget_folder(self, name):
+        with self._lock:
+            if self.folders.pop(name, None) is not None:
+                self._changed = True
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            try:
+                write_json(self.path, {
+                    'version': MAILBOX_CACHE_VERSION,
+                    'resolved_at': self.resolved_at,
+                    'server_version': self.server_version,
+                    'folders': self.folders,
+                })
+                self._changed = False
+            except OSError:
+                logger.warning(f"Failed to write Exchange mailbox cache {self.path}", exc_info=True)
+
+
+_mailbox_caches = {}
+_mailbox_caches_lock = threading.Lock()
+
+
+def _mailbox_cache(endpoint, mailbox, ttl):
+    """The process-wide ``_MailboxCache`` of *mailbox* on *endpoint*."""
+    key = (endpoint, mailbox.lower())
+    with _mailbox_caches_lock:
+        if key not in _mailbox_caches:
+            digest = hashlib.sha1(f"{key[1]}@{endpoint}".encode()).hexdigest()[:16]
+            _mailbox_caches[key] = _MailboxCache(cache_path(f"exchange-{digest}.json"), ttl)
+        return _mailbox_caches[key]
 
 
 @BaseCalendar.register
 class ExchangeCalendar(BaseCalendar):
     type = 'exchange'
+    supports_incremental = True
+    write_batch_size = BATCH_SIZE
 
     def __init__(self, cfg):
         super().__init__(cfg)
@@ -80,73 +182,120 @@ class ExchangeCalendar(BaseCalendar):
             f"https://login.microsoftonline.com/{creds.get('tenant_id', 'organizations')}"
         )
 
-        self._cache = msal.SerializableTokenCache()
-        if os.path.exists(self.token_path):
-            with open(self.token_path) as fh:
-                self._cache.deserialize(fh.read())
-        self._app = msal.PublicClientApplication(
-            self.client_id, authority=authority, token_cache=self._cache
+        self._tokens = token_cache(self.token_path, self.client_id, authority)
+        self._mailbox = _mailbox_cache(
+            self.ews_endpoint, self.primary_smtp, cfg.get('discovery_ttl_hours', DEFAULT_DISCOVERY_TTL_HOURS) * 3600
         )
-        self._account = None  # lazily built exchangelib Account (per process run)
+        # Serializes (re)building the exchangelib Account across write threads.
+        self._lock = threading.RLock()
+        self._account = None  # lazily built exchangelib Account
+        self._account_expires = 0.0  # time.monotonic() when its token runs out
+        self._folders = {}  # folder name ('' = primary) -> Folder bound to self._account
 
     # -- auth ---------------------------------------------------------------
-    def _save_cache(self):
-        if self._cache.has_state_changed:
-            with open(self.token_path, 'w') as fh:
-                fh.write(self._cache.serialize())
-
     def _token(self):
-        accounts = self._app.get_accounts()
-        if not accounts:
+        result = self._tokens.acquire(SCOPES)
+        if result is None:
             raise RuntimeError(
                 f"No cached Exchange account for {self.id}; "
                 f"run mint_ews_token.py to authorize and create {self.token_path}"
             )
-        result = self._app.acquire_token_silent(SCOPES, account=accounts[0])
-        self._save_cache()
-        if not result or 'access_token' not in result:
+        if 'access_token' not in result:
             raise RuntimeError(
                 f"Failed to acquire EWS token for {self.id}: {result}. "
                 f"The refresh token may have expired — re-run mint_ews_token.py"
             )
         return result
 
+    def end_cycle(self):
+        self._tokens.save()
+        if self._account is not None:
+            version = self._account.protocol.config.version
+            if version is not None and version.build is not None:
+                self._mailbox.set_version(version)
+        self._mailbox.save()
+
     def account(self):
-        """Build (once per run) an exchangelib Account on a fresh access token.
+        """Return an exchangelib Account on a valid access token.
 
-        Sync runs are short-lived, so a token minted at the start of the run
-        outlives it; MSAL handles refresh-token rotation across runs in the cache.
+        The Account is reused until its token is about to expire (a single
+        run normally finishes well before that; the daemon does not), then
+        rebuilt on a fresh token. MSAL handles refresh-token rotation in the
+        cache.
         """
-        if self._account is None:
-            tok = self._token()
-            credentials = OAuth2AuthorizationCodeCredentials(
-                access_token=OAuth2Token({
-                    'access_token': tok['access_token'],
-                    'token_type': 'Bearer',
-                    'expires_in': tok.get('expires_in', 3599),
-                })
-            )
-            config = Configuration(
-                service_endpoint=self.ews_endpoint,
-                credentials=credentials,
-                auth_type=OAUTH2,
-            )
-            self._account = Account(
-                primary_smtp_address=self.primary_smtp,
-                config=config,
-                access_type=DELEGATE,
-                autodiscover=False,
-            )
+        with self._lock:
+            if self._account is None or time.monotonic() > self._account_expires - TOKEN_REFRESH_MARGIN:
+                self._account = self._build_account()
+                self._folders = {}
         return self._account
 
+    def _build_account(self):
+        tok = self._token()
+        self._account_expires = time.monotonic() + int(tok.get('expires_in', 3599))
+        credentials = OAuth2AuthorizationCodeCredentials(
+            access_token=OAuth2Token({
+                'access_token': tok['access_token'],
+                'token_type': 'Bearer',
+                'expires_in': tok.get('expires_in', 3599),
+            })
+        )
+        # A known server version skips exchangelib's probe on the first request.
+        config = Configuration(
+            service_endpoint=self.ews_endpoint,
+            credentials=credentials,
+            auth_type=OAUTH2,
+            version=self._mailbox.version(),
+        )
+        return Account(
+            primary_smtp_address=self.primary_smtp,
+            config=config,
+            access_type=DELEGATE,
+            autodiscover=False,
+        )
+
     # -- helpers ------------------------------------------------------------
     def _read_folder(self):
-        account = self.account()
-        return self._folder_by_name(account, self.calendar_name)
+        return self._folder(self.calendar_name)
 
     def _busy_folder(self):
+        return self._folder(self.busy_calendar_id)
+
+    def _folder(self, name):
+        """The calendar folder called *name* (None: the primary calendar).
+
+        Folder ids come from the mailbox cache when known: the folder is then
+        addressed by id without a GetFolder / FindFolder round trip.
+        """
         account = self.account()
-        return self._folder_by_name(account, self.busy_calendar_id)
+        key = name or ''
+        with self._lock:
+            folder = self._folders.get(key)
+            if folder is None:
+                folder_id = self._mailbox.folder_id(key)
+                if folder_id:
+                    folder = Calendar(root=Root(account=account), id=folder_id, changekey=None)
+                else:
+                    folder = self._folder_by_name(account, name)
+                    self._mailbox.set_folder_id(key, folder.id)
+                self._folders[key] = folder
+        return folder
+
+    def _forget_folder(self, name):
+        key = name or ''
+        with self._lock:
+            self._folders.pop(key, None)
+        self._mailbox.forget_folder(key)
+
+    def _on_read_folder(self, read):
+        """Call ``read(folder)``; if a cached folder id has gone stale, look it up again once."""
+        try:
+            return read(self._read_folder())
+        except _FOLDER_GONE:
+            if self._mailbox.folder_id(self.calendar_name or '') is None:
+                raise
+            logger.info(f"Cached folder id of {self.id} is no longer valid; looking the folder up again")
+            self._forget_folder(self.calendar_name)
+            return read(self._read_folder())
 
     @staticmethod
     def _folder_by_name(account, name):
@@ -170,40 +319,130 @@ class ExchangeCalendar(BaseCalendar):
         """Format an EWSDateTime as an ISO-8601 UTC string (with 'T')."""
         return dt.astimezone(_UTC).isoformat()
 
+    def _event(self, ev):
+        if getattr(ev, 'is_all_day', False):
+            # Emit date-only strings so the sync loop's "no 'T'" check skips
+            # all-day events, mirroring the Graph/Google backends.
+            start = ev.start.date().isoformat() if hasattr(ev.start, 'date') else str(ev.start)
+            end = ev.end.date().isoformat() if hasattr(ev.end, 'date') else str(ev.end)
+        else:
+            start = self._to_iso(ev.start)
+            end = self._to_iso(ev.end)
+        return {
+            'id': ev.id,
+            'start': start,
+            'end': end,
+            'summary': ev.subject or '',
+            'description': str(ev.body) if ev.body else '',
+        }
+
+    @staticmethod
+    def _in_window(event, time_min, time_max):
+        if 'T' not in event['start']:
+            return True  # all-day; skipped by the sync loop either way
+        start, end = date_parser.isoparse(event['start']), date_parser.isoparse(event['end'])
+        return end > date_parser.isoparse(time_min) and start < date_parser.isoparse(time_max)
+
+    def _view(self, folder, time_min, time_max):
+        # view() expands recurring masters into individual occurrences, like Graph's
+        # calendarView.
+        items = folder.view(start=self._ews_dt(time_min), end=self._ews_dt(time_max))
+        return [self._event(ev) for ev in items.only(*EVENT_FIELDS) if not getattr(ev, 'is_cancelled', False)]
+
     # -- API ----------------------------------------------------------------
     def list_events(self, time_min, time_max):
         """Return expanded event instances in the window (matches Graph backend)."""
-        folder = self._read_folder()
-        results = []
-        # view() expands recurring masters into individual occurrences, like Graph's
-        # calendarView. .only() trims the SOAP payload to the fields we map.
-        items = folder.view(start=self._ews_dt(time_min), end=self._ews_dt(time_max))
-        for ev in items.only(
-            'id', 'subject', 'start', 'end', 'is_all_day', 'is_cancelled', 'body'
-        ):
-            if getattr(ev, 'is_cancelled', False):
+        return self._on_read_folder(lambda folder: self._view(folder, time_min, time_max))
+
+    def list_changes(self, time_min, time_max, sync_token=None):
+        """Return items changed since *sync_token* via SyncFolderItems.
+
+        The token is JSON holding the SyncFolderItems state of one mailbox
+        folder plus the ids of its recurring masters. SyncFolderItems reports
+        masters, not occurrences, so a change to a recurring series (or the
+        deletion of one) is answered with one windowed ``view()`` for the run
+        instead; changes to single items are mapped directly. Without a usable
+        token the folder's sync state is re-established and the window listed.
+        """
+        return self._on_read_folder(lambda folder: self._list_changes(folder, time_min, time_max, sync_token))
+
+    def _list_changes(self, folder, time_min, time_max, sync_token):
+        state = self._load_sync_state(sync_token, folder)
+        if state is not None:
+            try:
+                return self._sync_changes(folder, state, time_min, time_max)
+            except ErrorInvalidSyncStateData:
+                logger.info(f"Sync state for {self.id} rejected; running a full resync")
+        # Take the sync state before listing: anything changed in between is
+        # replayed by the next incremental round rather than missed. EWS only
+        # hands out a state at the end of a walk over the folder, so walk it
+        # with ids alone; the recurring masters come from one filtered query.
+        folder.item_sync_state = None
+        for _ in folder.sync_items(only_fields=['id'], max_changes_returned=SYNC_PAGE_SIZE):
+            pass
+        masters = {item.id for item in folder.filter(type='RecurringMaster').only('id')}
+        events = self._view(folder, time_min, time_max)
+        logger.info(f"Full sync of {self.id}: {len(events)} events")
+        return EventDelta(events, [], self._dump_sync_state(folder, masters), True)
+
+    def _load_sync_state(self, sync_token, folder):
+        if not sync_token:
+            return None
+        try:
+            state = json.loads(sync_token)
+        except ValueError:
+            return None
+        if state.get('mailbox') != self.primary_smtp or state.get('folder') != folder.id:
+            logger.info(f"Sync state for {self.id} belongs to another folder; running a full resync")
+            return None
+        return state
+
+    def _dump_sync_state(self, folder, masters):
+        return json.dumps({
+            'mailbox': self.primary_smtp,
+            'folder': folder.id,
+            'state': folder.item_sync_state,
+            'masters': sorted(masters),
+        })
+
+    def _sync_changes(self, folder, state, time_min, time_max):
+        masters = set(state.get('masters', ()))
+        events, removed, series_changed = [], [], False
+        changes = folder.sync_items(
+            sync_state=state['state'],
+            only_fields=EVENT_FIELDS + ('type',),
+            max_changes_returned=SYNC_PAGE_SIZE,
+        )
+        for change_type, item in changes:
+            if change_type == 'read_flag_change':
+                continue
+            if change_type == 'delete':
+                if item.id in masters:
+                    masters.discard(item.id)
+                    series_changed = True
+                else:
+                    removed.append(item.id)
                 continue
-            if getattr(ev, 'is_all_day', False):
-                # Emit date-only strings so the sync loop's "no 'T'" check skips
-                # all-day events, mirroring the Graph/Google backends.
-                start = ev.start.date().isoformat() if hasattr(ev.start, 'date') else str(ev.start)
-                end = ev.end.date().isoformat() if hasattr(ev.end, 'date') else str(ev.end)
+            if getattr(item, 'type', None) != 'Single':
+                masters.add(item.id)
+                series_changed = True
+                continue
+            masters.discard(item.id)
+            event = self._event(item)
+            if getattr(item, 'is_cancelled', False) or not self._in_window(event, time_min, time_max):
+                removed.append(item.id)
             else:
-                start = self._to_iso(ev.start)
-                end = self._to_iso(ev.end)
-            results.append({
-                'id': ev.id,
-                'start': start,
-                'end': end,
-                'summary': ev.subject or '',
-                'description': str(ev.body) if ev.body else '',
-            })
-        return results
+                events.append(event)
+        token = self._dump_sync_state(folder, masters)
+        if series_changed:
+            events = self._view(folder, time_min, time_max)
+            logger.info(f"Recurring series changed in {self.id}; listed {len(events)} events")
+            return EventDelta(events, [], token, True)
+        logger.info(f"Incremental sync of {self.id}: {len(events)} changed, {len(removed)} removed")
+        return EventDelta(events, removed, token, False)
 
-    def create_busy_event(self, start, end, source_event_id=None):
-        """Create a Busy event (on the busy subfolder if configured)."""
-        folder = self._busy_folder()
-        item = CalendarItem(
+    def _busy_item(self, folder, start, end, source_event_id):
+        return CalendarItem(
             account=self.account(),
             folder=folder,
             subject='Busy',
@@ -213,9 +452,62 @@ class ExchangeCalendar(BaseCalendar):
             legacy_free_busy_status='Busy',
             reminder_is_set=False,
         )
+
+    def create_busy_event(self, start, end, source_event_id=None):
+        """Create a Busy event (on the busy subfolder if configured)."""
+        item = self._busy_item(self._busy_folder(), start, end, source_event_id)
         item.save(send_meeting_invitations=SEND_TO_NONE)
         return item.id
 
+    def create_busy_events(self, items):
+        """Create Busy events with one CreateItem call per ``BATCH_SIZE`` items.
+
+        exchangelib returns either the created item or the exception for each
+        input, in order; those map straight to the per-item results.
+        """
+        folder = self._busy_folder()
+        results = self.account().bulk_create(
+            folder,
+            [self._busy_item(folder, start, end, source_event_id) for start, end, source_event_id in items],
+            send_meeting_invitations=SEND_TO_NONE,
+            chunk_size=BATCH_SIZE,
+        )
+        if any(isinstance(result, ErrorFolderNotFound) for result in results):
+            self._forget_folder(self.busy_calendar_id)  # looked up again on the next write
+        return [result if isinstance(result, Exception) else result.id for result in results]
+
+    def update_busy_event(self, busy_event_id, start, end, source_event_id=None):
+        """Move a Busy event in place with UpdateItem.
+
+        Like DeleteItem, the ChangeKey is omitted; AlwaysOverwrite makes EWS
+        accept the update without it.
+        """
+        result, = self.update_busy_events([(busy_event_id, start, end, source_event_id)])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def update_busy_events(self, items):
+        """Move Busy events in place, ``BATCH_SIZE`` per UpdateItem call."""
+        account = self.account()
+        updates = [
+            (CalendarItem(account=account, id=busy_event_id, start=self._ews_dt(start), end=self._ews_dt(end)),
+             ['start', 'end'])
+            for busy_event_id, start, end, _ in items
+        ]
+        results = account.bulk_update(
+            updates,
+            conflict_resolution='AlwaysOverwrite',
+            send_meeting_invitations_or_cancellations=SEND_TO_NONE,
+            chunk_size=BATCH_SIZE,
+        )
+        return [
+            EventNotFound(busy_event_id) if isinstance(result, ErrorItemNotFound)
+            else result if isinstance(result, Exception)
+            else busy_event_id
+            for (busy_event_id, *_), result in zip(items, results)
+        ]
+
     def delete_event(self, event_id):
         """Delete an event by id.
 
@@ -235,3 +527,25 @@ class ExchangeCalendar(BaseCalendar):
             logger.info(f"Busy event {event_id} already gone")
         except Exception:
             logger.exception(f"Failed to delete busy event {event_id}")
+
+    def delete_events(self, event_ids):
+        """Delete Busy events, ``BATCH_SIZE`` per DeleteItem call.
+
+        Unlike ``delete_event``, failures are returned per item rather than
+        logged and swallowed; an item that is already gone counts as deleted.
+        """
+        results = self.account().bulk_delete(
+            [(event_id, None) for event_id in event_ids],
+            send_meeting_cancellations=SEND_TO_NONE,
+            chunk_size=BATCH_SIZE,
+        )
+        outcomes = []
+        for event_id, result in zip(event_ids, results):
+            if isinstance(result, ErrorItemNotFound):
+                logger.info(f"Busy event {event_id} already gone")
+                result = None
+            elif not isinstance(result, Exception):
+                logger.info(f"Deleted busy event {event_id}")
+                result = None
+            outcomes.append(result)
+        return outcomes
@@ -1,40 +1,57 @@
 import os
 import logging
+import re
+import threading
 import uuid
+from dateutil import parser as date_parser
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from calendar_sync.calendars.base import BaseCalendar
+from calendar_sync.calendars.base import BaseCalendar, EventDelta, EventNotFound
 
 logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
+PAGE_SIZE = 2500
+# Requests per HTTP batch; the Calendar API accepts up to 50.
+BATCH_SIZE = 50
+# singleEvents instance ids are "<series id>_<start>", e.g. abc_20250101T100000Z.
+_INSTANCE_ID = re.compile(r'^(?P<series>.+)_\d{8}(T\d{6}Z)?$')
 
-@BaseCalendar.register
-class GoogleCalendar(BaseCalendar):
-    type = 'google'
-    
-    def __init__(self, cfg):
-        super().__init__(cfg)
-        self.id = cfg['id']
-        self.credentials_path = cfg['credentials_path'] or '/app/credentials.json'
-        self.token_path = cfg['token_path'] or '/app/token.json'
-        self.service = self._authenticate()
+class _Account:
+    """Credentials, service and per-thread Http for one token file.
+
+    Shared by every configured calendar with that ``token_path``, so several
+    calendars on one Google account cost one token refresh and one client.
+    """
 
-    def _authenticate(self):
+    def __init__(self, token_path, calendar_id):
+        self.creds = self._load_credentials(token_path, calendar_id)
+        # static_discovery uses the calendar/v3 document bundled with
+        # googleapiclient: no discovery fetch over the network.
+        self.service = build(
+            'calendar', 'v3', credentials=self.creds, static_discovery=True, cache_discovery=False
+        )
+        self._local = threading.local()
+
+    @staticmethod
+    def _load_credentials(token_path, calendar_id):
         creds = None
 
-        if os.path.exists(self.token_path):
+        if os.path.exists(token_path):
             try:
-                creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
+                creds = Credentials.from_authorized_user_file(token_path, SCOPES)
                 if creds and creds.expired and creds.refresh_token:
-                    logger.info(f"Refreshing OAuth2 token for {self.id}...")
+                    logger.info(f"Refreshing OAuth2 token for {calendar_id}...")
                     creds.refresh(Request())
                     # Save refreshed token
-                    with open(self.token_path, 'w') as token_file:
+                    with open(token_path, 'w') as token_file:
                         token_file.write(creds.to_json())
             except Exception as e:
-                logger.warning(f"Failed to refresh token for {self.id}: {str(e)}")
+                logger.warning(f"Failed to refresh token for {calendar_id}: {str(e)}")
                 creds = None
 
         if not creds or not creds.valid:
@@ -42,50 +59,236 @@ class GoogleCalendar(BaseCalendar):
             # browser flow — it cannot work in a container and would crash the
             # whole sync. Fail loudly so a single bad token can be re-minted.
             raise RuntimeError(
-                f"No valid OAuth2 credentials for {self.id}: token at {self.token_path} "
+                f"No valid OAuth2 credentials for {calendar_id}: token at {token_path} "
                 f"is missing, expired or revoked. Re-mint it (see mint_token.py) and redeploy."
             )
+        return creds
+
+    def http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.creds, http=build_http())
+        return http
+
+
+# token_path -> _Account, for the life of the process.
+_accounts = {}
+_accounts_lock = threading.Lock()
+
+
+def _account_for(token_path, calendar_id):
+    key = os.path.abspath(token_path)
+    with _accounts_lock:
+        if key not in _accounts:
+            _accounts[key] = _Account(token_path, calendar_id)
+        return _accounts[key]
+
+
+@BaseCalendar.register
+class GoogleCalendar(BaseCalendar):
+    type = 'google'
+    supports_incremental = True
+    write_batch_size = BATCH_SIZE
+    supports_push = True
+
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        self.id = cfg['id']
+        self.credentials_path = cfg['credentials_path'] or '/app/credentials.json'
+        self.token_path = cfg['token_path'] or '/app/token.json'
+        self._account = _account_for(self.token_path, self.id)
+        self.service = self._account.service
+
+    def _execute(self, request):
+        """Execute *request* on a per-thread connection.
+
+        httplib2.Http is not thread-safe, and the sync engine issues writes to
+        one calendar from several threads, so each thread gets its own
+        authorized Http sharing the account's credentials.
+        """
+        return request.execute(http=self._http())
+
+    def _http(self):
+        return self._account.http()
+
+    def _batch(self, requests):
+        """Execute *requests* in HTTP batches of up to BATCH_SIZE.
+
+        Returns one entry per request, in order: its response, or the
+        HttpError it failed with.
+        """
+        results = [None] * len(requests)
+
+        def collect(request_id, response, exception):
+            results[int(request_id)] = exception if exception is not None else response
+
+        for offset in range(0, len(requests), BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=collect)
+            for i, request in enumerate(requests[offset:offset + BATCH_SIZE], offset):
+                batch.add(request, request_id=str(i))
+            batch.execute(http=self._http())
+        return results
+
+    @staticmethod
+    def _to_event(event):
+        return {
+            'id': event['id'],
+            'start': event['start'].get('dateTime', event['start'].get('date')),
+            'end': event['end'].get('dateTime', event['end'].get('date')),
+            'summary': event.get('summary', ''),
+            'description': event.get('description', '')
+        }
 
-        return build('calendar', 'v3', credentials=creds)
+    def _pages(self, **params):
+        """Yield every page of an events().list() call."""
+        request = self.service.events().list(calendarId=self.id, maxResults=PAGE_SIZE, **params)
+        while request is not None:
+            page = self._execute(request)
+            yield page
+            request = self.service.events().list_next(request, page)
 
     def list_events(self, time_min, time_max):
         """Return a list of events"""
-        events_result = self.service.events().list(
-            calendarId=self.id,
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        events = events_result.get('items', [])
         results = []
-        for event in events:
-            results.append({
-                'id': event['id'],
-                'start': event['start'].get('dateTime', event['start'].get('date')),
-                'end': event['end'].get('dateTime', event['end'].get('date')),
-                'summary': event.get('summary', ''),
-                'description': event.get('description', '')
-            })
+        for page in self._pages(timeMin=time_min, timeMax=time_max, singleEvents=True, orderBy='startTime'):
+            results.extend(self._to_event(event) for event in page.get('items', []))
         return results
 
-    def create_busy_event(self, start, end, source_event_id=None):
-        """Create a Busy event"""
-        event = {
+    def list_changes(self, time_min, time_max, sync_token=None):
+        """Return events changed since *sync_token* (a Google nextSyncToken).
+
+        Without a token this is a full listing of the window that also yields
+        a first token. Requests with a token cannot carry timeMin/timeMax, so
+        changed events outside the window are reported as removed. An expired
+        token (HTTP 410 Gone) falls back to a full listing.
+        """
+        if sync_token is None:
+            params = {'timeMin': time_min, 'timeMax': time_max}
+        else:
+            params = {'syncToken': sync_token}
+        window = (date_parser.isoparse(time_min), date_parser.isoparse(time_max))
+        events, removed, next_token = [], [], None
+        try:
+            for page in self._pages(singleEvents=True, **params):
+                for event in page.get('items', []):
+                    if event.get('status') == 'cancelled' or not self._in_window(event, *window):
+                        removed.append(event['id'])
+                    else:
+                        events.append(self._to_event(event))
+                next_token = page.get('nextSyncToken')
+        except HttpError as exc:
+            if sync_token is not None and exc.resp.status == 410:
+                logger.info(f"Sync token for {self.id} expired; running a full resync")
+                return self.list_changes(time_min, time_max)
+            raise
+        logger.info(
+            f"{'Full' if sync_token is None else 'Incremental'} sync of {self.id}: "
+            f"{len(events)} changed, {len(removed)} removed"
+        )
+        return EventDelta(events, removed, next_token, sync_token is None)
+
+    @staticmethod
+    def _in_window(event, window_start, window_end):
+        start = event.get('start', {}).get('dateTime')
+        end = event.get('end', {}).get('dateTime')
+        if not start or not end:
+            return True  # all-day; skipped by the sync loop either way
+        return date_parser.isoparse(end) > window_start and date_parser.isoparse(start) < window_end
+
+    def series_id(self, event_id):
+        match = _INSTANCE_ID.match(event_id)
+        return match.group('series') if match else None
+
+    @staticmethod
+    def _busy_body(start, end, source_event_id):
+        return {
             'summary': 'Busy',
             'description': f'Managed-by: calendar-sync (source {source_event_id})',
             'start': {'dateTime': start, 'timeZone': 'UTC'},
             'end': {'dateTime': end, 'timeZone': 'UTC'},
             'transparency': 'opaque'
         }
+
+    @staticmethod
+    def _move_body(start, end):
+        return {
+            'start': {'dateTime': start, 'timeZone': 'UTC'},
+            'end': {'dateTime': end, 'timeZone': 'UTC'},
+        }
+
+    @staticmethod
+    def _is_gone(exc):
+        return isinstance(exc, HttpError) and exc.resp.status in (404, 410)
+
+    def create_busy_event(self, start, end, source_event_id=None):
+        """Create a Busy event"""
         target_cal = self.busy_calendar_id or self.id
-        created_event = self.service.events().insert(calendarId=target_cal, body=event).execute()
+        created_event = self._execute(
+            self.service.events().insert(calendarId=target_cal, body=self._busy_body(start, end, source_event_id))
+        )
         return created_event['id']
 
+    def create_busy_events(self, items):
+        """Create Busy events in HTTP batches; return their IDs (or errors)."""
+        target_cal = self.busy_calendar_id or self.id
+        events = self.service.events()
+        results = self._batch([
+            events.insert(calendarId=target_cal, body=self._busy_body(start, end, source_event_id))
+            for start, end, source_event_id in items
+        ])
+        return [result if isinstance(result, Exception) else result['id'] for result in results]
+
+    def update_busy_event(self, busy_event_id, start, end, source_event_id=None):
+        """Move a Busy event in place with events.patch."""
+        target_cal = self.busy_calendar_id or self.id
+        try:
+            patched = self._execute(
+                self.service.events().patch(
+                    calendarId=target_cal, eventId=busy_event_id, body=self._move_body(start, end)
+                )
+            )
+        except HttpError as exc:
+            if self._is_gone(exc):
+                raise EventNotFound(busy_event_id) from exc
+            raise
+        # A deleted event can still be patched; it stays cancelled.
+        if patched.get('status') == 'cancelled':
+            raise EventNotFound(busy_event_id)
+        return busy_event_id
+
+    def update_busy_events(self, items):
+        """Patch Busy events in HTTP batches; vanished ones come back as EventNotFound."""
+        target_cal = self.busy_calendar_id or self.id
+        events = self.service.events()
+        results = self._batch([
+            events.patch(calendarId=target_cal, eventId=busy_event_id, body=self._move_body(start, end))
+            for busy_event_id, start, end, _ in items
+        ])
+        out = []
+        for (busy_event_id, *_), result in zip(items, results):
+            if self._is_gone(result) or (isinstance(result, dict) and result.get('status') == 'cancelled'):
+                out.append(EventNotFound(busy_event_id))
+            else:
+                out.append(result if isinstance(result, Exception) else busy_event_id)
+        return out
+
+    def delete_events(self, event_ids):
+        """Delete Busy events in HTTP batches (from the busy calendar if configured)."""
+        target_cal = self.busy_calendar_id or self.id
+        events = self.service.events()
+        results = self._batch([events.delete(calendarId=target_cal, eventId=event_id) for event_id in event_ids])
+        out = []
+        for event_id, result in zip(event_ids, results):
+            if isinstance(result, Exception) and not self._is_gone(result):
+                out.append(result)
+            else:
+                logger.info(f"Deleted busy event {event_id} from {target_cal}")
+                out.append(None)
+        return out
+
     def _delete(self, calendar_id, event_id):
         try:
-            self.service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+            self._execute(self.service.events().delete(calendarId=calendar_id, eventId=event_id))
             logger.info(f"Deleted busy event {event_id} from {calendar_id}")
         except Exception:
             logger.exception(f"Failed to delete busy event {event_id} from {calendar_id}")
@@ -96,4 +299,37 @@ class GoogleCalendar(BaseCalendar):
 
     def delete_main_event(self, event_id):
         """Delete an event from this calendar's own id (never the busy calendar)."""
-        self._delete(self.id, event_id)
\ No newline at end of file
+        self._delete(self.id, event_id)
+
+    def subscribe(self, address, secret):
+        """Open an events.watch channel on the calendar we read.
+
+        Google picks the channel lifetime (a week for events); renewal opens a
+        new channel and stops the old one.
+        """
+        channel_id = str(uuid.uuid4())
+        channel = self._execute(self.service.events().watch(
+            calendarId=self.id,
+            body={'id': channel_id, 'type': 'web_hook', 'address': address, 'token': secret},
+        ))
+        logger.info(f"Opened watch channel {channel_id} for {self.id}")
+        return {'id': channel_id, 'resource_id': channel['resourceId'], 'expires': int(channel['expiration']) / 1000}
+
+    def renew_subscription(self, subscription, address, secret):
+        """Open a new channel and stop the old one (channels cannot be extended)."""
+        renewed = self.subscribe(address, secret)
+        try:
+            self.unsubscribe(subscription)
+        except Exception:
+            logger.warning(f"Failed to stop old watch channel {subscription['id']} of {self.id}", exc_info=True)
+        return renewed
+
+    def unsubscribe(self, subscription):
+        try:
+            self._execute(self.service.channels().stop(
+                body={'id': subscription['id'], 'resourceId': subscription['resource_id']}
+            ))
+        except HttpError as exc:
+            if not self._is_gone(exc):
+                raise
+        logger.info(f"Stopped watch channel {subscription['id']} for {self.id}")
@@ -0,0 +1,79 @@
+"""MSAL token caches shared by the Outlook (Graph) and Exchange (EWS) backends.
+
+One ``TokenCache`` per token file: every calendar configured with the same
+``token_path`` gets the same instance, so they share one MSAL application,
+one refresh and one in-memory access token per scope set. Access tokens are
+served from memory until ``REFRESH_MARGIN`` before they expire; MSAL is only
+consulted to refresh them. The token file is rewritten once, atomically,
+by ``save`` (at the end of a sync cycle) rather than after every call.
+"""
+import logging
+import os
+import threading
+import time
+
+import msal
+
+from calendar_sync.utils.files import write_text
+
+logger = logging.getLogger(__name__)
+
+# Refresh an access token this long before it expires. MSAL itself treats
+# tokens this close to expiry as expired, so a refresh yields a new one.
+REFRESH_MARGIN = 300
+
+
+class TokenCache:
+    def __init__(self, token_path, client_id, authority):
+        self.token_path = token_path
+        self._cache = msal.SerializableTokenCache()
+        if os.path.exists(token_path):
+            with open(token_path) as fh:
+                self._cache.deserialize(fh.read())
+        self._app = msal.PublicClientApplication(client_id, authority=authority, token_cache=self._cache)
+        # Writes to one calendar run on several threads; serialize refresh
+        # and persistence.
+        self._lock = threading.RLock()
+        self._tokens = {}  # scopes -> (MSAL result, time.monotonic() it expires)
+
+    def acquire(self, scopes):
+        """Return an MSAL result for *scopes*, or None if the cache holds no account.
+
+        A result without ``access_token`` means the silent refresh failed.
+        ``expires_in`` is the token's remaining lifetime at the time of the call.
+        """
+        key = tuple(scopes)
+        with self._lock:
+            cached = self._tokens.get(key)
+            now = time.monotonic()
+            if cached is None or now > cached[1] - REFRESH_MARGIN:
+                accounts = self._app.get_accounts()
+                if not accounts:
+                    return None
+                result = self._app.acquire_token_silent(list(scopes), account=accounts[0])
+                if not result or 'access_token' not in result:
+                    return result
+                cached = self._tokens[key] = (result, now + int(result.get('expires_in', 3599)))
+            result, expires = cached
+            return {**result, 'expires_in': int(expires - now)}
+
+    def save(self):
+        """Write the token file if MSAL changed it (e.g. a rotated refresh token)."""
+        with self._lock:
+            if self._cache.has_state_changed:
+                write_text(self.token_path, self._cache.serialize())
+                self._cache.has_state_changed = False
+                logger.debug(f"Saved MSAL token cache {self.token_path}")
+
+
+# (token file, client id, authority) -> TokenCache, for the life of the process.
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def token_cache(token_path, client_id, authority):
+    key = (os.path.abspath(token_path), client_id, authority)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = TokenCache(token_path, client_id, authority)
+        return _caches[key]
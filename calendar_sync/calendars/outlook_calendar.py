@@ -12,15 +12,18 @@ mirroring the Google backend's credentials/token split.
 """
 import json
 import logging
-import os
-from datetime import timezone
+import time
+from datetime import datetime, timedelta, timezone
 from urllib.parse import quote
 
-import msal
 import requests
 from dateutil import parser as date_parser
 
-from calendar_sync.calendars.base import BaseCalendar
+from calendar_sync.calendars.base import BaseCalendar, EventDelta, EventNotFound
+from calendar_sync.calendars.msal_cache import token_cache
+from calendar_sync.config import yaml_config
+from calendar_sync.utils.http import session_for
+from calendar_sync.writes import configured_limit
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +31,22 @@ GRAPH_BASE = "https://graph.microsoft.com/v1.0"
 # Keep in sync with SCOPES in mint_outlook_token.py — the cached token must be
 # acquired for the same scopes that acquire_token_silent requests here.
 SCOPES = ["Calendars.ReadWrite"]
+PAGE_SIZE = 250
+# Sub-requests per JSON $batch call (the Graph limit).
+BATCH_SIZE = 20
+# Retries of a throttled (429) sub-request, each after its Retry-After.
+MAX_THROTTLE_RETRIES = 3
+# Lifetime requested for change-notification subscriptions; Graph allows
+# at most 4230 minutes on Outlook event resources.
+SUBSCRIPTION_MINUTES = 4200
 
 
 @BaseCalendar.register
 class OutlookCalendar(BaseCalendar):
     type = 'outlook'
+    supports_incremental = True
+    write_batch_size = BATCH_SIZE
+    supports_push = True
 
     def __init__(self, cfg):
         super().__init__(cfg)
@@ -51,36 +65,29 @@ class OutlookCalendar(BaseCalendar):
             f"https://login.microsoftonline.com/{creds['tenant_id']}"
         )
 
-        self._cache = msal.SerializableTokenCache()
-        if os.path.exists(self.token_path):
-            with open(self.token_path) as fh:
-                self._cache.deserialize(fh.read())
-        self._app = msal.PublicClientApplication(
-            self.client_id, authority=authority, token_cache=self._cache
-        )
+        self._tokens = token_cache(self.token_path, self.client_id, authority)
+        # Pooled keep-alive session shared by every Graph calendar; each adds
+        # a connection per write lane plus one for fetches to its pool.
+        self._session = session_for(GRAPH_BASE, pool_size=configured_limit(yaml_config, self.type) + 1)
 
     # -- auth ---------------------------------------------------------------
-    def _save_cache(self):
-        if self._cache.has_state_changed:
-            with open(self.token_path, 'w') as fh:
-                fh.write(self._cache.serialize())
-
     def _token(self):
-        accounts = self._app.get_accounts()
-        if not accounts:
+        result = self._tokens.acquire(SCOPES)
+        if result is None:
             raise RuntimeError(
                 f"No cached Outlook account for {self.id}; "
                 f"run mint_outlook_token.py to authorize and create {self.token_path}"
             )
-        result = self._app.acquire_token_silent(SCOPES, account=accounts[0])
-        self._save_cache()
-        if not result or 'access_token' not in result:
+        if 'access_token' not in result:
             raise RuntimeError(
                 f"Failed to acquire Outlook token for {self.id}: {result}. "
                 f"The refresh token may have expired — re-run mint_outlook_token.py"
             )
         return result['access_token']
 
+    def end_cycle(self):
+        self._tokens.save()
+
     def _headers(self, extra=None):
         headers = {
             'Authorization': f'Bearer {self._token()}',
@@ -113,6 +120,24 @@ class OutlookCalendar(BaseCalendar):
             return f"{GRAPH_BASE}/me/calendars/{quote(calendar_id, safe='')}"
         return f"{GRAPH_BASE}/me"
 
+    def _event(self, ev):
+        """Map a Graph event onto the sync loop's event dict."""
+        if ev.get('isAllDay'):
+            # Match the Google backend: emit a date-only string so the
+            # sync loop's "no 'T'" check skips all-day events.
+            start = date_parser.isoparse(ev['start']['dateTime']).date().isoformat()
+            end = date_parser.isoparse(ev['end']['dateTime']).date().isoformat()
+        else:
+            start = self._to_iso(ev['start'])
+            end = self._to_iso(ev['end'])
+        return {
+            'id': ev['id'],
+            'start': start,
+            'end': end,
+            'summary': ev.get('subject', '') or '',
+            'description': (ev.get('body') or {}).get('content', '') or '',
+        }
+
     # -- API ----------------------------------------------------------------
     def list_events(self, time_min, time_max):
         """Return expanded event instances in the configured time window."""
@@ -122,39 +147,74 @@ class OutlookCalendar(BaseCalendar):
             'endDateTime': time_max,
             '$select': 'id,subject,start,end,body,isAllDay,isCancelled',
             '$orderby': 'start/dateTime',
-            '$top': 250,
+            '$top': PAGE_SIZE,
         }
         results = []
         while url:
-            resp = requests.get(url, headers=self._headers(), params=params, timeout=30)
+            resp = self._session.get(url, headers=self._headers(), params=params, timeout=30)
             resp.raise_for_status()
             data = resp.json()
             for ev in data.get('value', []):
                 if ev.get('isCancelled'):
                     continue
-                if ev.get('isAllDay'):
-                    # Match the Google backend: emit a date-only string so the
-                    # sync loop's "no 'T'" check skips all-day events.
-                    start = date_parser.isoparse(ev['start']['dateTime']).date().isoformat()
-                    end = date_parser.isoparse(ev['end']['dateTime']).date().isoformat()
-                else:
-                    start = self._to_iso(ev['start'])
-                    end = self._to_iso(ev['end'])
-                results.append({
-                    'id': ev['id'],
-                    'start': start,
-                    'end': end,
-                    'summary': ev.get('subject', '') or '',
-                    'description': (ev.get('body') or {}).get('content', '') or '',
-                })
+                results.append(self._event(ev))
             url = data.get('@odata.nextLink')
             params = None  # nextLink already carries the query
         return results
 
-    def create_busy_event(self, start, end, source_event_id=None):
-        """Create a Busy event (on the busy calendar if configured)."""
-        url = f"{self._events_path(self.busy_calendar_id)}/events"
-        body = {
+    def list_changes(self, time_min, time_max, sync_token=None):
+        """Return instances changed since *sync_token* via calendarView/delta.
+
+        The token is the ``@odata.deltaLink`` of the previous round; it keeps
+        the window of the initial request, and Graph reports instances that
+        leave that window as ``@removed`` tombstones. Instances outside
+        [*time_min*, *time_max*] (say, edits to ones that already ended) are
+        returned in ``removed`` as well. Without a token (or when
+        Graph rejects it with 410 Gone) the whole window is listed and a new
+        delta link started.
+        """
+        if sync_token is None:
+            url = f"{self._events_path(self.graph_calendar_id)}/calendarView/delta"
+            params = {'startDateTime': time_min, 'endDateTime': time_max}
+        else:
+            url, params = sync_token, None
+        # calendarView/delta takes no $select/$top; page size goes in Prefer.
+        headers = {'Prefer': f'outlook.timezone="UTC", odata.maxpagesize={PAGE_SIZE}'}
+        events, removed, delta_link = [], [], None
+        while url:
+            resp = self._session.get(url, headers=self._headers(headers), params=params, timeout=30)
+            if sync_token is not None and resp.status_code == 410:
+                logger.info(f"Delta link for {self.id} expired; running a full resync")
+                return self.list_changes(time_min, time_max)
+            resp.raise_for_status()
+            data = resp.json()
+            for ev in data.get('value', []):
+                if '@removed' in ev or ev.get('isCancelled'):
+                    removed.append(ev['id'])
+                    continue
+                event = self._event(ev)
+                if self._in_window(event, time_min, time_max):
+                    events.append(event)
+                else:
+                    removed.append(ev['id'])
+            url = data.get('@odata.nextLink')
+            params = None  # nextLink already carries the query
+            delta_link = data.get('@odata.deltaLink', delta_link)
+        logger.info(
+            f"{'Full' if sync_token is None else 'Incremental'} sync of {self.id}: "
+            f"{len(events)} changed, {len(removed)} removed"
+        )
+        return EventDelta(events, removed, delta_link, sync_token is None)
+
+    @staticmethod
+    def _in_window(event, time_min, time_max):
+        if 'T' not in event['start']:
+            return True  # all-day; skipped by the sync loop either way
+        start, end = date_parser.isoparse(event['start']), date_parser.isoparse(event['end'])
+        return end > date_parser.isoparse(time_min) and start < date_parser.isoparse(time_max)
+
+    def _busy_body(self, start, end, source_event_id):
+        return {
             'subject': 'Busy',
             'body': {
                 'contentType': 'text',
@@ -165,15 +225,139 @@ class OutlookCalendar(BaseCalendar):
             'showAs': 'busy',
             'isReminderOn': False,
         }
-        resp = requests.post(
+
+    def _move_body(self, start, end):
+        return {
+            'start': {'dateTime': self._graph_dt(start), 'timeZone': 'UTC'},
+            'end': {'dateTime': self._graph_dt(end), 'timeZone': 'UTC'},
+        }
+
+    @staticmethod
+    def _event_url(event_id):
+        return f"{GRAPH_BASE}/me/events/{quote(event_id, safe='')}"
+
+    def create_busy_event(self, start, end, source_event_id=None):
+        """Create a Busy event (on the busy calendar if configured)."""
+        url = f"{self._events_path(self.busy_calendar_id)}/events"
+        resp = self._session.post(
             url,
             headers=self._headers({'Content-Type': 'application/json'}),
-            json=body,
+            json=self._busy_body(start, end, source_event_id),
             timeout=30,
         )
         resp.raise_for_status()
         return resp.json()['id']
 
+    def update_busy_event(self, busy_event_id, start, end, source_event_id=None):
+        """Move a Busy event in place with PATCH /me/events/{id}."""
+        resp = self._session.patch(
+            self._event_url(busy_event_id),
+            headers=self._headers({'Content-Type': 'application/json'}),
+            json=self._move_body(start, end),
+            timeout=30,
+        )
+        if resp.status_code == 404:
+            raise EventNotFound(busy_event_id)
+        resp.raise_for_status()
+        return busy_event_id
+
+    # -- JSON $batch --------------------------------------------------------
+    def _batch(self, subrequests):
+        """Send ``(method, url, body)`` *subrequests* through Graph's /$batch.
+
+        Up to BATCH_SIZE go in one call. Returns one ``(status, body)`` per
+        sub-request, in order. Throttled sub-requests (429) are retried one
+        by one after their Retry-After, without resending the rest.
+        """
+        results = [None] * len(subrequests)
+        for offset in range(0, len(subrequests), BATCH_SIZE):
+            chunk = subrequests[offset:offset + BATCH_SIZE]
+            payload = {'requests': [
+                self._batch_entry(str(i), method, url, body)
+                for i, (method, url, body) in enumerate(chunk, offset)
+            ]}
+            resp = self._session.post(
+                f"{GRAPH_BASE}/$batch",
+                headers=self._headers({'Content-Type': 'application/json'}),
+                json=payload,
+                timeout=60,
+            )
+            resp.raise_for_status()
+            for sub in resp.json().get('responses', []):
+                i = int(sub['id'])
+                status, body = sub.get('status'), sub.get('body')
+                if status == 429:
+                    status, body = self._retry_throttled(subrequests[i], _retry_after(sub.get('headers')))
+                results[i] = (status, body)
+        missing = (500, {'error': {'message': 'no response in $batch'}})
+        return [result or missing for result in results]
+
+    @staticmethod
+    def _batch_entry(request_id, method, url, body):
+        entry = {'id': request_id, 'method': method, 'url': url[len(GRAPH_BASE):]}
+        if body is not None:
+            entry['body'] = body
+            entry['headers'] = {'Content-Type': 'application/json'}
+        return entry
+
+    def _retry_throttled(self, subrequest, retry_after):
+        method, url, body = subrequest
+        for _ in range(MAX_THROTTLE_RETRIES):
+            time.sleep(retry_after)
+            resp = self._session.request(
+                method,
+                url,
+                headers=self._headers({'Content-Type': 'application/json'} if body is not None else None),
+                json=body,
+                timeout=30,
+            )
+            if resp.status_code != 429:
+                return resp.status_code, (resp.json() if resp.content else None)
+            retry_after = _retry_after(resp.headers)
+        return 429, {'error': {'message': 'still throttled after retries'}}
+
+    @staticmethod
+    def _batch_error(status, body):
+        message = ((body or {}).get('error') or {}).get('message', '')
+        return requests.HTTPError(f"Graph sub-request failed: HTTP {status} {message}".rstrip())
+
+    def create_busy_events(self, items):
+        """Create Busy events via /$batch; return their IDs (or errors)."""
+        url = f"{self._events_path(self.busy_calendar_id)}/events"
+        results = self._batch([
+            ('POST', url, self._busy_body(start, end, source_event_id))
+            for start, end, source_event_id in items
+        ])
+        return [body['id'] if status < 400 else self._batch_error(status, body) for status, body in results]
+
+    def update_busy_events(self, items):
+        """PATCH Busy events via /$batch; vanished ones come back as EventNotFound."""
+        results = self._batch([
+            ('PATCH', self._event_url(busy_event_id), self._move_body(start, end))
+            for busy_event_id, start, end, _ in items
+        ])
+        out = []
+        for (busy_event_id, *_), (status, body) in zip(items, results):
+            if status == 404:
+                out.append(EventNotFound(busy_event_id))
+            elif status >= 400:
+                out.append(self._batch_error(status, body))
+            else:
+                out.append(busy_event_id)
+        return out
+
+    def delete_events(self, event_ids):
+        """DELETE Busy events via /$batch; already-deleted ones count as deleted."""
+        results = self._batch([('DELETE', self._event_url(event_id), None) for event_id in event_ids])
+        out = []
+        for event_id, (status, body) in zip(event_ids, results):
+            if status >= 400 and status != 404:
+                out.append(self._batch_error(status, body))
+            else:
+                logger.info(f"Deleted busy event {event_id}")
+                out.append(None)
+        return out
+
     def delete_event(self, event_id):
         """Delete an event by id.
 
@@ -181,11 +365,82 @@ class OutlookCalendar(BaseCalendar):
         regardless of which calendar the event lives on. That also makes the
         base ``delete_main_event`` (which defers to this) correct for Outlook.
         """
-        url = f"{GRAPH_BASE}/me/events/{quote(event_id, safe='')}"
+        url = self._event_url(event_id)
         try:
-            resp = requests.delete(url, headers=self._headers(), timeout=30)
+            resp = self._session.delete(url, headers=self._headers(), timeout=30)
             if resp.status_code not in (204, 404):
                 resp.raise_for_status()
             logger.info(f"Deleted busy event {event_id}")
         except Exception:
             logger.exception(f"Failed to delete busy event {event_id}")
+
+    # -- change notifications -------------------------------------------------
+    def _subscription_resource(self):
+        if self.graph_calendar_id:
+            return f"me/calendars/{quote(self.graph_calendar_id, safe='')}/events"
+        return "me/events"
+
+    @staticmethod
+    def _subscription_expiry():
+        expires = datetime.now(timezone.utc) + timedelta(minutes=SUBSCRIPTION_MINUTES)
+        return expires.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    @staticmethod
+    def _subscription(body):
+        return {'id': body['id'], 'expires': date_parser.isoparse(body['expirationDateTime']).timestamp()}
+
+    def subscribe(self, address, secret):
+        """Create a Graph subscription for changes to the calendar we read.
+
+        Graph validates *address* before answering, so the receiver must
+        already be listening.
+        """
+        resp = self._session.post(
+            f"{GRAPH_BASE}/subscriptions",
+            headers=self._headers(),
+            json={
+                'changeType': 'created,updated,deleted',
+                'notificationUrl': address,
+                'resource': self._subscription_resource(),
+                'expirationDateTime': self._subscription_expiry(),
+                'clientState': secret,
+            },
+            timeout=30,
+        )
+        resp.raise_for_status()
+        subscription = self._subscription(resp.json())
+        logger.info(f"Created Graph subscription {subscription['id']} for {self.id}")
+        return subscription
+
+    def renew_subscription(self, subscription, address, secret):
+        """Push the subscription's expiry out; recreate it if Graph dropped it."""
+        resp = self._session.patch(
+            f"{GRAPH_BASE}/subscriptions/{subscription['id']}",
+            headers=self._headers(),
+            json={'expirationDateTime': self._subscription_expiry()},
+            timeout=30,
+        )
+        if resp.status_code == 404:
+            logger.info(f"Graph subscription {subscription['id']} for {self.id} is gone; recreating it")
+            return self.subscribe(address, secret)
+        resp.raise_for_status()
+        return self._subscription(resp.json())
+
+    def unsubscribe(self, subscription):
+        resp = self._session.delete(
+            f"{GRAPH_BASE}/subscriptions/{subscription['id']}", headers=self._headers(), timeout=30
+        )
+        if resp.status_code != 404:
+            resp.raise_for_status()
+        logger.info(f"Deleted Graph subscription {subscription['id']} for {self.id}")
+
+
+def _retry_after(headers, default=1):
+    """Seconds to wait from a Retry-After header (Graph sends whole seconds)."""
+    for key, value in (headers or {}).items():
+        if key.lower() == 'retry-after':
+            try:
+                return max(0, int(value))
+            except (TypeError, ValueError):
+                return default
+    return default
@@ -0,0 +1,182 @@
+"""Long-running mode: sync on an interval in one process.
+
+Unlike a CronJob run, the daemon initializes its calendars once and reuses
+them (with their HTTP sessions, OAuth tokens, discovery results and event
+caches) for every cycle. SIGTERM/SIGINT stop it after the cycle in flight,
+so writes and their mappings are never left half-recorded.
+
+With a ``push`` block in config.yaml the daemon also runs the receiver from
+:mod:`calendar_sync.push`: a change notification triggers a sync of just
+that calendar (after ``debounce_seconds``), and full polling drops to
+``poll_interval_seconds`` as a safety net.
+"""
+import logging
+import random
+import secrets
+import signal
+import threading
+import time
+
+from opentelemetry import trace
+
+from calendar_sync.config import yaml_config
+from calendar_sync.db.session import get_session
+from calendar_sync.push import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_LISTEN,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_RENEW_MARGIN,
+    PushReceiver,
+    Subscriptions,
+)
+from calendar_sync.sync import load_calendars, sync_cycle
+from calendar_sync.utils.env import load_env
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer("calendar-sync")
+
+DEFAULT_INTERVAL = 300
+DEFAULT_JITTER = 30
+
+
+class Daemon:
+    """Run ``sync_cycle`` every *interval* seconds (start to start).
+
+    Each wait adds up to *jitter* random seconds, so replicas or restarts do
+    not hit the calendar APIs in lockstep. A cycle that overruns the interval
+    is followed by the next one right away. Between full cycles, calendars
+    passed to ``request_sync`` get targeted cycles of their own.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, jitter=DEFAULT_JITTER, push=None):
+        self.interval = interval
+        self.jitter = jitter
+        self.push = push
+        self.debounce = (push or {}).get("debounce_seconds", DEFAULT_DEBOUNCE)
+        self.stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg, interval=None):
+        push = cfg.get("push")
+        if push:
+            default = push.get("poll_interval_seconds", DEFAULT_POLL_INTERVAL)
+        else:
+            default = cfg.get("daemon_interval_seconds", DEFAULT_INTERVAL)
+        return cls(
+            interval=interval or default,
+            jitter=cfg.get("daemon_jitter_seconds", DEFAULT_JITTER),
+            push=push,
+        )
+
+    def stop(self, signum=None, frame=None):
+        if signum is not None:
+            logger.info(f"Received {signal.Signals(signum).name}; stopping after the current cycle")
+        self.stopping.set()
+        self._wakeup.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def delay(self, elapsed):
+        return max(0.0, self.interval - elapsed) + random.uniform(0, self.jitter)
+
+    def request_sync(self, calendar_id):
+        """Queue a targeted sync of *calendar_id* (called from receiver threads)."""
+        with self._pending_lock:
+            self._pending.add(calendar_id)
+        self._wakeup.set()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+            self._wakeup.clear()
+        return pending
+
+    def _wait(self, deadline):
+        """Sleep until *deadline* or a sync request; True if woken by a request."""
+        while not self.stopping.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._wakeup.wait(remaining) and not self.stopping.is_set():
+                # Let a burst of notifications (one per written event) settle.
+                self.stopping.wait(self.debounce)
+                return True
+        return False
+
+    def _start_push(self):
+        secret = self.push.get("secret") or secrets.token_urlsafe(24)
+        receiver = PushReceiver(self.push.get("listen", DEFAULT_LISTEN), secret, self.request_sync)
+        receiver.start()
+        subscriptions = None
+        if self.push.get("public_url"):
+            subscriptions = Subscriptions(
+                self.push["public_url"], secret, self.push.get("renew_margin_seconds", DEFAULT_RENEW_MARGIN)
+            )
+        else:
+            logger.warning("push.public_url is not set; receiving notifications without subscribing")
+        return receiver, subscriptions
+
+    def _cycle(self, session, calendars, sources, cycle):
+        attributes = {"cycle": cycle, "targeted": sources is not None}
+        with tracer.start_as_current_span("calendar-sync.cycle", attributes=attributes):
+            if not calendars:
+                logger.error("No calendars initialized; retrying on the next cycle")
+                return
+            if sources is not None:
+                logger.info(f"Targeted sync of {', '.join(sorted(sources))}")
+            try:
+                sync_cycle(session, calendars, sources=sources)
+            except Exception:
+                logger.exception("Sync cycle failed; retrying on the next cycle")
+                session.rollback()
+
+    def run(self, max_cycles=None):
+        load_env()
+        logger.info(f"Starting calendar sync daemon (every {self.interval}s, jitter {self.jitter}s)")
+        session = get_session()
+        uninitialized = []
+        calendars = load_calendars(failed=uninitialized)
+        receiver, subscriptions = self._start_push() if self.push else (None, None)
+        cycles = 0
+        next_full = time.monotonic()
+        try:
+            while not self.stopping.is_set():
+                if uninitialized:
+                    # Retry blocks that failed to initialize (e.g. a token that
+                    # was re-minted since); the healthy calendars are kept.
+                    retry, uninitialized = uninitialized, []
+                    calendars.extend(load_calendars(retry, failed=uninitialized))
+                if subscriptions is not None:
+                    subscriptions.refresh(calendars)
+                started = time.monotonic()
+                if started >= next_full:
+                    self._take_pending()  # the full cycle covers them
+                    self._cycle(session, calendars, None, cycles)
+                    finished = time.monotonic()
+                    next_full = finished + self.delay(finished - started)
+                else:
+                    sources = self._take_pending()
+                    if sources:
+                        self._cycle(session, calendars, sources, cycles)
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+                self._wait(next_full)
+        finally:
+            if receiver is not None:
+                receiver.stop()
+            if subscriptions is not None:
+                subscriptions.close(calendars)
+            session.close()
+        logger.info("Calendar sync daemon stopped")
+
+
+def main(interval=None):
+    daemon = Daemon.from_config(yaml_config, interval=interval)
+    daemon.install_signal_handlers()
+    daemon.run()
@@ -0,0 +1,242 @@
+"""In-memory index over EventMapping rows for a single sync run."""
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, bindparam, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from calendar_sync.db.models import EventMapping
+
+logger = logging.getLogger(__name__)
+
+
+def mapping_key(mapping):
+    return (mapping.source_calendar, mapping.source_event_id, mapping.target_calendar)
+
+
+def _pk(key):
+    source_calendar, source_event_id, target_calendar = key
+    return {
+        'source_calendar': source_calendar,
+        'source_event_id': source_event_id,
+        'target_calendar': target_calendar,
+    }
+
+
+class MappingIndex:
+    """All EventMapping rows, loaded once and keyed for the lookups sync does.
+
+    ``get`` serves (source, source_event_id, target) and ``get_busy`` serves
+    (target, busy_event_id). Changes are visible in the index immediately and
+    written back to the database by ``flush``.
+    """
+
+    def __init__(self, session, mappings=()):
+        self.session = session
+        self._by_key = {}
+        self._by_busy = {}
+        self._by_source = {}
+        for mapping in mappings:
+            self._insert(mapping)
+        # Pending changes, keyed like _by_key; _dirty holds the new column values.
+        self._new = {}
+        self._dirty = {}
+        self._deleted = {}
+
+    @classmethod
+    def load(cls, session):
+        """Build the index with a single query over event_mappings.
+
+        The loaded objects are detached from *session*: changes are tracked by
+        the index and written with Core statements, never by the ORM flush.
+        """
+        mappings = session.execute(select(EventMapping)).scalars().all()
+        session.expunge_all()
+        session.commit()
+        return cls(session, mappings)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    # -- lookups ------------------------------------------------------------
+    def get(self, source_calendar, source_event_id, target_calendar):
+        return self._by_key.get((source_calendar, source_event_id, target_calendar))
+
+    def get_busy(self, target_calendar, busy_event_id):
+        return self._by_busy.get((target_calendar, busy_event_id))
+
+    def for_source(self, source_calendar):
+        return list(self._by_source.get(source_calendar, {}).values())
+
+    # -- changes ------------------------------------------------------------
+    def add(self, source_calendar, source_event_id, target_calendar, busy_event_id, start, end):
+        key = (source_calendar, source_event_id, target_calendar)
+        if key in self._by_key:
+            raise KeyError(f"Mapping already exists for {key}")
+        deleted = self._deleted.pop(key, None)
+        if deleted is not None:
+            # Removed and re-added within one run: keep the persisted row.
+            self._insert(deleted)
+            self.update(deleted, busy_event_id, start, end)
+            return deleted
+        mapping = EventMapping(
+            source_calendar=source_calendar,
+            source_event_id=source_event_id,
+            target_calendar=target_calendar,
+            busy_event_id=busy_event_id,
+            last_synced_time=datetime.now(timezone.utc),
+            start_time=start,
+            end_time=end,
+        )
+        self._insert(mapping)
+        self._new[key] = mapping
+        return mapping
+
+    def reload(self, key):
+        """Read the stored row for *key* into the index, e.g. after an insert conflict.
+
+        Returns the mapping, or None if there is no such row.
+        """
+        mapping = self.session.get(EventMapping, _pk(key))
+        if mapping is None:
+            return None
+        self.session.expunge(mapping)
+        self.session.commit()
+        self._insert(mapping)
+        return mapping
+
+    def update(self, mapping, busy_event_id, start, end):
+        key = mapping_key(mapping)
+        self._by_busy.pop((mapping.target_calendar, mapping.busy_event_id), None)
+        mapping.busy_event_id = busy_event_id
+        mapping.start_time = start
+        mapping.end_time = end
+        mapping.last_synced_time = datetime.now(timezone.utc)
+        self._by_busy[(mapping.target_calendar, busy_event_id)] = mapping
+        if key not in self._new:
+            self._dirty[key] = {
+                'busy_event_id': busy_event_id,
+                'start_time': start,
+                'end_time': end,
+                'last_synced_time': mapping.last_synced_time,
+            }
+
+    def remove(self, mapping):
+        key = mapping_key(mapping)
+        self._drop(mapping)
+        self._dirty.pop(key, None)
+        if self._new.pop(key, None) is None:
+            self._deleted[key] = mapping
+
+    def _drop(self, mapping):
+        key = mapping_key(mapping)
+        self._by_key.pop(key, None)
+        self._by_busy.pop((mapping.target_calendar, mapping.busy_event_id), None)
+        self._by_source.get(mapping.source_calendar, {}).pop(key, None)
+
+    def _insert(self, mapping):
+        key = mapping_key(mapping)
+        self._by_key[key] = mapping
+        self._by_busy[(mapping.target_calendar, mapping.busy_event_id)] = mapping
+        self._by_source.setdefault(mapping.source_calendar, {})[key] = mapping
+
+    # -- persistence --------------------------------------------------------
+    def flush(self):
+        """Write pending changes back, one transaction per source calendar.
+
+        Each source's inserts, updates and deletes go out as bulk Core
+        statements inside a savepoint. If that fails, the savepoint is rolled
+        back and the source's rows are replayed one savepoint each, so only
+        the rows that actually fail are lost.
+
+        Returns ``(conflicts, failed)``: the new mappings that collided with
+        a row already in the database (one our load did not see), which the
+        caller reconciles, and the ids of the source calendars some of whose
+        changes could not be written (their sync cursors must not advance).
+        """
+        by_source = {}
+        for kind, pending in (('delete', self._deleted), ('update', self._dirty), ('insert', self._new)):
+            for key, item in pending.items():
+                by_source.setdefault(key[0], {'delete': [], 'update': [], 'insert': []})[kind].append(
+                    self._row(kind, key, item)
+                )
+        self._new, self._dirty, self._deleted = {}, {}, {}
+
+        conflicts, failed = [], set()
+        for source_calendar, rows in by_source.items():
+            try:
+                with self.session.begin_nested():
+                    for kind in ('delete', 'update', 'insert'):
+                        if rows[kind]:
+                            self.session.execute(_STATEMENTS[kind], rows[kind])
+            except SQLAlchemyError:
+                logger.warning(
+                    f"Bulk mapping flush for {source_calendar} failed; retrying row by row", exc_info=True
+                )
+                row_conflicts, complete = self._flush_rows(rows)
+                conflicts.extend(row_conflicts)
+                if not complete:
+                    failed.add(source_calendar)
+            try:
+                self.session.commit()
+            except SQLAlchemyError:
+                self.session.rollback()
+                logger.exception(f"Failed to commit mapping changes for {source_calendar}")
+                failed.add(source_calendar)
+        return conflicts, failed
+
+    def _flush_rows(self, rows):
+        """Write *rows* one savepoint each; return (conflicts, whether every other row landed)."""
+        conflicts, complete = [], True
+        for kind in ('delete', 'update', 'insert'):
+            for row in rows[kind]:
+                try:
+                    with self.session.begin_nested():
+                        self.session.execute(_STATEMENTS[kind], [row])
+                except IntegrityError:
+                    if kind != 'insert':
+                        logger.exception(f"Failed to {kind} mapping {row}")
+                        complete = False
+                        continue
+                    mapping = self._by_key.get(_key(row))
+                    if mapping is not None:
+                        self._drop(mapping)
+                    conflicts.append(EventMapping(**row))
+                except SQLAlchemyError:
+                    logger.exception(f"Failed to {kind} mapping {row}")
+                    complete = False
+        return conflicts, complete
+
+    @staticmethod
+    def _row(kind, key, item):
+        if kind == 'delete':
+            return {f'b_{name}': value for name, value in _pk(key).items()}
+        if kind == 'update':
+            return {**{f'b_{name}': value for name, value in _pk(key).items()}, **item}
+        return {column.name: getattr(item, column.name) for column in _TABLE.columns}
+
+
+def _key(row):
+    return (row['source_calendar'], row['source_event_id'], row['target_calendar'])
+
+
+_TABLE = EventMapping.__table__
+
+
+def _pk_clause():
+    return and_(*(
+        _TABLE.c[name] == bindparam(f'b_{name}')
+        for name in ('source_calendar', 'source_event_id', 'target_calendar')
+    ))
+
+
+_STATEMENTS = {
+    'insert': insert(_TABLE),
+    'update': update(_TABLE).where(_pk_clause()).values(
+        busy_event_id=bindparam('busy_event_id'),
+        start_time=bindparam('start_time'),
+        end_time=bindparam('end_time'),
+        last_synced_time=bindparam('last_synced_time'),
+    ),
+    'delete': delete(_TABLE).where(_pk_clause()),
+}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Text
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -13,3 +13,17 @@ class EventMapping(Base):
     last_synced_time = Column(DateTime)
     start_time = Column(String, nullable=False)
     end_time = Column(String, nullable=False)
+
+
+class SyncState(Base):
+    """Incremental-sync cursor of one source calendar (e.g. a Google syncToken).
+
+    ``window_end`` is the end of the time window the cursor's full sync
+    covered; once the sync window slides past it a full resync is due.
+    """
+    __tablename__ = 'sync_states'
+
+    calendar_id = Column(String, primary_key=True)
+    sync_token = Column(Text, nullable=False)
+    window_end = Column(String, nullable=False)
+    updated_time = Column(DateTime)
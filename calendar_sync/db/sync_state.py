@@ -0,0 +1,41 @@
+"""Load and store the incremental-sync cursors kept in ``sync_states``."""
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from calendar_sync.db.models import SyncState
+
+logger = logging.getLogger(__name__)
+
+
+def load_sync_states(session):
+    """Return ``{calendar_id: SyncState}`` for every stored cursor (detached)."""
+    states = {s.calendar_id: s for s in session.execute(select(SyncState)).scalars()}
+    session.expunge_all()
+    session.commit()
+    return states
+
+
+def save_sync_state(session, calendar_id, sync_token, window_end):
+    try:
+        session.merge(SyncState(
+            calendar_id=calendar_id,
+            sync_token=sync_token,
+            window_end=window_end,
+            updated_time=datetime.now(timezone.utc),
+        ))
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        logger.exception(f"Failed to store sync state for {calendar_id}")
+
+
+def clear_sync_state(session, calendar_id):
+    try:
+        session.execute(delete(SyncState).where(SyncState.calendar_id == calendar_id))
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+        logger.exception(f"Failed to clear sync state for {calendar_id}")
@@ -0,0 +1,229 @@
+"""Decide the busy-event writes a sync run needs, without doing any I/O.
+
+``plan_sync`` takes the fetched deltas and the mapping index as they stood at
+the start of the run and returns a ``Plan`` of ``WriteOp``s. Nothing here calls
+a calendar API or the database (the index is in memory), so a plan can be
+printed (``--dry-run``), benchmarked, or handed to ``sync.execute_plan``.
+"""
+import collections
+import logging
+
+from opentelemetry import trace
+
+from calendar_sync.calendars.base import as_event
+from calendar_sync.db.index import mapping_key
+from calendar_sync.utils.time import to_epoch
+from calendar_sync.writes import CREATE, DELETE, DELETE_MAIN, DELETE_ORPHAN, UPDATE, WriteOp
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer("calendar-sync")
+
+MANAGED_MARKER = "Managed-by: calendar-sync"
+
+# Execution order of op kinds. Deletes go first: a failed create skips the
+# rest of its target's queue, and cleanup should not be stranded behind it.
+KIND_ORDER = (DELETE_MAIN, DELETE_ORPHAN, DELETE, UPDATE, CREATE)
+
+
+class Plan:
+    """The write ops of one sync run, in the order they were decided."""
+
+    def __init__(self):
+        self.ops = []
+        # (mapping, start, end) of mappings whose event kept its times but now
+        # comes in another format; see store_reformatted.
+        self.reformatted = []
+
+    def add(self, op):
+        self.ops.append(op)
+        return op
+
+    def __iter__(self):
+        return iter(self.ops)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def by_kind(self, kind):
+        return [op for op in self.ops if op.kind == kind]
+
+    def ordered(self):
+        """Ops sorted by ``KIND_ORDER``; decision order is kept within a kind."""
+        rank = {kind: i for i, kind in enumerate(KIND_ORDER)}
+        return sorted(self.ops, key=lambda op: rank[op.kind])
+
+    def summary(self):
+        counts = collections.Counter(op.kind for op in self.ops)
+        return {kind: counts[kind] for kind in KIND_ORDER if counts[kind]}
+
+    def store_reformatted(self, index):
+        """Record the new time strings of reformatted mappings in *index*.
+
+        No busy event changes; this only lets later runs match the mapping
+        by string again instead of re-parsing it every time.
+        """
+        for mapping, start, end in self.reformatted:
+            if index.get(*mapping_key(mapping)) is mapping:
+                index.update(mapping, mapping.busy_event_id, start, end)
+
+    def describe(self):
+        """One human-readable line per op, in execution order."""
+        lines = []
+        for op in self.ordered():
+            line = f"{op.kind:<14} {op.target.id}"
+            if op.key is not None:
+                line += f" source={op.key[0]} event={op.source_event_id}"
+            if op.busy_event_id is not None:
+                line += f" busy={op.busy_event_id}"
+            if op.start is not None:
+                line += f" {op.start} → {op.end}"
+            lines.append(line)
+        return lines
+
+
+def plan_busy_event(event, source, index, plan):
+    if event.summary.lower().strip() != "busy":
+        return False
+    if source.onlysource:
+        return True
+    logger.info(f"Busy event: {event.id} {event.start} - {event.end}")
+
+    # When a dedicated busy calendar is configured, our managed Busy events must
+    # not stay on the main calendar. Remove ours from the main calendar and drop
+    # the mapping so it gets recreated on the busy calendar on a later pass.
+    if source.busy_calendar_id:
+        if MANAGED_MARKER in event.description:
+            logger.info(f"Removing busy event {event.id} from main calendar {source.id} (busy calendar configured)")
+            plan.add(WriteOp(DELETE_MAIN, source, busy_event_id=event.id))
+        return True
+
+    mapping = index.get_busy(source.id, event.id)
+    if not mapping:
+        logger.info(f"Deleting orphan busy event {event.id} in {source.id}")
+        plan.add(WriteOp(DELETE_ORPHAN, source, busy_event_id=event.id))
+    return True
+
+
+def moved(mapping, event):
+    """Whether *event* no longer covers the time stored in *mapping*.
+
+    Compared as UTC instants: the same time in another offset or format
+    (``Z`` vs ``+00:00``, another zone) is not a move.
+    """
+    if mapping.start_time == event.start and mapping.end_time == event.end:
+        return False
+    return (to_epoch(mapping.start_time), to_epoch(mapping.end_time)) != (event.start_ts, event.end_ts)
+
+
+def plan_event_for_target(event, source, target, index, plan):
+    start, end = event.start, event.end
+    logger.info(
+        f"Processing event {event.id}: {start} → {end} | {event.summary[:30]} for target {target.id}"
+    )
+    key = (source.id, event.id, target.id)
+    mapping = index.get(*key)
+    if mapping is None:
+        logger.info(f"Creating busy event in {target.id} for source event {event.id}")
+        plan.add(WriteOp(CREATE, target, key, start=start, end=end))
+    elif moved(mapping, event):
+        logger.info(f"Event {event.id} changed, updating busy event {mapping.busy_event_id} in {target.id}")
+        plan.add(WriteOp(UPDATE, target, key, busy_event_id=mapping.busy_event_id, start=start, end=end))
+    elif mapping.start_time != start or mapping.end_time != end:
+        logger.debug(f"Busy event already exists for {event.id} in {target.id}; times reformatted")
+        plan.reformatted.append((mapping, start, end))
+    else:
+        logger.debug(f"Busy event already exists for {event.id} in {target.id}")
+
+
+def plan_orphans(source, calendars, index, existing_ids, plan, failed_calendars):
+    if source.onlysource:
+        return
+    orphans = [m for m in index.for_source(source.id) if m.source_event_id not in existing_ids]
+    plan_mapped_deletes(source, orphans, calendars, plan, failed_calendars)
+
+
+def plan_removed(source, calendars, index, removed_ids, plan, failed_calendars):
+    """Incremental counterpart of plan_orphans: only *removed_ids* are gone.
+
+    An id may name a whole recurring series, in which case every instance
+    mapped from it goes too.
+    """
+    removed = set(removed_ids)
+    if source.onlysource or not removed:
+        return
+    orphans = [
+        m for m in index.for_source(source.id)
+        if m.source_event_id in removed or source.series_id(m.source_event_id) in removed
+    ]
+    plan_mapped_deletes(source, orphans, calendars, plan, failed_calendars)
+
+
+def plan_mapped_deletes(source, mappings, calendars, plan, failed_calendars):
+    by_id = {c.id: c for c in calendars}
+    for mapping in mappings:
+        logger.info(f"Deleting orphan busy event {mapping.busy_event_id} from {source.id}")
+        target_cal = by_id.get(mapping.target_calendar)
+        if target_cal is None:
+            logger.error(
+                f"Failed to delete orphan busy event {mapping.busy_event_id} in {source.id}: "
+                f"target calendar {mapping.target_calendar} is not loaded"
+            )
+            continue
+        if target_cal.id in failed_calendars:
+            continue  # keep the mapping; retried on the next run
+        plan.add(WriteOp(
+            DELETE, target_cal, mapping_key(mapping), busy_event_id=mapping.busy_event_id,
+        ))
+
+
+def plan_source(source, delta, calendars, index, plan, failed_calendars):
+    ids = set()
+    for event in map(as_event, delta.events):
+        ids.add(event.id)
+        with tracer.start_as_current_span(
+            "sync.process_event",
+            attributes={
+                "source_calendar": source.id,
+                "event_id": event.id,
+                "event_summary": event.summary[:80],
+            },
+        ):
+            if not event.summary:
+                logger.info(f"Skipping event: {event.id} {event.start} - {event.end} due to missing summary")
+                continue
+            if plan_busy_event(event, source, index, plan):
+                continue
+            if event.all_day:
+                logger.info(f"Skipping all-day event: {event.id} {event.start} - {event.end}")
+                continue
+            for target in calendars:
+                if target == source or target.onlysource or target.id in failed_calendars:
+                    continue
+                plan_event_for_target(event, source, target, index, plan)
+
+    with tracer.start_as_current_span(
+        "sync.cleanup_orphans",
+        attributes={"source_calendar": source.id, "full": delta.full},
+    ):
+        if delta.full:
+            plan_orphans(source, calendars, index, ids, plan, failed_calendars)
+        else:
+            plan_removed(source, calendars, index, delta.removed, plan, failed_calendars)
+
+
+def plan_sync(calendars, fetched, index, failed_calendars):
+    """Plan the writes for every fetched source.
+
+    Every decision is made against the mappings as they stood at the start of
+    the run; nothing in *index* is modified.
+    """
+    plan = Plan()
+    for source in calendars:
+        if source.id not in fetched:
+            continue
+        with tracer.start_as_current_span(
+            "sync.process_source",
+            attributes={"source_calendar": source.id},
+        ):
+            plan_source(source, fetched[source.id], calendars, index, plan, failed_calendars)
+    return plan
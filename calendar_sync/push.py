@@ -0,0 +1,161 @@
+"""Push notifications: a small HTTP receiver plus subscription upkeep.
+
+Google (``events.watch``) and Microsoft Graph (change-notification
+subscriptions) are asked to POST to ``<public_url>/<type>/<calendar id>``.
+The receiver checks the shared secret each notification carries (Google's
+channel token, Graph's ``clientState``) and reports the calendar id to a
+callback; the daemon debounces those into targeted sync cycles. Nothing is
+parsed beyond that: the sync cycle fetches the changes itself.
+
+Synthetic notifications for local testing::
+
+    curl -X POST -H "X-Goog-Channel-Token: $SECRET" -H "X-Goog-Resource-State: exists" \\
+        http://localhost:8080/google/you@gmail.com
+    curl -X POST -d '{"value": [{"clientState": "'$SECRET'"}]}' \\
+        http://localhost:8080/outlook/you@yourcompany.com
+"""
+import hmac
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LISTEN = "0.0.0.0:8080"
+DEFAULT_DEBOUNCE = 10
+DEFAULT_POLL_INTERVAL = 1800
+# Renew a subscription once it has less than this long to live.
+DEFAULT_RENEW_MARGIN = 6 * 3600
+MAX_BODY = 1 << 20
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "calendar-sync"
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        kind, _, calendar_id = parts.path.strip("/").partition("/")
+        calendar_id = unquote(calendar_id)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(min(length, MAX_BODY)) if length else b""
+        if not calendar_id:
+            return self._reply(404)
+        if kind == "google":
+            return self._google(calendar_id)
+        if kind == "outlook":
+            return self._graph(calendar_id, parse_qs(parts.query), body)
+        return self._reply(404)
+
+    def _google(self, calendar_id):
+        if not self.server.verify(self.headers.get("X-Goog-Channel-Token")):
+            return self._reply(403)
+        # "sync" only confirms a new channel; "exists"/"not_exists" mean a change.
+        if self.headers.get("X-Goog-Resource-State") != "sync":
+            self.server.notify(calendar_id)
+        self._reply(200)
+
+    def _graph(self, calendar_id, query, body):
+        if "validationToken" in query:
+            # Subscription handshake: echo the token back as plain text.
+            return self._reply(200, query["validationToken"][0].encode(), "text/plain")
+        try:
+            notifications = json.loads(body or b"{}").get("value", [])
+        except (ValueError, AttributeError):
+            return self._reply(400)
+        if not any(self.server.verify(n.get("clientState")) for n in notifications if isinstance(n, dict)):
+            return self._reply(403)
+        self.server.notify(calendar_id)
+        self._reply(202)
+
+    def _reply(self, status, body=b"", content_type=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"push {self.address_string()} {format % args}")
+
+
+class PushReceiver(ThreadingHTTPServer):
+    """HTTP server that turns verified notifications into ``on_change(calendar_id)``."""
+
+    daemon_threads = True
+
+    def __init__(self, listen, secret, on_change):
+        host, _, port = listen.rpartition(":")
+        super().__init__((host or "0.0.0.0", int(port)), _Handler)
+        self.secret = secret
+        self.on_change = on_change
+        self._thread = None
+
+    def verify(self, value):
+        return bool(value) and hmac.compare_digest(str(value), self.secret)
+
+    def notify(self, calendar_id):
+        logger.info(f"Change notification for {calendar_id}")
+        self.on_change(calendar_id)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="push-receiver", daemon=True)
+        self._thread.start()
+        logger.info(f"Listening for push notifications on {self.server_address[0]}:{self.server_address[1]}")
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class Subscriptions:
+    """Keeps one push subscription per calendar that supports push.
+
+    Subscriptions live in memory only: a restarted daemon opens new ones and
+    the old ones lapse on their own (Google channels in a week, Graph
+    subscriptions within three days).
+    """
+
+    def __init__(self, public_url, secret, renew_margin=DEFAULT_RENEW_MARGIN):
+        self.public_url = public_url.rstrip("/")
+        self.secret = secret
+        self.renew_margin = renew_margin
+        self.active = {}
+
+    def address(self, calendar):
+        return f"{self.public_url}/{calendar.type}/{quote(calendar.id, safe='')}"
+
+    def refresh(self, calendars):
+        """Subscribe calendars that have no subscription; renew those about to expire.
+
+        Failures are logged and retried on the next call; polling covers
+        the calendar meanwhile.
+        """
+        now = time.time()
+        for calendar in calendars:
+            if not calendar.supports_push:
+                continue
+            current = self.active.get(calendar.id)
+            if current is not None and current["expires"] - now > self.renew_margin:
+                continue
+            try:
+                if current is None:
+                    self.active[calendar.id] = calendar.subscribe(self.address(calendar), self.secret)
+                else:
+                    self.active[calendar.id] = calendar.renew_subscription(
+                        current, self.address(calendar), self.secret
+                    )
+            except Exception:
+                logger.exception(f"Failed to set up push notifications for {calendar.id}")
+
+    def close(self, calendars):
+        by_id = {c.id: c for c in calendars}
+        for calendar_id, subscription in self.active.items():
+            try:
+                by_id[calendar_id].unsubscribe(subscription)
+            except Exception:
+                logger.warning(f"Failed to close push subscription of {calendar_id}", exc_info=True)
+        self.active = {}
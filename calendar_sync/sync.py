@@ -1,24 +1,41 @@
 import logging
+import queue
+import threading
+import time
 
-from datetime import datetime, timezone
 from calendar_sync.db.session import get_session
-from calendar_sync.db.models import EventMapping
+from calendar_sync.db.index import MappingIndex, mapping_key
+from calendar_sync.db.sync_state import clear_sync_state, load_sync_states, save_sync_state
 from calendar_sync.config import yaml_config
-from calendar_sync.utils.time import get_time_window
+from calendar_sync.utils.time import get_time_window, shift_time, to_epoch
 from calendar_sync.utils.env import load_env
-from calendar_sync.calendars.base import BaseCalendar
-from opentelemetry import trace
-from sqlalchemy.exc import IntegrityError
+from calendar_sync.calendars.base import BaseCalendar, as_event
+from calendar_sync.planner import plan_sync
+from calendar_sync.writes import DELETE_ORPHAN, UPDATE, WriteExecutor, WriteOp, apply_results
+from opentelemetry import context, trace
 
 
 logger = logging.getLogger(__name__)
 tracer = trace.get_tracer("calendar-sync")
 
+DEFAULT_FETCH_TIMEOUT = 120
+DEFAULT_RESYNC_HOURS = 24
 
-def load_calendars():
+# Ids of calendars with a list_changes call still running, possibly left
+# behind by a fetch that timed out in an earlier cycle.
+_fetches_in_flight = set()
+_fetches_lock = threading.Lock()
+
+
+def load_calendars(configs=None, failed=None):
+    """Initialize a calendar per config block (all of config.yaml by default).
+
+    Blocks that fail to initialize are skipped and, when *failed* is given,
+    appended to it so a long-running caller can retry them later.
+    """
     with tracer.start_as_current_span("sync.load_calendars"):
         calendars = []
-        for calendar_cfg in yaml_config.get("calendars", []):
+        for calendar_cfg in yaml_config.get("calendars", []) if configs is None else configs:
             try:
                 calendars.append(BaseCalendar.get_calendar(calendar_cfg))
             except Exception:
@@ -27,215 +44,198 @@ def load_calendars():
                 logger.exception(
                     f"Failed to initialize calendar {calendar_cfg.get('id') or calendar_cfg.get('url')}; skipping"
                 )
+                if failed is not None:
+                    failed.append(calendar_cfg)
         return calendars
 
-MANAGED_MARKER = "Managed-by: calendar-sync"
-
-
-def process_busy_event(event, source, session):
-    summary = event.get("summary", "")
-    if summary.lower().strip() != "busy":
-        return False
-    if source.onlysource:
-        return True
-    start = event.get("start")
-    end = event.get("end")
-    logger.info(f"Busy event: {event.get('id')} {start} - {end}")
-
-    # When a dedicated busy calendar is configured, our managed Busy events must
-    # not stay on the main calendar. Remove ours from the main calendar and drop
-    # the mapping so it gets recreated on the busy calendar on a later pass.
-    if source.busy_calendar_id:
-        if MANAGED_MARKER in (event.get("description") or ""):
-            logger.info(f"Removing busy event {event['id']} from main calendar {source.id} (busy calendar configured)")
-            with tracer.start_as_current_span(
-                "sync.remove_main_busy_event",
-                attributes={"target_calendar": source.id, "busy_event_id": event["id"]},
-            ):
-                try:
-                    source.delete_main_event(event["id"])
-                except Exception:
-                    logger.exception(f"Failed to remove busy event {event['id']} from main calendar {source.id}")
-            mapping = session.query(EventMapping).filter_by(
-                target_calendar=source.id,
-                busy_event_id=event["id"],
-            ).first()
-            if mapping:
-                try:
-                    session.delete(mapping)
-                    session.commit()
-                except Exception:
-                    session.rollback()
-                    logger.exception(f"Failed to drop mapping for busy event {event['id']} in {source.id}")
-        return True
-
-    mapping = session.query(EventMapping).filter_by(
-        target_calendar=source.id,
-        busy_event_id=event["id"],
-    ).first()
-    if not mapping:
-        logger.info(f"Deleting orphan busy event {event['id']} in {source.id}")
-        with tracer.start_as_current_span(
-            "sync.delete_orphan_busy_event",
-            attributes={"target_calendar": source.id, "busy_event_id": event["id"]},
-        ):
-            try:
-                source.delete_event(event["id"])
-            except Exception:
-                logger.exception(f"Failed to delete orphan busy event {event['id']} in {source.id}")
-    return True
 
-def _recreate_busy_event(mapping, event, target, session):
-    """Delete the old busy event for *mapping* and recreate it with current times."""
-    try:
-        with tracer.start_as_current_span(
-            "sync.delete_old_busy_event",
-            attributes={"target_calendar": target.id, "busy_event_id": mapping.busy_event_id},
+def duplicate_busy_events(conflicts, calendars, index):
+    """Ops that reconcile busy events whose mapping lost the insert race.
+
+    A mapping for the same (source, event, target) was already stored by a run
+    our index did not see. That row wins: the duplicate busy event we created
+    is deleted, and if the row holds other times its busy event is moved to
+    ours. An incremental source would not report the event again before its
+    next full resync, so this cannot be left to a later run. The stored row is
+    read back into *index* for ``apply_results`` to update.
+    """
+    by_id = {c.id: c for c in calendars}
+    ops = []
+    for mapping in conflicts:
+        logger.warning(
+            f"Mapping already exists for {mapping.source_event_id} in {mapping.target_calendar}; "
+            f"removing duplicate busy event {mapping.busy_event_id}"
+        )
+        target = by_id.get(mapping.target_calendar)
+        if target is None:
+            continue
+        ops.append(WriteOp(DELETE_ORPHAN, target, busy_event_id=mapping.busy_event_id))
+        key = mapping_key(mapping)
+        existing = index.reload(key)
+        if existing is None:
+            continue
+        if (to_epoch(existing.start_time), to_epoch(existing.end_time)) != (
+            to_epoch(mapping.start_time), to_epoch(mapping.end_time)
         ):
-            target.delete_event(mapping.busy_event_id)
-    except Exception:
-        logger.exception("Failed to delete old busy event before update")
-    with tracer.start_as_current_span(
-        "sync.update_busy_event",
-        attributes={"target_calendar": target.id, "source_event_id": event["id"]},
-    ):
-        busy_event_id = target.create_busy_event(event["start"], event["end"], source_event_id=event["id"])
-    mapping.busy_event_id = busy_event_id
-    mapping.start_time = event["start"]
-    mapping.end_time = event["end"]
-    mapping.last_synced_time = datetime.now(timezone.utc)
-    session.commit()
-
-
-def process_single_event_for_target(event, source, target, session, failed_calendars):
-    start = event["start"]
-    end = event["end"]
-    logger.info(
-        f"Processing event {event['id']}: {start} → {end} | {event.get('summary','')[:30]} for target {target.id}"
-    )
-    try:
-        mapping = session.query(EventMapping).filter_by(
-            source_calendar=source.id,
-            source_event_id=event["id"],
-            target_calendar=target.id,
-        ).first()
-        if mapping is None:
-            logger.info(f"Creating busy event in {target.id} for source event {event['id']}")
-            with tracer.start_as_current_span(
-                "sync.create_busy_event",
-                attributes={"target_calendar": target.id, "source_event_id": event["id"]},
-            ):
-                busy_event_id = target.create_busy_event(start, end, source_event_id=event["id"])
-            session.add(EventMapping(
-                source_calendar=source.id,
-                source_event_id=event["id"],
-                target_calendar=target.id,
-                busy_event_id=busy_event_id,
-                last_synced_time=datetime.now(timezone.utc),
-                start_time=start,
-                end_time=end,
+            logger.info(f"Moving existing busy event {existing.busy_event_id} in {target.id} to the current times")
+            ops.append(WriteOp(
+                UPDATE, target, key, busy_event_id=existing.busy_event_id, start=mapping.start_time, end=mapping.end_time,
             ))
-            try:
-                session.commit()
-            except IntegrityError:
-                # A mapping for this (source, event, target) already exists that our
-                # read did not return. Don't fail the whole calendar: drop the
-                # duplicate busy event we just created and reconcile against the
-                # existing mapping instead.
-                session.rollback()
-                logger.warning(
-                    f"Mapping already exists for {event['id']} in {target.id}; reconciling existing busy event"
-                )
-                try:
-                    target.delete_event(busy_event_id)
-                except Exception:
-                    logger.exception(f"Failed to remove duplicate busy event {busy_event_id} in {target.id}")
-                existing = session.query(EventMapping).filter_by(
-                    source_calendar=source.id,
-                    source_event_id=event["id"],
-                    target_calendar=target.id,
-                ).first()
-                if existing is not None and (existing.start_time != start or existing.end_time != end):
-                    _recreate_busy_event(existing, event, target, session)
-        elif mapping.start_time != start or mapping.end_time != end:
-            logger.info(f"Event {event['id']} changed, deleting old busy and recreating")
-            _recreate_busy_event(mapping, event, target, session)
-        else:
-            logger.debug(f"Busy event already exists for {event['id']} in {target.id}")
-    except Exception:
-        session.rollback()
-        logger.exception(f"Failed to create busy event in {target.id}")
-        failed_calendars.add(target.id)
-
-def cleanup_orphans(source, calendars, session, existing_ids):
-    stored = session.query(EventMapping).filter_by(source_calendar=source.id).all()
-    for mapping in stored:
-        if mapping.source_event_id in existing_ids or source.onlysource:
-            continue
-        logger.info(f"Deleting orphan busy event {mapping.busy_event_id} from {source.id}")
-        try:
-            target_cal = next(c for c in calendars if c.id == mapping.target_calendar)
-            with tracer.start_as_current_span(
-                "sync.delete_orphan_busy_event",
-                attributes={"target_calendar": target_cal.id, "busy_event_id": mapping.busy_event_id},
-            ):
-                target_cal.delete_event(mapping.busy_event_id)
-            session.delete(mapping)
-            session.commit()
-        except Exception:
-            session.rollback()
-            logger.exception(f"Failed to delete orphan busy event {mapping.busy_event_id} in {source.id}")
-
-def process_source(source, calendars, session, time_min, time_max, failed_calendars):
-    with tracer.start_as_current_span(
-        "sync.fetch_events",
-        attributes={"source_calendar": source.id, "time_min": time_min, "time_max": time_max},
-    ):
-        logger.info(f"Fetching events from calendar: {source.id}")
-        try:
-            events = source.list_events(time_min, time_max)
-            logger.info(f"Fetched {len(events)} events from {source.id}")
-        except Exception:
-            logger.exception(f"Failed to fetch events from {source.id}")
-            return
+    return ops
 
-    ids = set()
-    for event in events:
-        event_id = event.get("id")
-        ids.add(event_id)
+
+def execute_plan(plan, writer, index, failed_calendars):
+    """Perform *plan* with *writer* and record the results into *index*."""
+    with tracer.start_as_current_span("sync.execute_writes", attributes={"write_ops": len(plan)}):
+        for op in plan.ordered():
+            writer.submit(op)
+        ops = writer.run()
+        for op in apply_results(ops, index, failed_calendars):
+            writer.submit(op)
+        writer.run()
+        plan.store_reformatted(index)
+
+
+def _fetch_one(source, time_min, time_max, sync_token, parent_context, results):
+    token = context.attach(parent_context)
+    try:
         with tracer.start_as_current_span(
-            "sync.process_event",
+            "sync.fetch_events",
             attributes={
                 "source_calendar": source.id,
-                "event_id": event_id,
-                "event_summary": event.get("summary", "")[:80],
+                "time_min": time_min,
+                "time_max": time_max,
+                "incremental": sync_token is not None,
             },
         ):
-            summary = event.get("summary", "")
-            if not summary:
-                logger.info(
-                    f"Skipping event: {event_id} {event.get('start')} - {event.get('end')} due to missing summary"
-                )
-                continue
-            if process_busy_event(event, source, session):
-                continue
-            if "T" not in event.get("start", "") or "T" not in event.get("end", ""):
-                logger.info(
-                    f"Skipping all-day event: {event_id} {event.get('start')} - {event.get('end')}"
-                )
-                continue
-            for target in calendars:
-                if target == source or target.onlysource or target.id in failed_calendars:
-                    continue
-                process_single_event_for_target(event, source, target, session, failed_calendars)
-
-    with tracer.start_as_current_span(
-        "sync.cleanup_orphans",
-        attributes={"source_calendar": source.id},
-    ):
-        cleanup_orphans(source, calendars, session, ids)
-
-def main():
+            logger.info(f"Fetching events from calendar: {source.id}")
+            try:
+                delta = source.list_changes(time_min, time_max, sync_token)
+                # Normalize to Event records here, in parallel across sources.
+                delta = delta._replace(events=[as_event(event) for event in delta.events])
+                logger.info(f"Fetched {len(delta.events)} events from {source.id}")
+                results.put((source.id, delta, None))
+            except Exception as exc:
+                logger.exception(f"Failed to fetch events from {source.id}")
+                results.put((source.id, None, exc))
+    finally:
+        with _fetches_lock:
+            _fetches_in_flight.discard(source.id)
+        context.detach(token)
+
+
+def fetch_all_events(calendars, time_min, time_max, failed_calendars, cursors=None):
+    """Call list_changes on every calendar in parallel, before any writes.
+
+    *cursors* maps a calendar id to ``(sync_token, window_end)`` for sources
+    synced incrementally; *window_end* replaces *time_max* for that calendar.
+    Returns ``{calendar id: EventDelta}`` for the calendars that answered in
+    time. A calendar that raises is left out (it is still written to as a
+    target); one that exceeds its timeout (``fetch_timeout_seconds``, per
+    calendar or global) is added to *failed_calendars* and not touched again
+    this run. Workers are daemon threads so a hung server cannot keep the
+    process alive; a calendar whose fetch from an earlier run has still not
+    returned is not fetched again but added to *failed_calendars*.
+    """
+    cursors = cursors or {}
+    default_timeout = yaml_config.get("fetch_timeout_seconds", DEFAULT_FETCH_TIMEOUT)
+    results = queue.Queue()
+    parent_context = context.get_current()
+    started = time.monotonic()
+    deadlines = {}
+    for source in calendars:
+        with _fetches_lock:
+            busy = source.id in _fetches_in_flight
+            _fetches_in_flight.add(source.id)
+        if busy:
+            logger.error(f"Previous fetch from {source.id} has not returned; skipping it this run")
+            failed_calendars.add(source.id)
+            continue
+        sync_token, window_end = cursors.get(source.id, (None, time_max))
+        deadlines[source.id] = started + (source.fetch_timeout or default_timeout)
+        threading.Thread(
+            target=_fetch_one,
+            args=(source, time_min, window_end, sync_token, parent_context, results),
+            name=f"fetch-{source.id}",
+            daemon=True,
+        ).start()
+
+    fetched = {}
+    pending = set(deadlines)
+    while pending:
+        remaining = min(deadlines[cal_id] for cal_id in pending) - time.monotonic()
+        try:
+            cal_id, delta, exc = results.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            now = time.monotonic()
+            for cal_id in [c for c in pending if deadlines[c] <= now]:
+                logger.error(f"Timed out fetching events from {cal_id}; marking it failed for this run")
+                pending.discard(cal_id)
+                failed_calendars.add(cal_id)
+            continue
+        if cal_id not in pending:
+            continue  # answered after its deadline
+        pending.discard(cal_id)
+        if exc is None:
+            fetched[cal_id] = delta
+    return fetched
+
+
+def sync_cursors(calendars, states, time_max):
+    """Pick the fetch cursor and window end of each incremental source.
+
+    A stored token is used while its full sync's window still covers
+    *time_max*. Otherwise the source gets a full sync over a window widened by
+    ``incremental_resync_hours`` so its next token stays usable that long.
+    """
+    horizon = yaml_config.get("incremental_resync_hours", DEFAULT_RESYNC_HOURS)
+    cursors = {}
+    for source in calendars:
+        if not source.incremental:
+            continue
+        state = states.get(source.id)
+        if state is not None and state.window_end >= time_max:
+            cursors[source.id] = (state.sync_token, state.window_end)
+        else:
+            cursors[source.id] = (None, shift_time(time_max, horizon))
+    return cursors
+
+
+def store_sync_tokens(session, calendars, fetched, cursors, failed_calendars, unsaved_sources=()):
+    """Advance the cursor of each incremental source whose changes all landed.
+
+    If any of a source's targets failed this run, or its mappings could not
+    all be stored (*unsaved_sources*), the old cursor is kept, so the same
+    changes are replayed next run (replaying is idempotent).
+    """
+    for source in calendars:
+        delta = fetched.get(source.id)
+        if source.id not in cursors or delta is None or not delta.sync_token:
+            continue
+        if source.id in unsaved_sources:
+            logger.warning(f"Not advancing sync token for {source.id}: its mappings were not all stored")
+            continue
+        targets = {c.id for c in calendars if c is not source and not c.onlysource}
+        if targets & failed_calendars:
+            logger.warning(f"Not advancing sync token for {source.id}: a target failed this run")
+            continue
+        save_sync_state(session, source.id, delta.sync_token, cursors[source.id][1])
+
+
+def drop_removed_sync_states(session, calendars, states):
+    """Delete the stored cursors of calendars that are not among *calendars*.
+
+    Keeps ``sync_states`` from growing as blocks are removed from the
+    config. A block that merely failed to initialize loses its cursor too,
+    which only costs it a full sync once it is back.
+    """
+    for calendar_id in states.keys() - {c.id for c in calendars}:
+        logger.info(f"Dropping sync state of {calendar_id}: no such calendar configured")
+        clear_sync_state(session, calendar_id)
+
+
+def main(dry_run=False):
+    """Run one sync pass. With *dry_run*, print the planned writes and stop."""
     with tracer.start_as_current_span("calendar-sync.run"):
         load_env()
         logger.info("Starting calendar sync service...")
@@ -247,21 +247,76 @@ def main():
             logger.error("No calendars configured. Exiting.")
             return
 
-        time_min, time_max = get_time_window(days=yaml_config.get("sync_window_days", 3))
-        logger.info(f"Sync window: {time_min} to {time_max}")
+        sync_cycle(session, calendars, dry_run=dry_run)
 
-        failed_calendars = set()
 
-        for source in calendars:
-            with tracer.start_as_current_span(
-                "sync.process_source",
-                attributes={"source_calendar": source.id},
-            ):
-                process_source(source, calendars, session, time_min, time_max, failed_calendars)
+def sync_cycle(session, calendars, dry_run=False, sources=None):
+    """One sync pass over already-initialized *calendars*.
 
-        if failed_calendars:
-            logger.error(
-                f"Failed to create busy events for calendars: {', '.join(failed_calendars)}"
-            )
-        else:
-            logger.info("Calendar sync completed successfully.")
+    Calendars (and the HTTP sessions, tokens and caches they hold) are left
+    as they are, so the daemon can call this again on the next cycle. With
+    *sources* (calendar ids), only those calendars are fetched and their
+    events propagated; every calendar is still a target.
+    Returns the ids of the calendars that failed this pass.
+    """
+    try:
+        return _sync_cycle(session, calendars, dry_run, sources)
+    finally:
+        for calendar in calendars:
+            try:
+                calendar.end_cycle()
+            except Exception:
+                logger.exception(f"Failed to save state of {calendar.id}")
+
+
+def _sync_cycle(session, calendars, dry_run, sources):
+    time_min, time_max = get_time_window(days=yaml_config.get("sync_window_days", 3))
+    logger.info(f"Sync window: {time_min} to {time_max}")
+
+    failed_calendars = set()
+    fetch_from = calendars if sources is None else [c for c in calendars if c.id in sources]
+
+    with tracer.start_as_current_span("sync.load_mappings"):
+        index = MappingIndex.load(session)
+        logger.info(f"Loaded {len(index)} event mappings")
+        states = load_sync_states(session)
+        cursors = sync_cursors(fetch_from, states, time_max)
+        if sources is None and not dry_run:
+            drop_removed_sync_states(session, calendars, states)
+
+    with tracer.start_as_current_span("sync.fetch_all_events"):
+        fetched = fetch_all_events(fetch_from, time_min, time_max, failed_calendars, cursors)
+
+    # Decide every write first, against the mappings as they stood at the
+    # start of the run, then perform them all concurrently.
+    with tracer.start_as_current_span("sync.plan"):
+        plan = plan_sync(calendars, fetched, index, failed_calendars)
+    logger.info(f"Planned {len(plan)} writes: {plan.summary()}")
+
+    if dry_run:
+        for line in plan.describe():
+            print(line)
+        print(f"{len(plan)} writes planned (dry run; nothing was changed)")
+        return failed_calendars
+
+    writer = WriteExecutor.from_config(yaml_config)
+    execute_plan(plan, writer, index, failed_calendars)
+
+    with tracer.start_as_current_span("sync.flush_mappings"):
+        conflicts, unsaved = index.flush()
+        if conflicts:
+            for op in duplicate_busy_events(conflicts, calendars, index):
+                writer.submit(op)
+            for op in apply_results(writer.run(), index, failed_calendars):
+                writer.submit(op)
+            writer.run()
+            unsaved |= index.flush()[1]
+        store_sync_tokens(session, calendars, fetched, cursors, failed_calendars, unsaved)
+
+    if failed_calendars:
+        logger.error(
+            f"Failed to sync calendars: {', '.join(sorted(failed_calendars))}"
+        )
+    else:
+        logger.info("Calendar sync completed successfully.")
+    return failed_calendars
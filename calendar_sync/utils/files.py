@@ -0,0 +1,46 @@
+"""On-disk state kept beside the database (caches backends reuse across runs)."""
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def cache_path(name):
+    """Path of cache file *name*: under $CACHE_DIR, else ``cache/`` next to the DB."""
+    root = os.getenv('CACHE_DIR') or os.path.join(
+        os.path.dirname(os.getenv('DB_PATH', '/data/calendar_sync.db')), 'cache'
+    )
+    return os.path.join(root, name)
+
+
+def read_json(path):
+    """Load a JSON file, or return None if it is missing or unreadable."""
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning(f"Ignoring unreadable cache file {path}", exc_info=True)
+        return None
+
+
+def write_json(path, data):
+    """Write *data* as JSON via a temp file + rename, so readers never see half a file."""
+    write_text(path, json.dumps(data))
+
+
+def write_text(path, text):
+    """Write *text* via a temp file + rename, so readers never see half a file."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
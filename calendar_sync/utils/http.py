@@ -0,0 +1,103 @@
+"""Shared HTTP transport for the requests-based backends (Graph, CalDAV).
+
+``session_for(url)`` returns one pooled ``requests.Session`` per host, so
+calls to the same server reuse keep-alive connections instead of paying a
+TLS handshake each. ``configure_session`` applies the same policy to a
+session a client library created (caldav's DAVClient):
+
+- a bounded connection pool per host, sized for every caller sharing it;
+- gzip/deflate responses;
+- bounded retries, honouring Retry-After: connection failures (nothing
+  was sent) and 429 answers (the server refused to process the request),
+  for every method including POST; 503 answers only for idempotent
+  methods, since a 503 does not prove the request was not applied and a
+  repeated Graph POST would create a second event. Read timeouts and other
+  5xx are left to the caller;
+- each response's latency recorded in the ``http.client.duration``
+  OpenTelemetry histogram (milliseconds; host, method, status).
+"""
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from opentelemetry import metrics
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = 8
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+_meter = metrics.get_meter("calendar-sync")
+_latency = _meter.create_histogram(
+    "http.client.duration", unit="ms", description="Latency of calendar API HTTP requests"
+)
+
+_sessions = {}  # host -> (session, pool size)
+_sessions_lock = threading.Lock()
+
+
+class _Retry(Retry):
+    """Retries 429 for every method, 503 only for idempotent ones."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 503 and method.upper() not in Retry.DEFAULT_ALLOWED_METHODS:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _retry():
+    return _Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,
+        status=MAX_RETRIES,
+        other=0,
+        status_forcelist=(429, 503),
+        allowed_methods=None,  # every method; 503 is narrowed in _Retry
+        backoff_factor=BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last 429/503 to the caller
+    )
+
+
+def _record_latency(response, *args, **kwargs):
+    _latency.record(
+        response.elapsed.total_seconds() * 1000,
+        {
+            "http.host": urlsplit(response.url).netloc,
+            "http.method": response.request.method,
+            "http.status_code": response.status_code,
+        },
+    )
+
+
+def configure_session(session, pool_size=DEFAULT_POOL_SIZE, block=False):
+    """Mount the pooled, retrying adapter on *session* and record its latencies.
+
+    With *block*, callers wait for a free pooled connection instead of
+    opening extra ones beyond *pool_size*.
+    """
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=block, max_retries=_retry())
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    if _record_latency not in session.hooks["response"]:
+        session.hooks["response"].append(_record_latency)
+    return session
+
+
+def session_for(url, pool_size=DEFAULT_POOL_SIZE):
+    """The process-wide session for *url*'s host.
+
+    Every call adds *pool_size* connections to the host's pool, so each
+    caller sharing the session (say, each Outlook calendar with its write
+    lanes) can keep that many alive without others' being discarded.
+    """
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        session, size = _sessions.get(host, (None, 0))
+        size += pool_size
+        session = configure_session(session or requests.Session(), size)
+        _sessions[host] = (session, size)
+        return session
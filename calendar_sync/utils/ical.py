@@ -0,0 +1,207 @@
+"""Streaming reader for the VEVENTs of iCalendar text (RFC 5545).
+
+``parse_events`` makes one pass over the unfolded content lines and keeps
+only UID, DTSTART, DTEND (or DURATION), SUMMARY and DESCRIPTION of each
+top-level VEVENT; nested components (VALARM) and every other property
+(attendees, attachments, ...) are skipped without being parsed. No object
+tree is built, so this is much cheaper than going through vobject or
+icalendar for the thousands of instances an expanded calendar returns.
+
+Text this reader does not handle raises ``Unsupported``, e.g. a TZID that
+is not in the tz database (a Windows zone name defined by the calendar's
+own VTIMEZONE); callers fall back to a full parser for that resource.
+``parse_many`` parses many resources, optionally in a process pool.
+"""
+import collections
+import datetime
+import functools
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# start/end are date / datetime objects: tz-aware for UTC and TZID values,
+# naive for floating times. *recurring* is set when the VEVENT still has
+# recurrence rules, i.e. the server did not expand it.
+VEvent = collections.namedtuple('VEvent', 'uid start end summary description recurring')
+
+RECURRENCE = frozenset(('RRULE', 'RDATE', 'EXDATE', 'EXRULE'))
+_WANTED = frozenset(('UID', 'DTSTART', 'DTEND', 'DURATION', 'SUMMARY', 'DESCRIPTION')) | RECURRENCE
+_NAME = re.compile(r'[^;:]*')
+_ESCAPE = re.compile(r'\\(.)')
+_DURATION = re.compile(r'([-+])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+# Below this many texts a process pool costs more than it saves.
+POOL_MIN_TEXTS = 200
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class Unsupported(ValueError):
+    """The text needs a full iCalendar parser."""
+
+
+def _lines(text):
+    """Yield the unfolded content lines of *text*."""
+    line = ''
+    for raw in text.split('\n'):
+        raw = raw.rstrip('\r')
+        if raw[:1] in (' ', '\t'):
+            line += raw[1:]
+            continue
+        if line:
+            yield line
+        line = raw
+    if line:
+        yield line
+
+
+def _split(line, start):
+    """Return (params, value) of a content line whose name ends at *start*."""
+    colon = line.find(':', start)
+    if '"' in line[start:colon]:
+        # A quoted parameter value may itself contain ':'.
+        quoted = False
+        for i in range(start, len(line)):
+            if line[i] == '"':
+                quoted = not quoted
+            elif line[i] == ':' and not quoted:
+                colon = i
+                break
+    if colon < 0:
+        raise ValueError(f'Malformed content line: {line[:80]!r}')
+    return line[start:colon], line[colon + 1:]
+
+
+def _params(params):
+    result = {}
+    for param in params.split(';'):
+        key, _, value = param.partition('=')
+        if key:
+            result[key.upper()] = value.strip('"')
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def _zone(tzid):
+    try:
+        return ZoneInfo(tzid)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def _datetime(params, value):
+    params = _params(params)
+    value = value.strip()
+    if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    dt = datetime.datetime(
+        int(value[:4]), int(value[4:6]), int(value[6:8]), int(value[9:11]), int(value[11:13]), int(value[13:15])
+    )
+    if value.endswith('Z'):
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    if 'TZID' in params:
+        zone = _zone(params['TZID'])
+        if zone is None:
+            raise Unsupported(f"Unknown TZID {params['TZID']!r}")
+        return dt.replace(tzinfo=zone)
+    return dt
+
+
+def _duration(value):
+    match = _DURATION.match(value.strip())
+    if match is None:
+        raise ValueError(f'Malformed DURATION: {value!r}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = datetime.timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -delta if sign == '-' else delta
+
+
+def _text(value):
+    if '\\' not in value:
+        return value
+    return _ESCAPE.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def _vevent(props):
+    if 'UID' not in props or 'DTSTART' not in props:
+        raise ValueError('VEVENT without UID or DTSTART')
+    start = _datetime(*props['DTSTART'])
+    if 'DTEND' in props:
+        end = _datetime(*props['DTEND'])
+    elif 'DURATION' in props:
+        end = start + _duration(props['DURATION'][1])
+    elif isinstance(start, datetime.datetime):
+        end = start
+    else:
+        end = start + datetime.timedelta(days=1)  # an all-day event lasts the day
+    return VEvent(
+        uid=props['UID'][1].strip(),
+        start=start,
+        end=end,
+        summary=_text(props['SUMMARY'][1]) if 'SUMMARY' in props else '',
+        description=_text(props['DESCRIPTION'][1]) if 'DESCRIPTION' in props else '',
+        recurring=not RECURRENCE.isdisjoint(props),
+    )
+
+
+def parse_events(text):
+    """Return a ``VEvent`` for each top-level VEVENT in *text*, in order.
+
+    Raises ``ValueError`` (``Unsupported`` included) on text it cannot read.
+    """
+    events = []
+    props = None  # properties of the VEVENT being read; None outside one
+    depth = 0  # components nested inside that VEVENT
+    for line in _lines(text):
+        name_end = _NAME.match(line).end()
+        name = line[:name_end].upper()
+        if name == 'BEGIN':
+            if props is not None:
+                depth += 1
+            elif _split(line, name_end)[1].strip().upper() == 'VEVENT':
+                props = {}
+        elif name == 'END':
+            if props is not None:
+                if depth:
+                    depth -= 1
+                else:
+                    events.append(_vevent(props))
+                    props = None
+        elif props is not None and not depth and name in _WANTED and name not in props:
+            props[name] = _split(line, name_end)
+    return events
+
+
+def _parse_or_error(text):
+    try:
+        return parse_events(text)
+    except ValueError as exc:
+        return exc
+
+
+def _pool(processes):
+    # spawn rather than fork: the sync runs fetches in threads.
+    with _pools_lock:
+        if processes not in _pools:
+            _pools[processes] = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+        return _pools[processes]
+
+
+def parse_many(texts, processes=0):
+    """``parse_events`` for each of *texts*, in order.
+
+    A text that cannot be read gives its ``ValueError`` in place of the
+    events, like the per-item results of the batch write calls. With
+    *processes* above 1 and at least ``POOL_MIN_TEXTS`` texts, the texts are
+    parsed in a (reused) pool of that many worker processes.
+    """
+    if processes > 1 and len(texts) >= POOL_MIN_TEXTS:
+        chunksize = max(1, len(texts) // (processes * 4))
+        return list(_pool(processes).map(_parse_or_error, texts, chunksize=chunksize))
+    return [_parse_or_error(text) for text in texts]
@@ -1,7 +1,32 @@
 import datetime
+from dateutil import parser as date_parser
 
 def get_time_window(days):
     now = datetime.datetime.now(datetime.timezone.utc)
     time_min = now.isoformat(timespec='seconds').replace('+00:00', 'Z')
     time_max = (now + datetime.timedelta(days=days)).isoformat(timespec='seconds').replace('+00:00', 'Z')
-    return time_min, time_max
\ No newline at end of file
+    return time_min, time_max
+
+def shift_time(value, hours):
+    """Shift a get_time_window()-style timestamp by *hours*, keeping its format."""
+    dt = datetime.datetime.fromisoformat(value.replace('Z', '+00:00')) + datetime.timedelta(hours=hours)
+    return dt.isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+def to_epoch(value):
+    """UTC epoch seconds of an ISO-8601 date-time string.
+
+    Values without an offset are taken as UTC. Returns None for dates
+    (all-day events) and for anything that does not parse.
+    """
+    if not value or 'T' not in value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            dt = date_parser.isoparse(value)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp())
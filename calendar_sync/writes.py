@@ -0,0 +1,291 @@
+"""Concurrent execution of busy-event writes, with per-backend caps.
+
+The sync loop decides what to do and queues a ``WriteOp`` per API call it
+needs; ``WriteExecutor.run`` then performs the queued ops concurrently and
+``apply_results`` records the outcomes into the mapping index on the calling
+thread (the SQLAlchemy session behind the index is not thread-safe).
+"""
+import collections
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from opentelemetry import context, trace
+
+from calendar_sync.calendars.base import EventNotFound
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer("calendar-sync")
+
+# Concurrent writes per target calendar, by backend type. Override any of
+# them with ``write_concurrency`` in config.yaml.
+DEFAULT_WRITE_CONCURRENCY = {
+    'google': 4,
+    'outlook': 4,
+    'exchange': 2,
+    'caldav': 2,
+}
+DEFAULT_MAX_WRITE_WORKERS = 32
+
+
+def configured_limit(cfg, calendar_type):
+    """Write lanes per *calendar_type* calendar under config *cfg*, as ``WriteExecutor`` runs them."""
+    return {**DEFAULT_WRITE_CONCURRENCY, **(cfg.get('write_concurrency') or {})}.get(calendar_type, 1)
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+DELETE_ORPHAN = 'delete_orphan'
+DELETE_MAIN = 'delete_main'
+
+
+class WriteOp:
+    """One planned write against *target*.
+
+    *key* is the (source, source_event_id, target) mapping key the op belongs
+    to; ``DELETE_ORPHAN`` and ``DELETE_MAIN`` ops address a busy event directly.
+    """
+
+    __slots__ = ('kind', 'target', 'key', 'busy_event_id', 'start', 'end', 'result', 'error', 'skipped')
+
+    def __init__(self, kind, target, key=None, busy_event_id=None, start=None, end=None):
+        self.kind = kind
+        self.target = target
+        self.key = key
+        self.busy_event_id = busy_event_id
+        self.start = start
+        self.end = end
+        self.result = None
+        self.error = None
+        self.skipped = False
+
+    @property
+    def source_event_id(self):
+        return self.key[1] if self.key else None
+
+    def __repr__(self):
+        return f"WriteOp({self.kind}, {self.target.id}, {self.source_event_id or self.busy_event_id})"
+
+
+class WriteExecutor:
+    """Queue write ops per target calendar and run them concurrently.
+
+    Each target gets as many worker lanes as its backend type allows
+    (``limits[target.type]``); lanes drain the target's queue in order. On
+    backends with a ``write_batch_size`` above 1, a lane takes a run of
+    consecutive ops of the same kind (up to that size) and performs them in
+    one batch call. Once a create fails on a target the rest of its queue is
+    skipped, matching the old behaviour of giving up on a calendar for the
+    remainder of the run.
+    """
+
+    def __init__(self, limits=None, max_workers=DEFAULT_MAX_WRITE_WORKERS):
+        self.limits = {**DEFAULT_WRITE_CONCURRENCY, **(limits or {})}
+        self.max_workers = max_workers
+        self._queues = collections.OrderedDict()
+        self._targets = {}
+
+    @classmethod
+    def from_config(cls, cfg):
+        return cls(
+            limits=cfg.get('write_concurrency'),
+            max_workers=cfg.get('max_write_workers', DEFAULT_MAX_WRITE_WORKERS),
+        )
+
+    def __len__(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def submit(self, op):
+        self._targets[op.target.id] = op.target
+        self._queues.setdefault(op.target.id, collections.deque()).append(op)
+        return op
+
+    def limit_for(self, target):
+        # A calendar's own write_concurrency (CalDAV, per server) wins over
+        # the per-type default.
+        limit = getattr(target, 'write_concurrency', None) or self.limits.get(getattr(target, 'type', None), 1)
+        # No more lanes than the server-wide cap lets through anyway.
+        server_limit = getattr(target, 'server_write_limit', None)
+        if server_limit:
+            limit = min(int(limit), server_limit)
+        return max(1, int(limit))
+
+    def run(self):
+        """Perform every queued op; return them in submission order."""
+        ops = [op for q in self._queues.values() for op in q]
+        lanes = []
+        for target_id, pending in self._queues.items():
+            target = self._targets[target_id]
+            failed = threading.Event()
+            lock = threading.Lock()
+            lanes.extend((target, pending, failed, lock) for _ in range(min(self.limit_for(target), len(pending))))
+        self._queues = collections.OrderedDict()
+        if not lanes:
+            return ops
+        parent_context = context.get_current()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(lanes)), thread_name_prefix='write') as pool:
+            for future in [pool.submit(self._drain, parent_context, *lane) for lane in lanes]:
+                future.result()
+        return ops
+
+    def _drain(self, parent_context, target, pending, failed, lock):
+        token = context.attach(parent_context)
+        try:
+            while True:
+                with lock:
+                    batch = _take(pending, getattr(target, 'write_batch_size', 1))
+                if not batch:
+                    return
+                if failed.is_set():
+                    for op in batch:
+                        op.skipped = True
+                    continue
+                if len(batch) == 1:
+                    perform(batch[0])
+                else:
+                    perform_batch(batch)
+                if any(op.error is not None and op.kind in (CREATE, UPDATE) for op in batch):
+                    failed.set()
+        finally:
+            context.detach(token)
+
+
+# Op kinds that share a batch call; DELETE_MAIN goes to another calendar.
+_BATCH_GROUP = {CREATE: CREATE, UPDATE: UPDATE, DELETE: DELETE, DELETE_ORPHAN: DELETE}
+
+
+def _take(pending, size):
+    """Pop the next op plus following ops of the same batch group, up to *size*."""
+    if not pending:
+        return []
+    batch = [pending.popleft()]
+    group = _BATCH_GROUP.get(batch[0].kind)
+    while group is not None and len(batch) < size and pending and _BATCH_GROUP.get(pending[0].kind) == group:
+        batch.append(pending.popleft())
+    return batch
+
+
+def perform(op):
+    """Run the API call(s) for *op*, storing the outcome on it."""
+    target = op.target
+    try:
+        if op.kind == CREATE:
+            with tracer.start_as_current_span(
+                "sync.create_busy_event",
+                attributes={"target_calendar": target.id, "source_event_id": op.source_event_id},
+            ):
+                op.result = target.create_busy_event(op.start, op.end, source_event_id=op.source_event_id)
+        elif op.kind == UPDATE:
+            with tracer.start_as_current_span(
+                "sync.update_busy_event",
+                attributes={"target_calendar": target.id, "source_event_id": op.source_event_id},
+            ):
+                try:
+                    op.result = target.update_busy_event(
+                        op.busy_event_id, op.start, op.end, source_event_id=op.source_event_id
+                    )
+                except EventNotFound:
+                    logger.info(f"Busy event {op.busy_event_id} is gone from {target.id}; recreating it")
+                    op.result = target.create_busy_event(op.start, op.end, source_event_id=op.source_event_id)
+        elif op.kind in (DELETE, DELETE_ORPHAN):
+            with tracer.start_as_current_span(
+                "sync.delete_orphan_busy_event",
+                attributes={"target_calendar": target.id, "busy_event_id": op.busy_event_id},
+            ):
+                target.delete_event(op.busy_event_id)
+        elif op.kind == DELETE_MAIN:
+            with tracer.start_as_current_span(
+                "sync.remove_main_busy_event",
+                attributes={"target_calendar": target.id, "busy_event_id": op.busy_event_id},
+            ):
+                target.delete_main_event(op.busy_event_id)
+        else:
+            raise ValueError(f"Unknown write op kind: {op.kind}")
+    except Exception as exc:
+        op.error = exc
+        logger.exception(f"Failed to {op.kind.replace('_', ' ')} busy event in {target.id}")
+
+
+def perform_batch(ops):
+    """Run same-group *ops* against one target with its batch methods."""
+    target = ops[0].target
+    kind = _BATCH_GROUP[ops[0].kind]
+    with tracer.start_as_current_span(
+        f"sync.{kind}_busy_events",
+        attributes={"target_calendar": target.id, "batch_size": len(ops)},
+    ):
+        try:
+            if kind == CREATE:
+                results = target.create_busy_events([(op.start, op.end, op.source_event_id) for op in ops])
+            elif kind == UPDATE:
+                results = target.update_busy_events(
+                    [(op.busy_event_id, op.start, op.end, op.source_event_id) for op in ops]
+                )
+            else:
+                results = target.delete_events([op.busy_event_id for op in ops])
+        except Exception as exc:
+            results = [exc] * len(ops)
+
+        gone = []
+        for op, result in zip(ops, results):
+            if kind == UPDATE and isinstance(result, EventNotFound):
+                gone.append(op)
+            elif isinstance(result, Exception):
+                op.error = result
+                logger.error(
+                    f"Failed to {op.kind.replace('_', ' ')} busy event in {target.id}: {result!r}",
+                    exc_info=result,
+                )
+            else:
+                op.result = result
+        if gone:
+            logger.info(f"{len(gone)} busy events are gone from {target.id}; recreating them")
+            try:
+                results = target.create_busy_events([(op.start, op.end, op.source_event_id) for op in gone])
+            except Exception as exc:
+                results = [exc] * len(gone)
+            for op, result in zip(gone, results):
+                if isinstance(result, Exception):
+                    op.error = result
+                    logger.error(f"Failed to recreate busy event in {target.id}: {result!r}", exc_info=result)
+                else:
+                    op.result = result
+
+
+def apply_results(ops, index, failed_calendars):
+    """Record the outcome of performed *ops* into *index*.
+
+    Returns delete ops for busy events that were created but can no longer be
+    mapped (another op already claimed the key); run them to avoid leaking.
+    """
+    cleanup = []
+    for op in ops:
+        target_id = op.target.id
+        if op.skipped or (op.error is not None and op.kind in (CREATE, UPDATE)):
+            failed_calendars.add(target_id)
+            continue
+        if op.kind == CREATE:
+            if index.get(*op.key) is not None:
+                logger.warning(f"Mapping already exists for {op.source_event_id} in {target_id}; dropping duplicate")
+                cleanup.append(WriteOp(DELETE_ORPHAN, op.target, busy_event_id=op.result))
+                continue
+            index.add(*op.key, op.result, op.start, op.end)
+        elif op.kind == UPDATE:
+            mapping = index.get(*op.key)
+            if mapping is None:
+                cleanup.append(WriteOp(DELETE_ORPHAN, op.target, busy_event_id=op.result))
+                continue
+            index.update(mapping, op.result, op.start, op.end)
+        elif op.kind == DELETE:
+            if op.error is not None:
+                continue
+            mapping = index.get(*op.key)
+            if mapping is not None and mapping.busy_event_id == op.busy_event_id:
+                index.remove(mapping)
+        elif op.kind == DELETE_MAIN:
+            # The busy event is recreated on the busy calendar on a later pass,
+            # so the mapping goes whether or not the delete succeeded.
+            mapping = index.get_busy(target_id, op.busy_event_id)
+            if mapping is not None:
+                index.remove(mapping)
+    return cleanup
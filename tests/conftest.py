@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# calendar_sync.config loads config.yaml at import time; give the sync
+# modules an empty one so they can be imported under test.
+if "CONFIG_PATH" not in os.environ:
+    _config = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)
+    _config.write("calendars: []\n")
+    _config.close()
+    os.environ["CONFIG_PATH"] = _config.name
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from importlib.metadata import EntryPoint, EntryPoints
+
+import pytest
+
+from calendar_sync.calendars import base
+from calendar_sync.calendars.base import BaseCalendar
+
+
+def test_only_the_configured_backend_is_imported():
+    """Test that resolving one backend leaves the other client libraries unloaded."""
+    code = (
+        "import sys, calendar_sync.sync\n"
+        "from calendar_sync.calendars import BaseCalendar\n"
+        "assert BaseCalendar.backend_class('caldav').type == 'caldav'\n"
+        "print(sorted(m for m in ('caldav', 'exchangelib', 'googleapiclient', 'msal') if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], env={**os.environ, "LOG_LEVEL": "WARNING"},
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "['caldav']"
+
+
+def test_entry_point_backends_and_unknown_types(monkeypatch):
+    """Test that third-party types resolve through entry points and unknown ones fail."""
+    found = EntryPoints([EntryPoint("fake", "calendar_sync.calendars.base:BaseCalendar", base.ENTRY_POINT_GROUP)])
+    monkeypatch.setattr(base, "entry_points", lambda group, name: found.select(group=group, name=name))
+    monkeypatch.setattr(BaseCalendar, "class_registry", dict(BaseCalendar.class_registry))
+
+    assert BaseCalendar.backend_class("fake") is BaseCalendar
+    with pytest.raises(ValueError, match="Unknown calendar type: nope"):
+        BaseCalendar.backend_class("nope")
@@ -0,0 +1,161 @@
+from types import SimpleNamespace
+
+from caldav.davclient import DAVResponse
+from caldav.lib.url import URL
+from lxml import etree
+
+from calendar_sync.calendars.caldav_calendar import CaldavCalendar
+
+TIME_MIN = "2026-01-01T00:00:00Z"
+TIME_MAX = "2026-01-15T00:00:00Z"
+
+
+def _instance(uid, day):
+    start = f"2026-01-{day:02d}T10:00:00+00:00"
+    return {"id": f"{uid}#{start}", "start": start, "end": f"2026-01-{day:02d}T11:00:00+00:00",
+            "summary": uid, "description": ""}
+
+
+class FakeServer:
+    """Stands in for the network calls CaldavCalendar.list_events makes."""
+
+    def __init__(self):
+        self.ctag = "c1"
+        self.token = None
+        self.resources = {
+            "/cal/a.ics": ("ea1", [_instance("a", 2)]),
+            "/cal/b.ics": ("eb1", [_instance("b", 3)]),
+        }
+        self.calls = []
+
+    def attach(self, calendar):
+        calendar._collection_tags = lambda: (self.ctag, self.token)
+        calendar._etags = self.etags
+        calendar._multiget = self.multiget
+        calendar._fetch_window = self.fetch_window
+
+    def etags(self, use_sync, since=None):
+        self.calls.append("etags")
+        return {href: etag for href, (etag, _) in self.resources.items()}, None, True
+
+    def multiget(self, hrefs, start, end):
+        self.calls.append(("multiget", sorted(hrefs)))
+        return {href: {"etag": None, "instances": self.resources[href][1]} for href in hrefs if href in self.resources}
+
+    def fetch_window(self, use_sync, start, end):
+        self.calls.append("full")
+        return {href: {"etag": etag, "instances": items} for href, (etag, items) in self.resources.items()}, None
+
+
+def _calendar(tmp_path, server):
+    calendar = CaldavCalendar.__new__(CaldavCalendar)
+    calendar.id = "caldav-test"
+    calendar.busy_calendar_id = None
+    calendar.cache_file = str(tmp_path / "caldav.json")
+    calendar.cache_horizon = 24
+    server.attach(calendar)
+    return calendar
+
+
+def test_unchanged_ctag_is_served_from_cache(tmp_path):
+    """Test that a second run with the same ctag does no fetching at all."""
+    server = FakeServer()
+    first = _calendar(tmp_path, server).list_events(TIME_MIN, TIME_MAX)
+    assert server.calls == ["full"]
+
+    server.calls.clear()
+    again = _calendar(tmp_path, server).list_events(TIME_MIN, TIME_MAX)
+    assert server.calls == []
+    assert sorted(e["id"] for e in again) == sorted(e["id"] for e in first)
+
+
+def test_changed_etags_refetch_only_those_resources(tmp_path):
+    """Test that only new or modified hrefs are multiget and deleted ones dropped."""
+    server = FakeServer()
+    _calendar(tmp_path, server).list_events(TIME_MIN, TIME_MAX)
+
+    server.ctag = "c2"
+    server.resources["/cal/a.ics"] = ("ea2", [_instance("a", 4)])
+    del server.resources["/cal/b.ics"]
+    server.resources["/cal/c.ics"] = ("ec1", [_instance("c", 5), _instance("c", 20)])
+    server.calls.clear()
+    events = _calendar(tmp_path, server).list_events(TIME_MIN, TIME_MAX)
+
+    assert server.calls == ["etags", ("multiget", ["/cal/a.ics", "/cal/c.ics"])]
+    assert sorted(e["id"] for e in events) == [
+        "a#2026-01-04T10:00:00+00:00",
+        "c#2026-01-05T10:00:00+00:00",
+    ]
+
+
+def _vcalendar(uid, day):
+    return (
+        "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nBEGIN:VEVENT\r\n"
+        f"UID:{uid}\r\nDTSTART:202601{day:02d}T100000Z\r\nDTEND:202601{day:02d}T110000Z\r\nSUMMARY:{uid}\r\n"
+        "END:VEVENT\r\nEND:VCALENDAR\r\n"
+    )
+
+
+class FakeCollection:
+    """A sync-token server whose hrefs are percent-encoded, answered with real multistatus XML."""
+
+    path = "/calendars/u%40ya.ru/cal/"
+
+    def __init__(self):
+        self.url = URL.objectify(f"http://dav.example{self.path}")
+        self.token = "t1"
+        self.resources = {"a": ("ea1", _vcalendar("a", 2)), "b": ("eb1", _vcalendar("b", 3))}
+        self.changed = set()
+
+    def _query(self, root, depth, method):
+        xml = root.xmlelement()
+        kind = etree.QName(xml).localname
+        if kind == "sync-collection":
+            since = xml.findtext("{DAV:}sync-token")
+            names = self.changed if since else set(self.resources)
+            body = "".join(self._response(name, data=False) for name in sorted(names))
+            body += f"<d:sync-token>{self.token}</d:sync-token>"
+        elif kind == "calendar-query":
+            body = "".join(self._response(name) for name in sorted(self.resources))
+        else:  # calendar-multiget: answer with our own encoding of each href
+            names = [href.rsplit("/", 1)[1][:-4] for href in xml.findall("{DAV:}href")]
+            body = "".join(self._response(name) for name in names)
+        content = f'<d:multistatus xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav">{body}</d:multistatus>'
+        return DAVResponse(SimpleNamespace(
+            headers={"Content-Type": "application/xml"}, content=content.encode(), status_code=207, reason="",
+        ))
+
+    def _response(self, name, data=True):
+        href = f"<d:href>{self.path}{name}.ics</d:href>"
+        if name not in self.resources:
+            return f"<d:response>{href}<d:status>HTTP/1.1 404 Not Found</d:status></d:response>"
+        etag, ics = self.resources[name]
+        prop = f"<d:getetag>{etag}</d:getetag>" + (f"<c:calendar-data>{ics}</c:calendar-data>" if data else "")
+        return f"<d:response>{href}<d:propstat><d:prop>{prop}</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+
+
+def test_sync_token_path_keys_escaped_hrefs_once(tmp_path):
+    """Test that a moved and a deleted event under a %40 path are not left behind in the cache."""
+    collection = FakeCollection()
+
+    def calendar():
+        cal = CaldavCalendar.__new__(CaldavCalendar)
+        cal.id, cal.busy_calendar_id, cal.calendar = "caldav-test", None, collection
+        cal.cache_file, cal.cache_horizon = str(tmp_path / "caldav.json"), 24
+        cal.select_properties, cal.parse_processes = True, 0
+        cal._collection_tags = lambda: (None, collection.token)
+        return cal
+
+    first = calendar()
+    assert sorted(e["id"] for e in first.list_events(TIME_MIN, TIME_MAX)) == [
+        "a#2026-01-02T10:00:00+00:00", "b#2026-01-03T10:00:00+00:00",
+    ]
+    assert all(first._etags_seen.get(f"http://dav.example/calendars/u@ya.ru/cal/{n}.ics") for n in "ab")
+
+    collection.token = "t2"
+    collection.resources["a"] = ("ea2", _vcalendar("a", 6))
+    del collection.resources["b"]
+    collection.changed = {"a", "b"}
+    second = calendar()
+    assert [e["id"] for e in second.list_events(TIME_MIN, TIME_MAX)] == ["a#2026-01-06T10:00:00+00:00"]
+    assert second._etags_seen == {"http://dav.example/calendars/u@ya.ru/cal/a.ics": "ea2"}
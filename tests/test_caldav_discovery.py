@@ -0,0 +1,84 @@
+import time
+from types import SimpleNamespace
+
+from caldav.lib.error import NotFoundError
+
+from calendar_sync.calendars.caldav_calendar import CaldavCalendar
+from calendar_sync.utils.files import read_json, write_json
+
+CFG = {"type": "caldav", "url": "http://dav.example/u/", "username": "u", "password": "p"}
+
+
+class FakeClient:
+    """Answers discovery with whichever calendar URL the test sets."""
+
+    def __init__(self, calendar_url):
+        self.calendar_url = calendar_url
+        self.discoveries = 0
+
+    def principal(self):
+        self.discoveries += 1
+        return SimpleNamespace(
+            url="http://dav.example/u/",
+            calendar_home_set=SimpleNamespace(url="http://dav.example/u/"),
+            calendars=lambda: [SimpleNamespace(url=self.calendar_url)],
+        )
+
+    def calendar(self, url):
+        return SimpleNamespace(url=url)
+
+
+def _calendar(monkeypatch, tmp_path, client, **cfg):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    calendar = CaldavCalendar({**CFG, **cfg})
+    calendar.client = client
+    return calendar
+
+
+def test_construction_makes_no_requests(monkeypatch, tmp_path):
+    """Test that the calendar is only discovered on first use, then cached on disk."""
+    client = FakeClient("http://dav.example/u/main/")
+    calendar = _calendar(monkeypatch, tmp_path, client)
+    assert client.discoveries == 0
+
+    assert str(calendar.calendar.url) == "http://dav.example/u/main/"
+    assert calendar.busy_calendar is calendar.calendar
+    assert client.discoveries == 1
+    assert read_json(calendar.discovery_file)["calendar_url"] == "http://dav.example/u/main/"
+
+    # A new run (another instance) reuses the cached URLs.
+    again = _calendar(monkeypatch, tmp_path, client, busy_calendar_id="http://dav.example/u/busy/")
+    assert str(again.calendar.url) == "http://dav.example/u/main/"
+    assert str(again.busy_calendar.url) == "http://dav.example/u/busy/"
+    assert again.cache_file == calendar.cache_file
+    assert client.discoveries == 1
+
+
+def test_expired_discovery_is_refreshed(monkeypatch, tmp_path):
+    """Test that discovery runs again once the cached result is older than the TTL."""
+    client = FakeClient("http://dav.example/u/main/")
+    calendar = _calendar(monkeypatch, tmp_path, client, discovery_ttl_hours=1)
+    write_json(calendar.discovery_file, {
+        "version": 1, "url": CFG["url"], "username": "u", "resolved_at": time.time() - 7200,
+        "calendar_url": "http://dav.example/u/old/",
+    })
+    assert str(calendar.calendar.url) == "http://dav.example/u/main/"
+    assert client.discoveries == 1
+
+
+def test_stale_calendar_url_is_rediscovered(monkeypatch, tmp_path):
+    """Test that a 404 on a cached calendar URL drops the cache and retries once."""
+    client = FakeClient("http://dav.example/u/old/")
+    _calendar(monkeypatch, tmp_path, client).calendar  # cache the old URL
+    client.calendar_url = "http://dav.example/u/new/"
+    calendar = _calendar(monkeypatch, tmp_path, client)
+
+    def list_events(time_min, time_max):
+        if calendar.calendar.url.endswith("/old/"):
+            raise NotFoundError("404 Not Found")
+        return [{"id": "a"}]
+
+    calendar._list_events = list_events
+    assert calendar.list_events("2026-01-01T00:00:00Z", "2026-01-02T00:00:00Z") == [{"id": "a"}]
+    assert client.discoveries == 2
+    assert read_json(calendar.discovery_file)["calendar_url"] == "http://dav.example/u/new/"
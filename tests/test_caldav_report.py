@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+from caldav.lib.error import ReportError
+from lxml import etree
+
+from calendar_sync.calendars.caldav_calendar import CaldavCalendar
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+END = datetime(2026, 2, 1, tzinfo=timezone.utc)
+C = "{urn:ietf:params:xml:ns:caldav}"
+
+
+class FakeCollection:
+    """Records REPORT bodies; rejects property selection when *strict*."""
+
+    def __init__(self, strict=False):
+        self.strict = strict
+        self.reports = []
+
+    def _query(self, root, depth, method):
+        xml = root.xmlelement()
+        self.reports.append(xml)
+        if self.strict and xml.find(f".//{C}prop") is not None:
+            raise ReportError("400 Bad Request")
+        return "response"
+
+
+def _calendar(collection, busy_calendar_id=None):
+    calendar = CaldavCalendar.__new__(CaldavCalendar)
+    calendar.id = "caldav-test"
+    calendar.busy_calendar_id = busy_calendar_id
+    calendar.select_properties = True
+    calendar.calendar = collection
+    return calendar
+
+
+def _selected(xml):
+    return [prop.get("name") for prop in xml.iterfind(f".//{C}comp[@name='VEVENT']/{C}prop")]
+
+
+def _build(calendar_data):
+    return calendar_data
+
+
+def test_selects_description_only_with_a_busy_calendar():
+    """Test that calendar-data asks for the properties we read, DESCRIPTION only when needed."""
+    collection = FakeCollection()
+    _calendar(collection)._report(_build, START, END)
+    _calendar(collection, busy_calendar_id="http://dav.example/busy/")._report(_build, START, END)
+    plain, with_busy = map(_selected, collection.reports)
+    assert {"UID", "DTSTART", "DTEND", "SUMMARY", "RRULE"} <= set(plain)
+    assert "DESCRIPTION" not in plain and "DESCRIPTION" in with_busy
+    assert collection.reports[0].find(f"{C}expand") is not None
+
+
+def test_rejected_selection_falls_back_to_full_events():
+    """Test that a server rejecting the selection is asked again, and from then on, without it."""
+    collection = FakeCollection(strict=True)
+    calendar = _calendar(collection)
+    assert calendar._report(_build, START, END) == "response"
+    assert calendar._report(_build, START, END) == "response"
+    assert [_selected(xml) != [] for xml in collection.reports] == [True, False, False]
+    assert all(etree.QName(xml).localname == "calendar-data" for xml in collection.reports)
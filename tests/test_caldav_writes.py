@@ -0,0 +1,129 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from calendar_sync.calendars import caldav_calendar
+from calendar_sync.calendars.base import EventNotFound
+from calendar_sync.calendars.caldav_calendar import CaldavCalendar, _ServerSlots
+from calendar_sync.writes import WriteExecutor
+
+START = "2026-01-02T10:00:00Z"
+END = "2026-01-02T11:00:00Z"
+
+
+class FakeClient:
+    """Answers write requests from a script; exceptions are raised."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.requests = []
+
+    def request(self, url, method="GET", body="", headers=None):
+        self.requests.append((method, url.rsplit("/", 1)[-1], dict(headers or {})))
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        status, headers = answer if isinstance(answer, tuple) else (answer, {})
+        return SimpleNamespace(status=status, headers=headers)
+
+
+def _calendar(client, write_concurrency=None):
+    calendar = CaldavCalendar.__new__(CaldavCalendar)
+    calendar.client = client
+    calendar.calendar = calendar.busy_calendar = SimpleNamespace(url="http://dav.example/cal/")
+    calendar.write_concurrency = write_concurrency
+    calendar._write_slots = _ServerSlots("dav.example", 4)
+    calendar._etags_seen = {}
+    return calendar
+
+
+def test_create_retry_is_idempotent():
+    """Test that a create whose first PUT was lost treats 412 on the retry as done."""
+    client = FakeClient([ConnectionError("reset"), 412])
+    busy_id = _calendar(client).create_busy_event(START, END, "e1")
+
+    assert [(method, name) for method, name, _ in client.requests] == [("PUT", f"{busy_id}.ics")] * 2
+    assert all(headers["If-None-Match"] == "*" for _, _, headers in client.requests)
+
+
+def test_update_with_stale_etag_looks_it_up_and_retries():
+    """Test that a 412 on a cached ETag is followed by a HEAD and one PUT with the fresh ETag."""
+    client = FakeClient([412, (200, {"ETag": '"v2"'}), (204, {"ETag": '"v3"'})])
+    calendar = _calendar(client)
+    calendar._etags_seen["http://dav.example/cal/b1.ics"] = '"v1"'
+    assert calendar.update_busy_event("b1", START, END, "e1") == "b1"
+
+    assert [(method, headers.get("If-Match")) for method, _, headers in client.requests] == [
+        ("PUT", '"v1"'), ("HEAD", None), ("PUT", '"v2"'),
+    ]
+    assert calendar._etags_seen["http://dav.example/cal/b1.ics"] == '"v3"'
+
+
+def test_update_changed_twice_fails_instead_of_recreating():
+    """Test that a second 412 is an error, not EventNotFound: the event still exists."""
+    client = FakeClient([412, (200, {"ETag": '"v2"'}), 412])
+    calendar = _calendar(client)
+    calendar._etags_seen["http://dav.example/cal/b1.ics"] = '"v1"'
+    with pytest.raises(RuntimeError, match="412"):
+        calendar.update_busy_event("b1", START, END, "e1")
+
+
+def test_update_of_deleted_event_is_event_not_found():
+    """Test that a 404 from the HEAD (no cached ETag) reports the busy event as gone."""
+    client = FakeClient([404])
+    with pytest.raises(EventNotFound):
+        _calendar(client).update_busy_event("b1", START, END, "e1")
+    assert [method for method, _, _ in client.requests] == ["HEAD"]
+
+
+def test_calendar_write_concurrency_overrides_type_default():
+    """Test that a CalDAV block's write_concurrency sets its lane count."""
+    executor = WriteExecutor(limits={"caldav": 4})
+    assert executor.limit_for(_calendar(FakeClient([]), write_concurrency=1)) == 1
+    assert executor.limit_for(_calendar(FakeClient([]))) == 4
+
+
+class SlowClient:
+    """Counts how many requests are in flight at once."""
+
+    def __init__(self):
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def request(self, url, method="GET", body="", headers=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return SimpleNamespace(status=204, headers={})
+
+
+def test_strictest_block_caps_the_whole_server():
+    """Test that blocks on one server share the lowest write_concurrency, whichever loads first."""
+    cfg = {"type": "caldav", "username": "u", "password": "p"}
+    loose = CaldavCalendar({**cfg, "url": "http://cap.example/u/", "write_concurrency": 4})
+    strict = CaldavCalendar({**cfg, "url": "http://cap.example/v/", "write_concurrency": 1})
+    assert loose._write_slots is strict._write_slots
+    assert WriteExecutor().limit_for(loose) == 1
+
+    client = loose.client = SlowClient()
+    threads = [threading.Thread(target=loose._request, args=(f"http://cap.example/u/{i}.ics", "DELETE"))
+               for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.peak == 1
+
+
+def test_unset_cap_follows_the_configured_type_limit(monkeypatch):
+    """Test that blocks without write_concurrency size their server's slots from write_concurrency.caldav."""
+    monkeypatch.setitem(caldav_calendar.yaml_config, "write_concurrency", {"caldav": 8})
+    calendar = CaldavCalendar({"type": "caldav", "url": "http://wide.example/u/", "username": "u", "password": "p"})
+    assert calendar.server_write_limit == 8
+    assert WriteExecutor.from_config(caldav_calendar.yaml_config).limit_for(calendar) == 8
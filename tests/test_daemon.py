@@ -0,0 +1,67 @@
+import os
+import signal
+
+from calendar_sync import daemon
+from calendar_sync.daemon import Daemon
+
+
+class FakeSession:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _patch(monkeypatch, cycle):
+    monkeypatch.setattr(daemon, "get_session", FakeSession)
+    monkeypatch.setattr(daemon, "sync_cycle", cycle)
+
+
+def test_calendars_are_reused_and_failed_blocks_retried(monkeypatch):
+    """Test that healthy calendars live across cycles and broken ones are retried."""
+    attempts = []
+
+    def load(configs=None, failed=None):
+        attempts.append(configs)
+        if len(attempts) < 3:
+            failed.append({"id": "broken"})
+            return ["good"] if configs is None else []
+        return ["fixed"]
+
+    seen = []
+    _patch(monkeypatch, lambda session, calendars, sources=None: seen.append(list(calendars)))
+    monkeypatch.setattr(daemon, "load_calendars", load)
+
+    Daemon(interval=0, jitter=0).run(max_cycles=3)
+    assert attempts == [None, [{"id": "broken"}], [{"id": "broken"}]]
+    assert seen == [["good"], ["good", "fixed"], ["good", "fixed"]]
+
+
+def test_sigterm_stops_after_the_cycle_in_flight(monkeypatch):
+    """Test that SIGTERM lets the running cycle finish and starts no other."""
+    cycles = []
+
+    def cycle(session, calendars, sources=None):
+        cycles.append("start")
+        os.kill(os.getpid(), signal.SIGTERM)
+        cycles.append("end")
+
+    _patch(monkeypatch, cycle)
+    monkeypatch.setattr(daemon, "load_calendars", lambda configs=None, failed=None: ["cal"])
+    previous = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+    runner = Daemon(interval=3600, jitter=0)
+    try:
+        runner.install_signal_handlers()
+        runner.run()
+    finally:
+        signal.signal(signal.SIGTERM, previous[0])
+        signal.signal(signal.SIGINT, previous[1])
+    assert cycles == ["start", "end"]
+
+
+def test_delay_keeps_start_to_start_interval():
+    """Test that the wait subtracts the cycle's runtime and adds bounded jitter."""
+    runner = Daemon(interval=300, jitter=30)
+    assert all(200 <= runner.delay(100) <= 230 for _ in range(100))
+    assert runner.delay(400) <= 30
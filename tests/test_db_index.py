@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from calendar_sync.db.models import Base, EventMapping
+from calendar_sync.db.index import MappingIndex
+
+
+@pytest.fixture(scope="function")
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(scope="function")
+def session(engine):
+    Session = sessionmaker(bind=engine, autoflush=False)
+    session = Session()
+    yield session
+    session.close()
+
+
+def _mapping(source_event_id, target="B", busy="busy", start="2025-01-01T10:00:00Z"):
+    return EventMapping(
+        source_calendar="A",
+        source_event_id=source_event_id,
+        target_calendar=target,
+        busy_event_id=busy,
+        start_time=start,
+        end_time=start,
+    )
+
+
+def test_lookups_are_served_without_queries(engine, session):
+    """Test that after load() no lookup hits the database."""
+    session.add_all([_mapping("e1", busy="b1"), _mapping("e2", target="C", busy="b2")])
+    session.commit()
+    index = MappingIndex.load(session)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    assert index.get("A", "e1", "B").busy_event_id == "b1"
+    assert index.get("A", "e1", "C") is None
+    assert index.get_busy("C", "b2").source_event_id == "e2"
+    assert index.get_busy("B", "b2") is None
+    assert {m.source_event_id for m in index.for_source("A")} == {"e1", "e2"}
+    assert statements == []
+
+
+def test_flush_writes_back_all_changes(session):
+    """Test that add/update/remove are written back by flush()."""
+    session.add_all([_mapping("keep", busy="b1"), _mapping("gone", busy="b2")])
+    session.commit()
+    index = MappingIndex.load(session)
+
+    index.add("A", "new", "B", "b3", "s", "e")
+    index.update(index.get("A", "keep", "B"), "b4", "s2", "e2")
+    index.remove(index.get("A", "gone", "B"))
+    assert index.get_busy("B", "b1") is None
+    assert index.get_busy("B", "b4").source_event_id == "keep"
+
+    assert index.flush() == ([], set())
+    rows = {m.source_event_id: m for m in session.query(EventMapping).all()}
+    assert set(rows) == {"keep", "new"}
+    assert rows["keep"].busy_event_id == "b4"
+    assert rows["keep"].start_time == "s2"
+    assert rows["new"].busy_event_id == "b3"
+
+
+def test_flush_reports_conflicting_inserts(engine, session):
+    """Test that a row written behind the index's back is reported, not lost."""
+    index = MappingIndex.load(session)
+    index.add("A", "e1", "B", "ours", "s", "e")
+    index.add("A", "e2", "B", "b2", "s", "e")
+
+    other = sessionmaker(bind=engine)()
+    other.add(_mapping("e1", busy="theirs"))
+    other.commit()
+    other.close()
+
+    conflicts, failed = index.flush()
+    assert failed == set()
+    assert [m.busy_event_id for m in conflicts] == ["ours"]
+    rows = {m.source_event_id: m.busy_event_id for m in session.query(EventMapping).all()}
+    assert rows == {"e1": "theirs", "e2": "b2"}
+
+
+def test_flush_uses_bulk_statements_per_source(engine, session):
+    """Test that each source is written with one statement per change kind."""
+    session.add_all([_mapping("old1", busy="b1"), _mapping("old2", busy="b2")])
+    session.commit()
+    index = MappingIndex.load(session)
+    for i in range(20):
+        index.add("A", f"n{i}", "B", f"nb{i}", "s", "e")
+        index.add("X", f"n{i}", "B", f"xb{i}", "s", "e")
+    index.remove(index.get("A", "old1", "B"))
+    index.update(index.get("A", "old2", "B"), "b9", "s", "e")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2].split()[0]))
+    assert index.flush() == ([], set())
+
+    assert statements.count("INSERT") == 2
+    assert statements.count("UPDATE") == 1
+    assert statements.count("DELETE") == 1
+    assert session.query(EventMapping).count() == 41
+
+
+def test_flush_reports_sources_whose_commit_failed(session, monkeypatch):
+    """Test that a source whose changes could not be committed is returned as failed."""
+    index = MappingIndex.load(session)
+    index.add("A", "e1", "B", "b1", "s", "e")
+    index.add("X", "e1", "B", "b2", "s", "e")
+    commit = session.commit
+    calls = []
+
+    def flaky_commit():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+        commit()
+
+    monkeypatch.setattr(session, "commit", flaky_commit)
+    conflicts, failed = index.flush()
+    assert conflicts == [] and failed == {"A"}
+    assert session.query(EventMapping).filter_by(source_calendar="X").count() == 1
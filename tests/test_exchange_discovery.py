@@ -0,0 +1,85 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from exchangelib import Account, Build, Version
+from exchangelib.errors import ErrorFolderNotFound
+
+from calendar_sync.calendars.exchange_calendar import ExchangeCalendar, _MailboxCache
+from calendar_sync.utils.files import read_json, write_json
+
+
+class FakeAccount(Account):
+    """An Account whose calendar folder tree is a list of named children."""
+
+    def __init__(self, children):
+        self.children = children
+        self.lookups = 0
+
+    @property
+    def calendar(self):
+        self.lookups += 1
+        return SimpleNamespace(id="primary", children=self.children)
+
+
+def _calendar(tmp_path, account):
+    calendar = ExchangeCalendar.__new__(ExchangeCalendar)
+    calendar.id = "exchange-test"
+    calendar.calendar_name = "Work"
+    calendar.busy_calendar_id = None
+    calendar._mailbox = _MailboxCache(str(tmp_path / "exchange.json"), 3600)
+    calendar._lock = threading.RLock()
+    calendar._folders = {}
+    calendar.account = lambda: account
+    return calendar
+
+
+def test_mailbox_cache_round_trip(tmp_path):
+    """Test that folder ids and the server version survive a restart, until the TTL."""
+    path = str(tmp_path / "exchange.json")
+    cache = _MailboxCache(path, 3600)
+    cache.save()
+    assert read_json(path) is None  # nothing learned, nothing written
+
+    cache.set_folder_id("Work", "F1")
+    cache.set_version(Version(build=Build(15, 20, 8, 0), api_version="Exchange2016"))
+    cache.save()
+
+    again = _MailboxCache(path, 3600)
+    assert again.folder_id("Work") == "F1"
+    version = again.version()
+    assert version.build == Build(15, 20, 8, 0) and version.api_version == "Exchange2016"
+
+    write_json(path, {**read_json(path), "resolved_at": time.time() - 7200})
+    expired = _MailboxCache(path, 3600)
+    assert expired.folder_id("Work") is None and expired.version() is None
+
+
+def test_folder_is_looked_up_once_then_addressed_by_id(tmp_path):
+    """Test that a subfolder is found by name once, then reused from the cache by id."""
+    account = FakeAccount([SimpleNamespace(name="Home", id="F0"), SimpleNamespace(name="Work", id="F1")])
+    calendar = _calendar(tmp_path, account)
+    assert calendar._read_folder().id == "F1"
+    assert calendar._read_folder().id == "F1"
+    assert account.lookups == 1
+    calendar._mailbox.save()
+
+    # Next run: the id comes from disk and the folder tree is never walked.
+    calendar = _calendar(tmp_path, account)
+    folder = calendar._read_folder()
+    assert folder.id == "F1" and account.lookups == 1
+
+
+def test_stale_folder_id_is_looked_up_again(tmp_path):
+    """Test that a folder id EWS no longer knows is dropped and resolved by name again."""
+    account = FakeAccount([SimpleNamespace(name="Work", id="F2")])
+    calendar = _calendar(tmp_path, account)
+    calendar._mailbox.set_folder_id("Work", "F1")
+
+    def read(folder):
+        if folder.id == "F1":
+            raise ErrorFolderNotFound("gone")
+        return [folder.id]
+
+    assert calendar._on_read_folder(read) == ["F2"]
+    assert calendar._mailbox.folder_id("Work") == "F2"
@@ -0,0 +1,86 @@
+import json
+from types import SimpleNamespace
+
+from exchangelib import EWSDateTime, EWSTimeZone
+
+from calendar_sync.calendars.exchange_calendar import ExchangeCalendar
+
+UTC = EWSTimeZone("UTC")
+TIME_MIN = "2026-01-01T00:00:00Z"
+TIME_MAX = "2026-01-15T00:00:00Z"
+
+
+def _item(item_id, day, item_type="Single"):
+    return SimpleNamespace(
+        id=item_id, type=item_type, subject=item_id, body=None, is_all_day=False, is_cancelled=False,
+        start=EWSDateTime(2026, 1, day, 10, tzinfo=UTC), end=EWSDateTime(2026, 1, day, 11, tzinfo=UTC),
+    )
+
+
+class FakeFolder:
+    id = "folder-1"
+
+    def __init__(self, changes, occurrences, masters=()):
+        self.changes = changes
+        self.occurrences = occurrences
+        self.masters = list(masters)
+        self.item_sync_state = None
+        self.views = 0
+        self.synced_fields = []
+
+    def sync_items(self, sync_state=None, only_fields=None, max_changes_returned=None):
+        self.synced_fields.append(list(only_fields))
+        yield from self.changes
+        self.item_sync_state = f"{sync_state or 'start'}+"
+
+    def filter(self, type):
+        return SimpleNamespace(only=lambda *fields: [m for m in self.masters if m.type == type])
+
+    def view(self, start, end):
+        self.views += 1
+        return SimpleNamespace(only=lambda *fields: list(self.occurrences))
+
+
+def _calendar(folder):
+    calendar = ExchangeCalendar.__new__(ExchangeCalendar)
+    calendar.id = "exchange-test"
+    calendar.primary_smtp = "user@example.com"
+    calendar._read_folder = lambda: folder
+    return calendar
+
+
+def test_single_item_changes_are_applied_incrementally():
+    """Test that single-item creates and deletes come back without a view()."""
+    master = _item("m1", 2, "RecurringMaster")
+    folder = FakeFolder([("create", master), ("create", _item("s0", 4))], [_item("occ1", 2)], [master])
+    full = _calendar(folder).list_changes(TIME_MIN, TIME_MAX)
+    assert full.full and [e["id"] for e in full.events] == ["occ1"]
+    assert json.loads(full.sync_token)["masters"] == ["m1"]
+    assert folder.synced_fields == [["id"]]
+
+    folder.changes = [
+        ("create", _item("s1", 3)),
+        ("update", _item("s2", 20)),
+        ("delete", SimpleNamespace(id="s3")),
+        ("read_flag_change", (SimpleNamespace(id="s1"), True)),
+    ]
+    delta = _calendar(folder).list_changes(TIME_MIN, TIME_MAX, full.sync_token)
+    assert not delta.full
+    assert [e["id"] for e in delta.events] == ["s1"]
+    assert delta.removed == ["s2", "s3"]
+    assert folder.views == 1
+    assert json.loads(delta.sync_token)["state"] == "start++"
+
+
+def test_recurring_changes_fall_back_to_view():
+    """Test that deleting a known recurring master relists the window once."""
+    master = _item("m1", 2, "RecurringMaster")
+    folder = FakeFolder([("create", master)], [_item("occ1", 2)], [master])
+    token = _calendar(folder).list_changes(TIME_MIN, TIME_MAX).sync_token
+
+    folder.changes = [("delete", SimpleNamespace(id="m1"))]
+    folder.occurrences = []
+    delta = _calendar(folder).list_changes(TIME_MIN, TIME_MAX, token)
+    assert delta.full and delta.events == []
+    assert folder.views == 2
+    assert json.loads(delta.sync_token)["masters"] == []
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from exchangelib import Account
+from exchangelib.errors import ErrorAccessDenied, ErrorItemNotFound
+
+from calendar_sync.calendars.base import EventNotFound
+from calendar_sync.calendars.exchange_calendar import ExchangeCalendar
+
+START = "2026-01-02T10:00:00Z"
+END = "2026-01-02T11:00:00Z"
+
+
+class FakeAccount(Account):
+    """Records bulk_* calls and answers each item from a script (no EWS session)."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def _answer(self, name, items):
+        self.calls.append((name, len(items)))
+        return [self.answers.pop(0) for _ in items]
+
+    def bulk_create(self, folder, items, **kwargs):
+        return self._answer("create", items)
+
+    def bulk_update(self, items, **kwargs):
+        return self._answer("update", items)
+
+    def bulk_delete(self, ids, **kwargs):
+        return self._answer("delete", ids)
+
+
+def _calendar(account):
+    calendar = ExchangeCalendar.__new__(ExchangeCalendar)
+    calendar.id = "exchange-test"
+    calendar.busy_calendar_id = None
+    calendar._account = None
+    calendar.account = lambda: account
+    calendar._busy_folder = lambda: None
+    return calendar
+
+
+def test_bulk_writes_report_per_item_results():
+    """Test that each bulk call covers all items and maps results back in order."""
+    denied = ErrorAccessDenied("denied")
+    account = FakeAccount([
+        SimpleNamespace(id="b1"), denied,
+        ErrorItemNotFound("gone"), True,
+        True, ErrorItemNotFound("gone"), denied,
+    ])
+    calendar = _calendar(account)
+
+    assert calendar.create_busy_events([(START, END, "e1"), (START, END, "e2")]) == ["b1", denied]
+    updated = calendar.update_busy_events([("b8", START, END, "e8"), ("b9", START, END, "e9")])
+    assert isinstance(updated[0], EventNotFound) and updated[1] == "b9"
+    assert calendar.delete_events(["x1", "x2", "x3"]) == [None, None, denied]
+    assert account.calls == [("create", 2), ("update", 2), ("delete", 3)]
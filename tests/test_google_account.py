@@ -0,0 +1,37 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from calendar_sync.calendars import google_calendar
+from calendar_sync.calendars.google_calendar import GoogleCalendar
+
+
+def _token_file(tmp_path, name):
+    expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+    path = tmp_path / name
+    path.write_text(json.dumps({
+        "token": "access", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret",
+        "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }))
+    return str(path)
+
+
+def test_calendars_on_one_token_share_a_service(tmp_path, monkeypatch):
+    """Test that one service is built per token file, from the bundled discovery document."""
+    builds = []
+    real_build = google_calendar.build
+
+    def build(*args, **kwargs):
+        builds.append(kwargs)
+        return real_build(*args, **kwargs)
+
+    monkeypatch.setattr(google_calendar, "build", build)
+    monkeypatch.setattr(google_calendar, "_accounts", {})
+    shared, other = _token_file(tmp_path, "a.json"), _token_file(tmp_path, "b.json")
+
+    work = GoogleCalendar({"id": "work@example.com", "credentials_path": None, "token_path": shared})
+    team = GoogleCalendar({"id": "team@group.calendar.google.com", "credentials_path": None, "token_path": shared})
+    personal = GoogleCalendar({"id": "me@gmail.com", "credentials_path": None, "token_path": other})
+
+    assert work.service is team.service and work._http() is team._http()
+    assert personal.service is not work.service
+    assert len(builds) == 2 and all(b["static_discovery"] for b in builds)
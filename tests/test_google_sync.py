@@ -0,0 +1,75 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+from calendar_sync.calendars.google_calendar import GoogleCalendar
+
+TIME_MIN = "2026-01-10T00:00:00Z"
+TIME_MAX = "2026-01-20T00:00:00Z"
+
+
+def _event(event_id, day, **extra):
+    return {
+        "id": event_id, "summary": event_id, "status": "confirmed",
+        "start": {"dateTime": f"2026-01-{day:02d}T10:00:00Z"},
+        "end": {"dateTime": f"2026-01-{day:02d}T11:00:00Z"},
+        **extra,
+    }
+
+
+def _calendar(*pages):
+    """A calendar whose events().list calls are answered by *pages*: (status, body) in order."""
+    http = HttpMockSequence([({"status": str(status)}, json.dumps(body)) for status, body in pages])
+    calendar = GoogleCalendar.__new__(GoogleCalendar)
+    calendar.id = "me@example.com"
+    calendar.service = build("calendar", "v3", http=http, static_discovery=True, cache_discovery=False)
+    calendar._http = lambda: http
+    return calendar, http
+
+
+def _queries(http):
+    return [parse_qs(urlsplit(uri).query) for uri, *_ in http.request_sequence]
+
+
+def test_full_listing_pages_through_and_takes_the_last_sync_token():
+    """Test that every page is read and nextSyncToken comes from the last one."""
+    calendar, http = _calendar(
+        (200, {"items": [_event("a", 11)], "nextPageToken": "p2"}),
+        (200, {"items": [_event("b", 12)], "nextSyncToken": "tok1"}),
+    )
+    delta = calendar.list_changes(TIME_MIN, TIME_MAX)
+    assert delta.full and [e["id"] for e in delta.events] == ["a", "b"]
+    assert delta.sync_token == "tok1"
+    first, second = _queries(http)
+    assert first["timeMin"] == [TIME_MIN] and first["singleEvents"] == ["true"]
+    assert second["pageToken"] == ["p2"]
+
+
+def test_cancelled_and_out_of_window_changes_are_removed():
+    """Test that cancelled instances and ones moved outside the window come back in removed."""
+    calendar, http = _calendar((200, {"items": [
+        _event("kept", 15),
+        {"id": "gone", "status": "cancelled"},
+        _event("moved_20260101T100000Z", 25),
+    ], "nextSyncToken": "tok2"}))
+    delta = calendar.list_changes(TIME_MIN, TIME_MAX, "tok1")
+    assert not delta.full
+    assert [e["id"] for e in delta.events] == ["kept"]
+    assert delta.removed == ["gone", "moved_20260101T100000Z"]
+    assert delta.sync_token == "tok2"
+    query, = _queries(http)
+    assert query["syncToken"] == ["tok1"] and "timeMin" not in query
+
+
+def test_expired_sync_token_falls_back_to_full_listing():
+    """Test that a 410 on the stored token lists the window again from scratch."""
+    calendar, http = _calendar(
+        (410, {"error": {"code": 410, "message": "Sync token is no longer valid"}}),
+        (200, {"items": [_event("a", 11)], "nextSyncToken": "fresh"}),
+    )
+    delta = calendar.list_changes(TIME_MIN, TIME_MAX, "stale")
+    assert delta.full and [e["id"] for e in delta.events] == ["a"]
+    assert delta.sync_token == "fresh"
+    assert _queries(http)[1]["timeMin"] == [TIME_MIN]
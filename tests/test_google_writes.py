@@ -0,0 +1,109 @@
+import json
+from urllib.parse import unquote
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence
+
+from calendar_sync.calendars.base import EventNotFound
+from calendar_sync.calendars.google_calendar import GoogleCalendar
+
+START = "2025-01-01T10:00:00Z"
+END = "2025-01-01T11:00:00Z"
+
+
+def _error(status):
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FakeBatch:
+    """Collects requests and answers them out of order, like a real batch may."""
+
+    def __init__(self, server, callback):
+        self.server = server
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        self.server.batches.append(len(self.requests))
+        for request_id, request in reversed(self.requests):
+            response, exception = self.server.answer(request)
+            self.callback(request_id, response, exception)
+
+
+class FakeServer:
+    """Answers each request by its method and event id (or created source id) from *answers*."""
+
+    def __init__(self, answers=None):
+        self.answers = answers or {}
+        self.batches = []
+
+    def answer(self, request):
+        if request.method == "POST":
+            source = json.loads(request.body)["description"].rsplit(" ", 1)[-1].rstrip(")")
+            return {"id": f"busy-{source}", "status": "confirmed"}, None
+        event_id = unquote(request.uri.split("?")[0].rsplit("/", 1)[-1])
+        answer = self.answers.get(event_id, {"id": event_id, "status": "confirmed"})
+        return (None, answer) if isinstance(answer, Exception) else (answer, None)
+
+
+def _calendar(server):
+    calendar = GoogleCalendar.__new__(GoogleCalendar)
+    calendar.id = "me@example.com"
+    calendar.busy_calendar_id = None
+    calendar.service = build("calendar", "v3", http=HttpMockSequence([]), static_discovery=True, cache_discovery=False)
+    calendar.service.new_batch_http_request = lambda callback: FakeBatch(server, callback)
+    calendar._http = lambda: None
+    return calendar
+
+
+def test_batched_creates_keep_item_order_across_batches():
+    """Test that results line up with items over several 50-request batches answered out of order."""
+    server = FakeServer()
+    items = [(START, END, f"s{i}") for i in range(120)]
+    assert _calendar(server).create_busy_events(items) == [f"busy-s{i}" for i in range(120)]
+    assert server.batches == [50, 50, 20]
+
+
+def test_batched_updates_map_cancelled_and_gone_to_event_not_found():
+    """Test that a patch answered with a cancelled event, 404 or 410 means the busy event is gone."""
+    server = FakeServer({
+        "cancelled": {"id": "cancelled", "status": "cancelled"},
+        "missing": _error(404),
+        "purged": _error(410),
+        "broken": _error(500),
+    })
+    ids = ["ok", "cancelled", "missing", "purged", "broken"]
+    results = _calendar(server).update_busy_events([(busy_id, START, END, None) for busy_id in ids])
+    assert results[0] == "ok"
+    assert all(isinstance(r, EventNotFound) and r.args == (busy_id,) for r, busy_id in zip(results[1:4], ids[1:4]))
+    assert isinstance(results[4], HttpError) and results[4].resp.status == 500
+
+
+def test_batched_deletes_count_gone_events_as_deleted():
+    """Test that 404/410 on delete count as deleted and other errors come back in place."""
+    server = FakeServer({"missing": _error(404), "purged": _error(410), "denied": _error(403)})
+    results = _calendar(server).delete_events(["ok", "missing", "purged", "denied"])
+    assert results[:3] == [None, None, None]
+    assert isinstance(results[3], HttpError) and results[3].resp.status == 403
+
+
+def test_single_update_of_a_deleted_event_is_event_not_found():
+    """Test that events.patch answered with a cancelled event (or 404) raises EventNotFound."""
+    http = HttpMockSequence([
+        ({"status": "200"}, json.dumps({"id": "b1", "status": "confirmed"})),
+        ({"status": "200"}, json.dumps({"id": "b2", "status": "cancelled"})),
+        ({"status": "404"}, json.dumps({"error": {"code": 404}})),
+    ])
+    calendar = _calendar(FakeServer())
+    calendar._http = lambda: http
+    assert calendar.update_busy_event("b1", START, END) == "b1"
+    for busy_id in ("b2", "b3"):
+        with pytest.raises(EventNotFound):
+            calendar.update_busy_event(busy_id, START, END)
+    assert [method for _, method, *_ in http.request_sequence] == ["PATCH"] * 3
@@ -0,0 +1,79 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from calendar_sync.utils import http
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.seen.append((self.command, self.client_address[1]))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        if status in (429, 503):
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_PUT = do_PATCH = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.seen, server.statuses = [], []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_throttled_posts_are_retried_on_one_pooled_connection(server, monkeypatch):
+    """Test that 429 is retried (POST included), connections are reused and latency recorded."""
+    recorded = []
+    monkeypatch.setattr(http._latency, "record", lambda value, attributes: recorded.append(attributes))
+    monkeypatch.setattr(http, "_sessions", {})
+    url = f"http://127.0.0.1:{server.server_address[1]}/x"
+    session = http.session_for(url)
+    assert http.session_for(url) is session
+
+    server.statuses = [429, 429]
+    assert session.post(url, json={}).status_code == 200
+    assert session.post(url, json={}).status_code == 200
+    assert [method for method, _ in server.seen] == ["POST"] * 4
+    assert len({port for _, port in server.seen}) == 1
+    assert [a["http.status_code"] for a in recorded] == [200, 200]
+
+    server.statuses = [500]
+    assert session.post(url, json={}).status_code == 500  # may have been applied: not retried
+    assert len(server.seen) == 5
+
+
+def test_unavailable_is_retried_only_for_idempotent_methods(server, monkeypatch):
+    """Test that a 503 is retried for PUT but handed back for POST and PATCH, which may have been applied."""
+    monkeypatch.setattr(http, "_sessions", {})
+    url = f"http://127.0.0.1:{server.server_address[1]}/x"
+    session = http.session_for(url)
+
+    server.statuses = [503]
+    assert session.put(url, data="x").status_code == 200
+    server.statuses = [503, 503]
+    assert session.post(url, json={}).status_code == 503
+    assert session.patch(url, json={}).status_code == 503
+    assert [method for method, _ in server.seen] == ["PUT", "PUT", "POST", "PATCH"]
+
+
+def test_shared_session_pool_grows_with_each_caller(monkeypatch):
+    """Test that every caller of session_for adds its connections to the host's pool."""
+    monkeypatch.setattr(http, "_sessions", {})
+    first = http.session_for("https://graph.example/v1.0", pool_size=5)
+    second = http.session_for("https://graph.example/v1.0/me", pool_size=5)
+    assert first is second
+    assert first.get_adapter("https://graph.example/").poolmanager.connection_pool_kw["maxsize"] == 10
@@ -0,0 +1,78 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from calendar_sync.utils import ical
+
+MEETING = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:m1\r\n"
+    "DTSTART;TZID=Europe/Moscow:20260105T100000\r\n"
+    "DTEND;TZID=Europe/Moscow:20260105T110000\r\n"
+    "SUMMARY:Standup\\, team\r\n"
+    "DESCRIPTION:first line\\nsecond line that is fol\r\n"
+    " ded\r\n"
+    'ATTENDEE;CN="Doe: John":mailto:j@example.com\r\n'
+    "BEGIN:VALARM\r\n"
+    "DESCRIPTION:alarm text\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:m2\r\n"
+    "DTSTART:20260106T090000Z\r\n"
+    "DURATION:PT1H30M\r\n"
+    "RRULE:FREQ=DAILY;COUNT=2\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_reads_only_the_wanted_properties():
+    """Test that VEVENTs come back with unfolded, unescaped values and zones applied."""
+    first, second = ical.parse_events(MEETING)
+    moscow = ZoneInfo("Europe/Moscow")
+    assert first == ical.VEvent(
+        uid="m1",
+        start=datetime.datetime(2026, 1, 5, 10, tzinfo=moscow),
+        end=datetime.datetime(2026, 1, 5, 11, tzinfo=moscow),
+        summary="Standup, team",
+        description="first line\nsecond line that is folded",
+        recurring=False,
+    )
+    assert first.start.isoformat() == "2026-01-05T10:00:00+03:00"
+    assert second.end.isoformat() == "2026-01-06T10:30:00+00:00"
+    assert second.summary == "" and second.recurring
+
+
+def test_all_day_and_floating_times():
+    """Test that DATE values stay dates and times without a zone stay naive."""
+    text = (
+        "BEGIN:VEVENT\nUID:d\nDTSTART;VALUE=DATE:20260304\nEND:VEVENT\n"
+        "BEGIN:VEVENT\nUID:f\nDTSTART:20260304T080000\nDTEND:20260304T090000\nEND:VEVENT\n"
+    )
+    allday, floating = ical.parse_events(text)
+    assert (allday.start.isoformat(), allday.end.isoformat()) == ("2026-03-04", "2026-03-05")
+    assert floating.start.isoformat() == "2026-03-04T08:00:00"
+
+
+def test_unknown_zone_needs_a_full_parser():
+    """Test that a TZID outside the tz database raises Unsupported."""
+    text = "BEGIN:VEVENT\nUID:w\nDTSTART;TZID=Russian Standard Time:20260210T150000\nEND:VEVENT\n"
+    with pytest.raises(ical.Unsupported):
+        ical.parse_events(text)
+
+
+def test_parse_many_reports_errors_per_text(monkeypatch):
+    """Test that parse_many keeps order and returns failures in place, also in a pool."""
+    broken = "BEGIN:VEVENT\nSUMMARY:no uid\nEND:VEVENT\n"
+    texts = [MEETING, broken] * 3
+    serial = ical.parse_many(texts)
+    assert [len(r) if isinstance(r, list) else "error" for r in serial] == [2, "error"] * 3
+
+    monkeypatch.setattr(ical, "POOL_MIN_TEXTS", 1)
+    pooled = ical.parse_many(texts, processes=2)
+    assert pooled[::2] == serial[::2]
+    assert all(isinstance(r, ValueError) for r in pooled[1::2])
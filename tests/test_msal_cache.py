@@ -0,0 +1,44 @@
+from calendar_sync.calendars import msal_cache
+
+
+class FakeApp:
+    """Stands in for msal.PublicClientApplication; hands out numbered tokens."""
+
+    def __init__(self, client_id, authority=None, token_cache=None):
+        self.cache = token_cache
+        self.silent_calls = 0
+        self.expires_in = 3600
+
+    def get_accounts(self):
+        return [{"username": "me"}]
+
+    def acquire_token_silent(self, scopes, account=None):
+        self.silent_calls += 1
+        self.cache.has_state_changed = True  # e.g. a rotated refresh token
+        return {"access_token": f"at{self.silent_calls}", "expires_in": self.expires_in}
+
+
+def test_tokens_are_served_from_memory_and_saved_once(tmp_path, monkeypatch):
+    """Test that calendars on one token file share tokens and the file is written on save only."""
+    monkeypatch.setattr(msal_cache.msal, "PublicClientApplication", FakeApp)
+    monkeypatch.setattr(msal_cache, "_caches", {})
+    path = str(tmp_path / "token.json")
+
+    cache = msal_cache.token_cache(path, "client", "https://login.example/organizations")
+    assert msal_cache.token_cache(path, "client", "https://login.example/organizations") is cache
+    app = cache._app
+
+    assert [cache.acquire(["scope"])["access_token"] for _ in range(5)] == ["at1"] * 5
+    assert app.silent_calls == 1
+    assert not (tmp_path / "token.json").exists()
+
+    cache.save()
+    cache.save()
+    assert (tmp_path / "token.json").exists()
+    assert not cache._cache.has_state_changed
+
+    # A token inside the refresh margin is replaced before it is handed out.
+    app.expires_in = msal_cache.REFRESH_MARGIN - 1
+    monkeypatch.setattr(cache, "_tokens", {})
+    assert cache.acquire(["scope"])["access_token"] == "at2"
+    assert cache.acquire(["scope"])["access_token"] == "at3"
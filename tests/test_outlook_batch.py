@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+from calendar_sync.calendars import outlook_calendar
+from calendar_sync.calendars.base import EventNotFound
+from calendar_sync.calendars.outlook_calendar import OutlookCalendar
+
+START = "2025-01-01T10:00:00Z"
+END = "2025-01-01T11:00:00Z"
+
+
+class FakeGraph:
+    """Answers /$batch calls from a script and records every HTTP call."""
+
+    def __init__(self, batch_answers, direct_answers=()):
+        self.batch_answers = list(batch_answers)
+        self.direct_answers = list(direct_answers)
+        self.calls = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.calls.append(("batch", [r["id"] for r in json["requests"]]))
+        answer = self.batch_answers.pop(0)
+        responses = [{"id": r["id"], **answer[int(r["id"])]} for r in json["requests"]]
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"responses": responses})
+
+    def request(self, method, url, headers=None, json=None, timeout=None):
+        self.calls.append((method, url.rsplit("/", 1)[-1]))
+        status, body = self.direct_answers.pop(0)
+        return SimpleNamespace(
+            status_code=status, content=b"{}", json=lambda: body, headers={"Retry-After": "0"},
+            raise_for_status=lambda: None,
+        )
+
+    def patch(self, url, headers=None, json=None, timeout=None):
+        return self.request("PATCH", url, headers=headers, json=json, timeout=timeout)
+
+
+def _calendar(monkeypatch, graph):
+    monkeypatch.setattr(outlook_calendar.time, "sleep", lambda seconds: None)
+    calendar = OutlookCalendar.__new__(OutlookCalendar)
+    calendar._session = graph
+    calendar.id = "outlook-test"
+    calendar.busy_calendar_id = None
+    calendar._headers = lambda extra=None: {}
+    return calendar
+
+
+def test_batch_maps_sub_responses_and_retries_throttled_ones(monkeypatch):
+    """Test that each sub-response maps to its item and only 429s are re-sent."""
+    throttled = {"status": 429, "headers": {"Retry-After": "2"}, "body": {}}
+    graph = FakeGraph(
+        batch_answers=[{
+            0: {"status": 201, "body": {"id": "b0"}},
+            1: throttled,
+            2: {"status": 400, "body": {"error": {"message": "bad"}}},
+        }],
+        direct_answers=[(429, {}), (201, {"id": "b1"})],
+    )
+    calendar = _calendar(monkeypatch, graph)
+    results = calendar.create_busy_events([(START, END, "x0"), (START, END, "x1"), (START, END, "x2")])
+
+    assert results[:2] == ["b0", "b1"]
+    assert "HTTP 400 bad" in str(results[2])
+    assert graph.calls == [("batch", ["0", "1", "2"]), ("POST", "events"), ("POST", "events")]
+
+
+def test_batches_hold_at_most_twenty_sub_requests(monkeypatch):
+    """Test that large writes are split into /$batch calls of 20."""
+    ok = {"status": 204, "body": None}
+    gone = {"status": 404, "body": {"error": {"message": "nf"}}}
+    graph = FakeGraph(batch_answers=[{i: ok for i in range(20)}, {20: gone, 21: ok}])
+    calendar = _calendar(monkeypatch, graph)
+    assert calendar.delete_events([f"e{i}" for i in range(22)]) == [None] * 22
+
+    graph = FakeGraph(batch_answers=[{0: gone}])
+    calendar = _calendar(monkeypatch, graph)
+    result, = calendar.update_busy_events([("gone", START, END, None)])
+    assert isinstance(result, EventNotFound)
+
+
+def test_single_update_patches_in_place_and_reports_vanished_events(monkeypatch):
+    """Test that PATCH moves the event under its id and a 404 raises EventNotFound."""
+    graph = FakeGraph(batch_answers=[], direct_answers=[(200, {"id": "b1"}), (404, {"error": {"code": "ErrorItemNotFound"}})])
+    calendar = _calendar(monkeypatch, graph)
+    assert calendar.update_busy_event("b1", START, END) == "b1"
+    with pytest.raises(EventNotFound):
+        calendar.update_busy_event("gone", START, END)
+    assert graph.calls == [("PATCH", "b1"), ("PATCH", "gone")]
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from calendar_sync.calendars.outlook_calendar import OutlookCalendar
+
+TIME_MIN = "2026-01-10T00:00:00Z"
+TIME_MAX = "2026-01-20T00:00:00Z"
+DELTA = "https://graph.microsoft.com/v1.0/me/calendarView/delta"
+
+
+def _event(event_id, day, **extra):
+    return {
+        "id": event_id, "subject": event_id, "body": {"content": ""},
+        "start": {"dateTime": f"2026-01-{day:02d}T10:00:00.0000000"},
+        "end": {"dateTime": f"2026-01-{day:02d}T11:00:00.0000000"},
+        **extra,
+    }
+
+
+class FakeGraph:
+    """Serves calendarView/delta pages by URL and records what was asked for."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append((url, params))
+        status, body = self.pages[url]
+        return SimpleNamespace(status_code=status, json=lambda: body, raise_for_status=lambda: None)
+
+
+def _calendar(graph):
+    calendar = OutlookCalendar.__new__(OutlookCalendar)
+    calendar.id = "outlook-test"
+    calendar.graph_calendar_id = None
+    calendar._session = graph
+    calendar._headers = lambda extra=None: {}
+    return calendar
+
+
+def test_full_round_follows_next_links_and_keeps_last_delta_link():
+    """Test that every page is read and the deltaLink of the last one becomes the token."""
+    graph = FakeGraph({
+        DELTA: (200, {"value": [_event("a", 11)], "@odata.nextLink": "page2"}),
+        "page2": (200, {"value": [_event("b", 12)], "@odata.deltaLink": "delta-1"}),
+    })
+    delta = _calendar(graph).list_changes(TIME_MIN, TIME_MAX)
+    assert delta.full and [e["id"] for e in delta.events] == ["a", "b"]
+    assert delta.sync_token == "delta-1"
+    assert graph.calls == [(DELTA, {"startDateTime": TIME_MIN, "endDateTime": TIME_MAX}), ("page2", None)]
+
+
+def test_removed_cancelled_and_out_of_window_changes_are_removed():
+    """Test that tombstones, cancellations and instances outside the window come back in removed."""
+    graph = FakeGraph({"delta-1": (200, {"value": [
+        _event("kept", 15),
+        {"id": "gone", "@removed": {"reason": "deleted"}},
+        _event("cancelled", 16, isCancelled=True),
+        _event("ended", 2),
+    ], "@odata.deltaLink": "delta-2"})})
+    delta = _calendar(graph).list_changes(TIME_MIN, TIME_MAX, "delta-1")
+    assert not delta.full
+    assert [e["id"] for e in delta.events] == ["kept"]
+    assert delta.removed == ["gone", "cancelled", "ended"]
+    assert delta.sync_token == "delta-2" and graph.calls == [("delta-1", None)]
+
+
+def test_expired_delta_link_falls_back_to_full_resync():
+    """Test that a 410 on the stored deltaLink lists the window again from scratch."""
+    graph = FakeGraph({
+        "stale": (410, {}),
+        DELTA: (200, {"value": [_event("a", 11)], "@odata.deltaLink": "fresh"}),
+    })
+    delta = _calendar(graph).list_changes(TIME_MIN, TIME_MAX, "stale")
+    assert delta.full and [e["id"] for e in delta.events] == ["a"]
+    assert delta.sync_token == "fresh"
@@ -0,0 +1,72 @@
+from calendar_sync.calendars.base import EventDelta
+from calendar_sync.db.index import MappingIndex
+from calendar_sync.db.models import EventMapping
+from calendar_sync.planner import plan_sync
+from calendar_sync.writes import CREATE, DELETE, DELETE_ORPHAN, UPDATE
+
+START = "2025-01-01T10:00:00+00:00"
+END = "2025-01-01T11:00:00+00:00"
+
+
+class FakeCalendar:
+    onlysource = False
+    busy_calendar_id = None
+
+    def __init__(self, cal_id):
+        self.id = cal_id
+
+
+def test_plan_sync_decides_without_touching_the_index():
+    """Test that planning a run leaves the index as it was and orders deletes first."""
+    a, b = FakeCalendar("a"), FakeCalendar("b")
+    index = MappingIndex(None, [
+        EventMapping(source_calendar="a", source_event_id="moved", target_calendar="b",
+                     busy_event_id="busy-moved", start_time=START, end_time=END),
+        EventMapping(source_calendar="a", source_event_id="gone", target_calendar="b",
+                     busy_event_id="busy-gone", start_time=START, end_time=END),
+    ])
+    fetched = {
+        "a": EventDelta([
+            {"id": "new", "start": START, "end": END, "summary": "New"},
+            {"id": "moved", "start": START, "end": "2025-01-01T12:00:00+00:00", "summary": "Moved"},
+        ], [], None, True),
+        "b": EventDelta([{"id": "stray", "start": START, "end": END, "summary": "Busy"}], [], None, True),
+    }
+
+    plan = plan_sync([a, b], fetched, index, set())
+
+    assert [(op.kind, op.target.id) for op in plan.ordered()] == [
+        (DELETE_ORPHAN, "b"), (DELETE, "b"), (UPDATE, "b"), (CREATE, "b"),
+    ]
+    assert plan.summary() == {DELETE_ORPHAN: 1, DELETE: 1, UPDATE: 1, CREATE: 1}
+    assert plan.describe()[0] == "delete_orphan  b busy=stray"
+    assert len(index) == 2
+    assert index.get("a", "moved", "b").end_time == END
+
+
+def test_same_instant_in_another_format_is_not_a_move():
+    """Test that a mapping is left alone when only the offset format of its times changed."""
+    a, b = FakeCalendar("a"), FakeCalendar("b")
+    index = MappingIndex(None, [
+        EventMapping(source_calendar="a", source_event_id="e1", target_calendar="b",
+                     busy_event_id="busy-e1", start_time=START, end_time=END),
+        EventMapping(source_calendar="a", source_event_id="e2", target_calendar="b",
+                     busy_event_id="busy-e2", start_time=START, end_time=END),
+    ])
+    fetched = {"a": EventDelta([
+        {"id": "e1", "start": "2025-01-01T13:00:00+03:00", "end": "2025-01-01T11:00:00Z", "summary": "Same"},
+        {"id": "e2", "start": "2025-01-01T13:00:00+02:00", "end": END, "summary": "Moved"},
+    ], [], None, True)}
+
+    plan = plan_sync([a, b], fetched, index, set())
+
+    assert [(op.kind, op.source_event_id, op.start) for op in plan] == [
+        (UPDATE, "e2", "2025-01-01T13:00:00+02:00"),
+    ]
+    assert index.get("a", "e1", "b").start_time == START
+
+    plan.store_reformatted(index)
+    same = index.get("a", "e1", "b")
+    assert (same.start_time, same.end_time) == ("2025-01-01T13:00:00+03:00", "2025-01-01T11:00:00Z")
+    assert same.busy_event_id == "busy-e1"
+    assert len(plan_sync([a, b], fetched, index, set()).reformatted) == 0
@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from calendar_sync import daemon
+from calendar_sync.daemon import Daemon
+from calendar_sync.push import PushReceiver, Subscriptions
+
+SECRET = "s3cret"
+
+
+@pytest.fixture
+def receiver():
+    changed = []
+    server = PushReceiver("127.0.0.1:0", SECRET, changed.append)
+    server.start()
+    server.changed = changed
+    yield server
+    server.stop()
+
+
+def _post(server, path, headers=None, body=b""):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    request = urllib.request.Request(url, data=body, headers=headers or {}, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, b""
+
+
+def test_google_notifications_are_verified(receiver):
+    """Test that only channel notifications with our token trigger a sync."""
+    assert _post(receiver, "/google/me%40gmail.com", {"X-Goog-Channel-Token": "forged"})[0] == 403
+    sync = {"X-Goog-Channel-Token": SECRET, "X-Goog-Resource-State": "sync"}
+    assert _post(receiver, "/google/me%40gmail.com", sync)[0] == 200
+    change = {"X-Goog-Channel-Token": SECRET, "X-Goog-Resource-State": "exists"}
+    assert _post(receiver, "/google/me%40gmail.com", change)[0] == 200
+    assert receiver.changed == ["me@gmail.com"]
+
+
+def test_graph_validation_and_notifications(receiver):
+    """Test the Graph validation handshake and clientState check."""
+    assert _post(receiver, "/outlook/me%40corp.com?validationToken=abc%20123") == (200, b"abc 123")
+    forged = json.dumps({"value": [{"clientState": "nope"}]}).encode()
+    assert _post(receiver, "/outlook/me%40corp.com", body=forged)[0] == 403
+    genuine = json.dumps({"value": [{"clientState": SECRET, "changeType": "updated"}]}).encode()
+    assert _post(receiver, "/outlook/me%40corp.com", body=genuine)[0] == 202
+    assert _post(receiver, "/caldav/x", body=genuine)[0] == 404
+    assert receiver.changed == ["me@corp.com"]
+
+
+class FakePushCalendar:
+    type = "google"
+    supports_push = True
+
+    def __init__(self, calendar_id):
+        self.id = calendar_id
+        self.calls = []
+
+    def subscribe(self, address, secret):
+        self.calls.append(("subscribe", address))
+        return {"id": f"sub{len(self.calls)}", "expires": time.time() + 100}
+
+    def renew_subscription(self, subscription, address, secret):
+        self.calls.append(("renew", subscription["id"]))
+        return {"id": "renewed", "expires": time.time() + 10_000}
+
+    def unsubscribe(self, subscription):
+        self.calls.append(("unsubscribe", subscription["id"]))
+
+
+def test_subscriptions_are_renewed_before_expiry():
+    """Test that subscriptions inside the renewal margin are renewed once."""
+    calendar = FakePushCalendar("me@gmail.com")
+    subscriptions = Subscriptions("https://sync.example.com/", SECRET, renew_margin=1000)
+    subscriptions.refresh([calendar])
+    subscriptions.refresh([calendar])
+    subscriptions.refresh([calendar])
+    subscriptions.close([calendar])
+    assert calendar.calls == [
+        ("subscribe", "https://sync.example.com/google/me%40gmail.com"),
+        ("renew", "sub1"),
+        ("unsubscribe", "renewed"),
+    ]
+
+
+def test_notifications_trigger_debounced_targeted_cycles(monkeypatch):
+    """Test that a burst of notifications becomes one targeted cycle."""
+    cycles = []
+    runner = Daemon(interval=3600, jitter=0, push={"listen": "127.0.0.1:0", "debounce_seconds": 0.2})
+
+    def cycle(session, calendars, sources=None):
+        cycles.append(sources)
+        if sources is None:
+            threading.Timer(0.05, lambda: [runner.request_sync(c) for c in ("a", "b", "a")]).start()
+        else:
+            runner.stop()
+
+    class FakeSession:
+        def close(self):
+            pass
+
+    monkeypatch.setattr(daemon, "get_session", FakeSession)
+    monkeypatch.setattr(daemon, "sync_cycle", cycle)
+    monkeypatch.setattr(daemon, "load_calendars", lambda configs=None, failed=None: ["cal"])
+    runner.run(max_cycles=5)
+    assert cycles == [None, {"a", "b"}]
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from calendar_sync.calendars.base import EventDelta
+from calendar_sync import sync
+from calendar_sync.sync import fetch_all_events
+
+
+class FakeCalendar:
+    def __init__(self, cal_id, events=None, delay=0, error=None, fetch_timeout=None):
+        self.id = cal_id
+        self.events = events or []
+        self.delay = delay
+        self.error = error
+        self.fetch_timeout = fetch_timeout
+
+    def list_events(self, time_min, time_max):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.events
+
+    def list_changes(self, time_min, time_max, sync_token=None):
+        return EventDelta(self.list_events(time_min, time_max), [], None, True)
+
+
+def test_fetch_all_events_runs_calendars_in_parallel():
+    """Test that fetches overlap instead of adding up."""
+    calendars = [FakeCalendar(f"c{i}", events=[{"id": str(i)}], delay=0.2) for i in range(5)]
+    started = time.monotonic()
+    fetched = fetch_all_events(calendars, "min", "max", set())
+    assert time.monotonic() - started < 0.8
+    ids = {cal_id: [event.id for event in delta.events] for cal_id, delta in fetched.items()}
+    assert ids == {f"c{i}": [str(i)] for i in range(5)}
+
+
+def test_fetch_all_events_times_out_slow_calendar():
+    """Test that a calendar past its timeout is marked failed without blocking the rest."""
+    release = threading.Event()
+
+    class HangingCalendar(FakeCalendar):
+        def list_events(self, time_min, time_max):
+            release.wait(5)
+            return []
+
+    failed = set()
+    calendars = [
+        FakeCalendar("fast", events=[{"id": "e"}]),
+        FakeCalendar("broken", error=RuntimeError("boom")),
+        HangingCalendar("slow", fetch_timeout=0.2),
+    ]
+    started = time.monotonic()
+    fetched = fetch_all_events(calendars, "min", "max", failed)
+    release.set()
+    assert time.monotonic() - started < 2
+    assert {cal_id: [event.id for event in delta.events] for cal_id, delta in fetched.items()} == {"fast": ["e"]}
+    assert failed == {"slow"}
+
+
+def test_fetch_all_events_skips_calendar_still_fetching():
+    """Test that a calendar whose timed-out fetch is still running is not fetched twice."""
+    release = threading.Event()
+    calls = []
+
+    class HangingCalendar(FakeCalendar):
+        def list_events(self, time_min, time_max):
+            calls.append(self.id)
+            release.wait(5)
+            return []
+
+    slow = HangingCalendar("stuck", fetch_timeout=0.1)
+    assert fetch_all_events([slow], "min", "max", set()) == {}
+    failed = set()
+    fetched = fetch_all_events([slow, FakeCalendar("ok", events=[{"id": "e"}])], "min", "max", failed)
+    assert list(fetched) == ["ok"] and failed == {"stuck"}
+    assert calls == ["stuck"]
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while "stuck" in sync._fetches_in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "stuck" in fetch_all_events([FakeCalendar("stuck")], "min", "max", set())
@@ -0,0 +1,105 @@
+from calendar_sync.calendars.base import EventDelta
+from calendar_sync.db.index import MappingIndex
+from calendar_sync.db.models import EventMapping, SyncState
+from calendar_sync.planner import Plan, plan_source
+from calendar_sync.sync import drop_removed_sync_states, store_sync_tokens, sync_cursors
+from calendar_sync.writes import CREATE, DELETE, UPDATE
+
+START = "2025-01-01T10:00:00+00:00"
+END = "2025-01-01T11:00:00+00:00"
+
+
+class FakeCalendar:
+    onlysource = False
+    busy_calendar_id = None
+    type = "google"
+
+    def __init__(self, cal_id, incremental=True):
+        self.id = cal_id
+        self.incremental = incremental
+
+    def series_id(self, event_id):
+        return event_id.split("_")[0] if "_" in event_id else None
+
+
+def _mapping(source_event_id, target, start=START):
+    return EventMapping(
+        source_calendar="src", source_event_id=source_event_id, target_calendar=target,
+        busy_event_id=f"busy-{source_event_id}-{target}", start_time=start, end_time=END,
+    )
+
+
+def _planned(plan):
+    return sorted((op.kind, op.target.id, op.source_event_id) for op in plan)
+
+
+def test_incremental_delta_only_touches_changed_and_removed_events():
+    """Test that unchanged mappings survive a delta that does not mention them."""
+    source, target = FakeCalendar("src"), FakeCalendar("dst")
+    index = MappingIndex(None, [
+        _mapping("unchanged", "dst"),
+        _mapping("moved", "dst"),
+        _mapping("cancelled", "dst"),
+        _mapping("series_20250101T100000Z", "dst"),
+        _mapping("series_20250102T100000Z", "dst"),
+    ])
+    delta = EventDelta(
+        events=[
+            {"id": "moved", "start": "2025-01-01T12:00:00+00:00", "end": END, "summary": "Moved"},
+            {"id": "new", "start": START, "end": END, "summary": "New"},
+        ],
+        removed=["cancelled", "series"],
+        sync_token="next",
+        full=False,
+    )
+    plan = Plan()
+    plan_source(source, delta, [source, target], index, plan, set())
+
+    assert _planned(plan) == [
+        (CREATE, "dst", "new"),
+        (DELETE, "dst", "cancelled"),
+        (DELETE, "dst", "series_20250101T100000Z"),
+        (DELETE, "dst", "series_20250102T100000Z"),
+        (UPDATE, "dst", "moved"),
+    ]
+
+
+def test_sync_cursors_resync_when_window_slides_past_stored_end():
+    """Test that a stored token is used only while its window covers time_max."""
+    fresh, stale, plain = FakeCalendar("fresh"), FakeCalendar("stale"), FakeCalendar("plain", incremental=False)
+    states = {
+        "fresh": SyncState(calendar_id="fresh", sync_token="t1", window_end="2025-01-20T00:00:00Z"),
+        "stale": SyncState(calendar_id="stale", sync_token="t2", window_end="2025-01-10T00:00:00Z"),
+    }
+    cursors = sync_cursors([fresh, stale, plain], states, "2025-01-15T00:00:00Z")
+    assert cursors["fresh"] == ("t1", "2025-01-20T00:00:00Z")
+    assert cursors["stale"] == (None, "2025-01-16T00:00:00Z")
+    assert "plain" not in cursors
+
+
+def test_store_sync_tokens_holds_cursor_when_a_target_failed(monkeypatch):
+    """Test that changes are replayed if they could not reach every target."""
+    saved = []
+    monkeypatch.setattr("calendar_sync.sync.save_sync_state", lambda session, *args: saved.append(args))
+    a, b, c = FakeCalendar("a"), FakeCalendar("b"), FakeCalendar("c")
+    c.onlysource = True
+    fetched = {cal.id: EventDelta([], [], f"tok-{cal.id}", False) for cal in (a, b, c)}
+    cursors = {cal.id: ("old", "2025-01-20T00:00:00Z") for cal in (a, b, c)}
+
+    store_sync_tokens(None, [a, b, c], fetched, cursors, failed_calendars={"b"})
+    # a's and c's changes could not reach b; b only targets a (c is onlysource).
+    assert saved == [("b", "tok-b", "2025-01-20T00:00:00Z")]
+
+    saved.clear()
+    store_sync_tokens(None, [a, b, c], fetched, cursors, failed_calendars=set(), unsaved_sources={"a"})
+    # a's mappings did not all reach the database, so its changes are replayed.
+    assert [args[0] for args in saved] == ["b", "c"]
+
+
+def test_sync_states_of_removed_calendars_are_dropped(monkeypatch):
+    """Test that cursors are deleted only for calendars no longer configured."""
+    cleared = []
+    monkeypatch.setattr("calendar_sync.sync.clear_sync_state", lambda session, cal_id: cleared.append(cal_id))
+    states = {cal_id: SyncState(calendar_id=cal_id) for cal_id in ("kept", "removed")}
+    drop_removed_sync_states(None, [FakeCalendar("kept"), FakeCalendar("new")], states)
+    assert cleared == ["removed"]
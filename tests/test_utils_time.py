@@ -16,3 +16,18 @@ def test_get_time_window_format():
     assert time_min != time_max
     # Check order
     assert time_min < time_max
+
+
+def test_shift_time_keeps_format():
+    assert time_utils.shift_time('2025-01-01T10:00:00Z', 24) == '2025-01-02T10:00:00Z'
+    assert time_utils.shift_time('2025-01-01T10:00:00Z', -1.5) == '2025-01-01T08:30:00Z'
+
+
+def test_to_epoch_normalizes_offsets():
+    utc = time_utils.to_epoch('2025-01-01T10:00:00Z')
+    assert utc == 1735725600
+    assert time_utils.to_epoch('2025-01-01T10:00:00+00:00') == utc
+    assert time_utils.to_epoch('2025-01-01T13:00:00+03:00') == utc
+    assert time_utils.to_epoch('2025-01-01T10:00:00.0000000') == utc  # Graph, no offset
+    assert time_utils.to_epoch('2025-01-01') is None
+    assert time_utils.to_epoch('garbage T') is None
@@ -0,0 +1,200 @@
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from calendar_sync.calendars.base import EventNotFound
+from calendar_sync.db.index import MappingIndex
+from calendar_sync.db.models import Base, EventMapping
+from calendar_sync.sync import duplicate_busy_events
+from calendar_sync.writes import CREATE, DELETE, UPDATE, WriteExecutor, WriteOp, apply_results
+
+
+class FakeTarget:
+    def __init__(self, cal_id, type="google", delay=0.05, fail_create=False):
+        self.id = cal_id
+        self.type = type
+        self.delay = delay
+        self.fail_create = fail_create
+        self.active = 0
+        self.peak = 0
+        self.deleted = []
+        self.updated = []
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def _enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self._seq += 1
+            return self._seq
+
+    def _leave(self):
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+
+    def create_busy_event(self, start, end, source_event_id=None):
+        seq = self._enter()
+        self._leave()
+        if self.fail_create:
+            raise RuntimeError("quota exceeded")
+        return f"{self.id}-busy-{source_event_id}-{seq}"
+
+    def update_busy_event(self, busy_event_id, start, end, source_event_id=None):
+        self._enter()
+        self._leave()
+        if busy_event_id in self.deleted:
+            raise EventNotFound(busy_event_id)
+        self.updated.append(busy_event_id)
+        return busy_event_id
+
+    def delete_event(self, event_id):
+        self._enter()
+        self._leave()
+        self.deleted.append(event_id)
+
+
+def test_run_respects_per_backend_limits():
+    """Test that each target runs at most its backend's cap concurrently."""
+    google, caldav = FakeTarget("g"), FakeTarget("c", type="caldav")
+    writer = WriteExecutor(limits={"google": 3, "caldav": 1})
+    for i in range(6):
+        writer.submit(WriteOp(CREATE, google, ("src", f"e{i}", "g"), start="s", end="e"))
+        writer.submit(WriteOp(CREATE, caldav, ("src", f"e{i}", "c"), start="s", end="e"))
+
+    ops = writer.run()
+    assert len(ops) == 12
+    assert all(op.result and op.error is None for op in ops)
+    assert google.peak == 3
+    assert caldav.peak == 1
+    assert len(writer) == 0
+
+
+def test_failed_create_skips_rest_of_target():
+    """Test that a target whose create fails is given up for the run."""
+    bad, good = FakeTarget("bad", fail_create=True, delay=0), FakeTarget("good", delay=0)
+    writer = WriteExecutor(limits={"google": 1})
+    for i in range(3):
+        writer.submit(WriteOp(CREATE, bad, ("src", f"e{i}", "bad"), start="s", end="e"))
+    writer.submit(WriteOp(CREATE, good, ("src", "e0", "good"), start="s", end="e"))
+
+    failed = set()
+    index = MappingIndex(session=None)
+    apply_results(writer.run(), index, failed)
+    assert failed == {"bad"}
+    assert bad.active == 0 and bad._seq == 1
+    assert index.get("src", "e0", "good") is not None
+    assert index.get("src", "e0", "bad") is None
+
+
+def test_apply_results_records_mappings():
+    """Test that create/update/delete outcomes land in the index."""
+    target = FakeTarget("t", delay=0)
+    existing = EventMapping(
+        source_calendar="src", source_event_id="moved", target_calendar="t",
+        busy_event_id="old", start_time="s", end_time="e",
+    )
+    orphan = EventMapping(
+        source_calendar="src", source_event_id="gone", target_calendar="t",
+        busy_event_id="orphan", start_time="s", end_time="e",
+    )
+    index = MappingIndex(session=None, mappings=[existing, orphan])
+    writer = WriteExecutor()
+    writer.submit(WriteOp(CREATE, target, ("src", "new", "t"), start="s1", end="e1"))
+    writer.submit(WriteOp(UPDATE, target, ("src", "moved", "t"), busy_event_id="old", start="s2", end="e2"))
+    writer.submit(WriteOp(DELETE, target, ("src", "gone", "t"), busy_event_id="orphan"))
+
+    failed = set()
+    assert apply_results(writer.run(), index, failed) == []
+    assert not failed
+    assert target.deleted == ["orphan"]
+    assert target.updated == ["old"]
+    assert index.get("src", "new", "t").start_time == "s1"
+    moved = index.get("src", "moved", "t")
+    assert moved.busy_event_id == "old" and moved.start_time == "s2"
+    assert index.get_busy("t", "old") is moved
+    assert index.get("src", "gone", "t") is None
+
+
+def test_update_of_vanished_event_recreates_it():
+    """Test that an update falls back to create when the busy event is gone."""
+    target = FakeTarget("t", delay=0)
+    target.deleted.append("old")
+    index = MappingIndex(session=None, mappings=[EventMapping(
+        source_calendar="src", source_event_id="moved", target_calendar="t",
+        busy_event_id="old", start_time="s", end_time="e",
+    )])
+    writer = WriteExecutor()
+    writer.submit(WriteOp(UPDATE, target, ("src", "moved", "t"), busy_event_id="old", start="s2", end="e2"))
+
+    failed = set()
+    assert apply_results(writer.run(), index, failed) == []
+    assert not failed
+    moved = index.get("src", "moved", "t")
+    assert moved.busy_event_id.startswith("t-busy-moved") and moved.end_time == "e2"
+    assert index.get_busy("t", "old") is None
+
+
+class BatchTarget(FakeTarget):
+    write_batch_size = 3
+
+    def __init__(self, cal_id):
+        super().__init__(cal_id, delay=0)
+        self.calls = []
+
+    def create_busy_events(self, items):
+        self.calls.append(("create", len(items)))
+        return [RuntimeError("rejected") if sid == "bad" else f"busy-{sid}" for _, _, sid in items]
+
+    def delete_events(self, event_ids):
+        self.calls.append(("delete", len(event_ids)))
+        return [None] * len(event_ids)
+
+
+def test_batch_backends_get_grouped_ops_and_per_item_results():
+    """Test that consecutive ops of one kind go out in batches and results map back per op."""
+    target = BatchTarget("t")
+    writer = WriteExecutor(limits={"google": 1})
+    deletes = [writer.submit(WriteOp(DELETE, target, ("src", f"d{i}", "t"), busy_event_id=f"old{i}")) for i in range(2)]
+    creates = [
+        writer.submit(WriteOp(CREATE, target, ("src", sid, "t"), start="s", end="e"))
+        for sid in ("e0", "e1", "bad", "e3")
+    ]
+
+    writer.run()
+    assert target.calls == [("delete", 2), ("create", 3)]  # "bad" fails the target
+    assert all(op.error is None for op in deletes)
+    assert [op.result for op in creates] == ["busy-e0", "busy-e1", None, None]
+    assert isinstance(creates[2].error, RuntimeError)
+    assert creates[3].skipped
+
+
+def test_conflicting_mapping_is_reconciled_in_the_same_run():
+    """Test that a lost insert race deletes our duplicate and moves the stored busy event."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    session = Session()
+    index = MappingIndex.load(session)
+    index.add("src", "e1", "t", "ours", "2025-01-01T12:00:00+00:00", "2025-01-01T13:00:00+00:00")
+
+    other = Session()
+    other.add(EventMapping(source_calendar="src", source_event_id="e1", target_calendar="t",
+                           busy_event_id="theirs", start_time="2025-01-01T10:00:00Z", end_time="2025-01-01T11:00:00Z"))
+    other.commit()
+    other.close()
+
+    target = FakeTarget("t", delay=0)
+    conflicts, failed = index.flush()
+    writer = WriteExecutor(limits={"google": 1})
+    for op in duplicate_busy_events(conflicts, [target], index):
+        writer.submit(op)
+    assert apply_results(writer.run(), index, set()) == []
+    assert index.flush() == ([], set())
+
+    assert target.deleted == ["ours"] and target.updated == ["theirs"]
+    row, = session.query(EventMapping).all()
+    assert (row.busy_event_id, row.start_time) == ("theirs", "2025-01-01T12:00:00+00:00")